@@ -1,15 +1,47 @@
-import indicators
-import performance
-import portfolio
-import visualisation
-from signals import Signals
-from utils import get_data
+import importlib
+
+# Subpackages and entry points load on first access, so workers that only
+# compute indicators do not import plotting or download libraries
+LazyAttributes = {
+    "data": ("data", None),
+    "indicators": ("indicators", None),
+    "performance": ("performance", None),
+    "portfolio": ("portfolio", None),
+    "visualisation": ("visualisation", None),
+    "Profiler": ("instrumentation", "Profiler"),
+    "stage": ("instrumentation", "stage"),
+    "timed": ("instrumentation", "timed"),
+    "BacktestRunner": ("runner", "BacktestRunner"),
+    "Signals": ("signals", "Signals"),
+    "get_data": ("utils", "get_data"),
+}
 
 __all__ = [
+    "data",
     "indicators",
     "visualisation",
     "performance",
     "portfolio",
+    "BacktestRunner",
+    "Profiler",
+    "stage",
+    "timed",
     "Signals",
     "get_data",
 ]
+
+
+def __getattr__(name: str):
+    if name not in LazyAttributes:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module_name, attribute = LazyAttributes[name]
+    value = importlib.import_module(module_name)
+    if attribute is not None:
+        value = getattr(value, attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(LazyAttributes))
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from lib import Signals
+
+# The indicators Signals runs by name, so new ones are benchmarked too
+IndicatorMap = Signals.IndicatorMap
+
+
+def make_price_data(
+    n_bars: int, symbol: str = "SYN", freq: str = "min", seed: int = 0
+) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2000-01-03", periods=n_bars, freq=freq, name="Date")
+
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 1e-3, n_bars)))
+    open_ = close * np.exp(rng.normal(0, 3e-4, n_bars))
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, 4e-4, n_bars)))
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, 4e-4, n_bars)))
+
+    df = pd.DataFrame(
+        {
+            "Open": open_,
+            "High": high,
+            "Low": low,
+            "Close": close,
+            "Adj Close": close * 0.99,
+            "Volume": rng.integers(1e5, 1e6, n_bars).astype(float),
+        },
+        index=pd.MultiIndex.from_arrays(
+            [np.full(n_bars, symbol), dates], names=["Tickers", "Date"]
+        ),
+    )
+    df["Adj Ratio"] = df["Adj Close"] / df["Close"]
+    df[["Adj Open", "Adj High", "Adj Low"]] = df[["Open", "High", "Low"]].multiply(
+        df["Adj Ratio"], axis="index"
+    )
+    return df
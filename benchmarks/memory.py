@@ -0,0 +1,75 @@
+import argparse
+import gc
+import multiprocessing
+import resource
+import sys
+import tracemalloc
+
+from lib.indicators import IndicatorsCombined
+from lib.portfolio import Portfolio
+
+from .common import IndicatorMap, make_price_data
+
+
+def _measure(indicator: str, n_bars: int, queue: multiprocessing.Queue):
+    df_prices = make_price_data(n_bars)
+    price_data_bytes = df_prices.memory_usage(deep=True).sum()
+    gc.collect()
+
+    tracemalloc.start()
+    if indicator == "IndicatorsCombined":
+        indicators = [
+            IndicatorMap[name]("SYN", df_prices, df_prices.index[0][1])
+            for name in ["MACD", "MA_crossover", "RSI"]
+        ]
+        for each in indicators:
+            each.run()
+        df = IndicatorsCombined(indicators, 2, 2).get_price_data()
+    else:
+        each = IndicatorMap[indicator]("SYN", df_prices, df_prices.index[0][1])
+        each.run()
+        df = each.get_price_data()
+    Portfolio(df)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    max_rss_bytes = max_rss if sys.platform == "darwin" else max_rss * 1024
+    queue.put((price_data_bytes, peak, max_rss_bytes))
+
+
+def run(n_bars: int) -> list[dict]:
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for indicator in list(IndicatorMap) + ["IndicatorsCombined"]:
+        queue = context.Queue()
+        process = context.Process(target=_measure, args=(indicator, n_bars, queue))
+        process.start()
+        price_data_bytes, peak, max_rss_bytes = queue.get()
+        process.join()
+        results.append(
+            {
+                "indicator": indicator,
+                "n_bars": n_bars,
+                "price_data_mb": price_data_bytes / 2**20,
+                "peak_traced_mb": peak / 2**20,
+                "peak_to_price_data": peak / price_data_bytes,
+                "max_rss_mb": max_rss_bytes / 2**20,
+            }
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Peak memory of indicator + Portfolio runs"
+    )
+    parser.add_argument("--n-bars", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    for row in run(args.n_bars):
+        print(
+            f"{row['indicator']:<20} price data {row['price_data_mb']:8.1f} MB  "
+            f"peak traced {row['peak_traced_mb']:8.1f} MB "
+            f"({row['peak_to_price_data']:4.1f}x)  max RSS {row['max_rss_mb']:8.1f} MB"
+        )
@@ -0,0 +1,269 @@
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+import numpy as np
+
+from lib.indicators import IndicatorsCombined
+from lib.performance import Bootstrap, Performance, PerformanceCustom
+from lib.portfolio import Portfolio, PortfolioUpdated
+
+from .common import IndicatorMap, make_price_data
+
+
+def _make_price_data(n_bars: int):
+    # Daily bars while the dates fit in pandas' range, minute bars beyond that
+    return make_price_data(n_bars, freq="D" if n_bars <= 50_000 else "min")
+
+
+def _setup_indicator(name: str, n_bars: int) -> Callable:
+    df_prices = _make_price_data(n_bars)
+    start_date = df_prices.index[0][1]
+
+    def run():
+        indicator = IndicatorMap[name]("SYN", df_prices, start_date)
+        indicator.run()
+        indicator.get_price_data()
+
+    return run
+
+
+def _setup_indicators_combined(n_bars: int) -> Callable:
+    df_prices = _make_price_data(n_bars)
+    start_date = df_prices.index[0][1]
+
+    def run():
+        indicators = [
+            IndicatorMap[name]("SYN", df_prices, start_date)
+            for name in ["MACD", "MA_crossover", "RSI"]
+        ]
+        for indicator in indicators:
+            indicator.run()
+        IndicatorsCombined(indicators, 2, 2).get_price_data()
+
+    return run
+
+
+def _make_indicator_output(n_bars: int):
+    df_prices = _make_price_data(n_bars)
+    indicator = IndicatorMap["MACD"]("SYN", df_prices, df_prices.index[0][1])
+    indicator.run()
+    return indicator.get_price_data()
+
+
+def _setup_portfolio(n_bars: int) -> Callable:
+    df = _make_indicator_output(n_bars)
+    return lambda: Portfolio(df, transaction_fee=5)
+
+
+def _setup_portfolio_updated(n_bars: int) -> Callable:
+    df = _make_indicator_output(n_bars)
+    return lambda: PortfolioUpdated(df, transaction_fee=5)
+
+
+def _setup_performance(n_bars: int) -> Callable:
+    df_portfolio = Portfolio(_make_indicator_output(n_bars)).get_portfolio()
+    log_returns = df_portfolio.set_index("Date")["strategy_log_returns"]
+
+    def run():
+        performance = Performance(log_returns)
+        performance.compute_sharpe_ratio()
+        performance.compute_sharpe_ratio("pct_chg")
+        performance.compute_cagr()
+        performance.compute_max_dd()
+        performance.compute_longest_drawdown_period()
+
+    return run
+
+
+def _setup_performance_custom(n_bars: int) -> Callable:
+    df_portfolio = Portfolio(_make_indicator_output(n_bars)).get_portfolio()
+    df = df_portfolio[["Date", "strategy_cum_net_returns"]]
+    df.columns = ["Date", "Cumulative Returns"]
+
+    def run():
+        # PerformanceCustom sets the index of the frame it is given in place
+        performance = PerformanceCustom(df.copy(), "SYN")
+        performance.compute_sharpe_ratio()
+        performance.compute_cagr()
+        performance.compute_annual_returns()
+        performance.compute_n_largest_drawdowns()
+
+    return run
+
+
+def _setup_bootstrap(n_bars: int) -> Callable:
+    df_portfolio = Portfolio(_make_indicator_output(n_bars)).get_portfolio()
+    log_returns = df_portfolio.set_index("Date")["strategy_log_returns"]
+    return lambda: Bootstrap(log_returns, seed=0).run(n_paths=200)
+
+
+Cases = {
+    **{
+        name: (lambda n_bars, name=name: _setup_indicator(name, n_bars))
+        for name in IndicatorMap
+    },
+    "IndicatorsCombined": _setup_indicators_combined,
+    "Portfolio": _setup_portfolio,
+    "PortfolioUpdated": _setup_portfolio_updated,
+    "Performance": _setup_performance,
+    "PerformanceCustom": _setup_performance_custom,
+    "Bootstrap": _setup_bootstrap,
+}
+
+
+def _measure(case: str, n_bars: int, repeat: int, queue: multiprocessing.Queue):
+    run = Cases[case](n_bars)
+
+    # Repeat short runs and keep the fastest to cut timer noise
+    timings = []
+    while len(timings) < repeat:
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+        if sum(timings) > 1:
+            break
+
+    gc.collect()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    queue.put((min(timings), len(timings), peak))
+
+
+HeavyModules = ["matplotlib", "yfinance", "numba"]
+
+# Cold start of a worker: import the package and compute one small indicator
+StartupScript = """
+import json, sys, time, tracemalloc
+if {trace_memory}:
+    tracemalloc.start()
+start = time.perf_counter()
+import lib
+from lib.indicators import Indicator_MACD
+from lib.benchmarks.common import make_price_data
+df_prices = make_price_data(250)
+Indicator_MACD("SYN", df_prices, df_prices.index[0][1]).run()
+seconds = time.perf_counter() - start
+peak = tracemalloc.get_traced_memory()[1] if {trace_memory} else 0
+loaded = [module for module in {heavy_modules} if module in sys.modules]
+print(json.dumps([seconds, peak, loaded]))
+"""
+
+
+def _run_startup(trace_memory: bool) -> tuple[float, int, list[str]]:
+    script = StartupScript.format(trace_memory=trace_memory, heavy_modules=HeavyModules)
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        check=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    ).stdout
+    return tuple(json.loads(output.splitlines()[-1]))
+
+
+def run_startup(repeat: int = 5) -> dict:
+    timings = [_run_startup(False)[0] for _ in range(repeat)]
+    _, peak, loaded = _run_startup(True)
+    return {
+        "case": "startup",
+        "n_bars": 0,
+        "seconds": min(timings),
+        "n_runs": len(timings),
+        "peak_traced_mb": peak / 2**20,
+        "heavy_modules": loaded,
+    }
+
+
+def run(cases: list[str], n_bars_list: list[int], repeat: int = 5) -> list[dict]:
+    # Each case runs in a fresh process so peaks and caches do not leak across
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for n_bars in n_bars_list:
+        for case in cases:
+            queue = context.Queue()
+            process = context.Process(
+                target=_measure, args=(case, n_bars, repeat, queue)
+            )
+            process.start()
+            process.join()
+            if process.exitcode != 0:
+                raise Exception(f"Benchmark {case} with {n_bars} bars failed")
+            seconds, n_runs, peak = queue.get()
+            results.append(
+                {
+                    "case": case,
+                    "n_bars": n_bars,
+                    "seconds": seconds,
+                    "n_runs": n_runs,
+                    "peak_traced_mb": peak / 2**20,
+                }
+            )
+    return results
+
+
+def compare(results: list[dict], baseline: list[dict], threshold: float) -> list[dict]:
+    baseline = {(row["case"], row["n_bars"]): row for row in baseline}
+    regressions = []
+    for row in results:
+        base = baseline.get((row["case"], row["n_bars"]), None)
+        if base is None:
+            continue
+        for metric in ["seconds", "peak_traced_mb"]:
+            ratio = row[metric] / max(base[metric], np.finfo(float).tiny)
+            if ratio > threshold:
+                regressions.append({**row, "metric": metric, "ratio": ratio})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time and peak memory of indicators, portfolios and performance"
+    )
+    parser.add_argument(
+        "--n-bars", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--cases", nargs="+", choices=list(Cases), default=list(Cases))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--startup", action="store_true", help="also time a cold package import"
+    )
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args()
+
+    results = run(args.cases, args.n_bars, args.repeat)
+    if args.startup:
+        results.append(run_startup(args.repeat))
+    for row in results:
+        print(
+            f"{row['case']:<20} {row['n_bars']:>10,} bars  "
+            f"{row['seconds'] * 1e3:10.2f} ms  (best of {row['n_runs']})  "
+            f"peak traced {row['peak_traced_mb']:8.1f} MB"
+        )
+        if row["case"] == "startup":
+            print(f"{'':<20} heavy modules loaded: {row['heavy_modules'] or 'none'}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for row in regressions:
+            print(
+                f"REGRESSION {row['case']} {row['n_bars']:,} bars: "
+                f"{row['metric']} {row['ratio']:.2f}x baseline"
+            )
+        if regressions:
+            raise SystemExit(1)
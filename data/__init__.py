@@ -0,0 +1,22 @@
+from .cache import PriceCache
+from .chunks import iter_csv_chunks, iter_frame_chunks, iter_parquet_chunks
+from .intraday import MemmapProvider, MemmapStore
+from .providers import (
+    DataProvider,
+    InMemoryProvider,
+    LocalDirectoryProvider,
+    YFinanceProvider,
+)
+
+__all__ = [
+    "PriceCache",
+    "DataProvider",
+    "InMemoryProvider",
+    "LocalDirectoryProvider",
+    "YFinanceProvider",
+    "MemmapProvider",
+    "MemmapStore",
+    "iter_csv_chunks",
+    "iter_frame_chunks",
+    "iter_parquet_chunks",
+]
@@ -0,0 +1,169 @@
+import json
+import os
+from datetime import datetime
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+
+class PriceCache:
+    def __init__(self, cache_dir: str, offline: bool = False):
+        self.cache_dir = cache_dir
+        self.offline = offline
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def get(
+        self,
+        ticker: str,
+        start: datetime,
+        end: datetime,
+        fetch: Callable[[str, datetime, datetime], pd.DataFrame],
+    ) -> pd.DataFrame:
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        df, ranges = self._load(ticker)
+
+        if self.offline:
+            if df is None:
+                raise Exception(f"No cached data for {ticker} in offline mode")
+            return self._slice(df, start, end)
+
+        # Nothing trades in a range without a weekday, it is covered unfetched
+        missing_ranges = self._compute_missing_ranges(ranges, start, end)
+        covered = [
+            missing_range
+            for missing_range in missing_ranges
+            if not self._has_business_days(*missing_range)
+        ]
+        fetched = {
+            (range_start, range_end): fetch(ticker, range_start, range_end)
+            for range_start, range_end in missing_ranges
+            if (range_start, range_end) not in covered
+        }
+
+        dfs = ([] if df is None or df.empty else [df]) + [
+            df_range for df_range in fetched.values() if not df_range.empty
+        ]
+        if dfs:
+            df = pd.concat(dfs)
+            df = df[~df.index.duplicated(keep="last")].sort_index()
+
+        # An empty result is only trusted before the first known bar, i.e. before
+        # listing. Inside or after the known history it may be a failed download
+        # the provider could not tell apart, so the range is fetched again
+        first_date = df.index[0] if dfs else None
+        covered += [
+            (range_start, range_end)
+            for (range_start, range_end), df_range in fetched.items()
+            if not df_range.empty
+            or (first_date is not None and range_end <= first_date)
+        ]
+        if not covered:
+            return self._slice(df, start, end) if df is not None else pd.DataFrame()
+
+        # Ranges reaching into today are refetched next time as the bar is incomplete
+        today = pd.Timestamp.today().normalize()
+        ranges = self._merge_ranges(
+            ranges
+            + [
+                (range_start, min(range_end, today))
+                for range_start, range_end in covered
+            ]
+        )
+        df = pd.DataFrame() if df is None else df
+        self._save(ticker, df, ranges)
+        return self._slice(df, start, end)
+
+    def get_cached_ranges(self, ticker: str) -> list[tuple[pd.Timestamp, pd.Timestamp]]:
+        return self._load(ticker)[1]
+
+    @staticmethod
+    def _slice(
+        df: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp
+    ) -> pd.DataFrame:
+        if df.empty:
+            return df
+        return df.loc[(df.index >= start) & (df.index < end)]
+
+    def _get_path(self, ticker: str, extension: str) -> str:
+        filename = ticker.replace(os.sep, "_")
+        return os.path.join(self.cache_dir, f"{filename}.{extension}")
+
+    def _load(
+        self, ticker: str
+    ) -> tuple[pd.DataFrame | None, list[tuple[pd.Timestamp, pd.Timestamp]]]:
+        data_path = self._get_path(ticker, "parquet")
+        ranges_path = self._get_path(ticker, "json")
+        if not (os.path.exists(data_path) and os.path.exists(ranges_path)):
+            return None, []
+
+        df = pd.read_parquet(data_path)
+        with open(ranges_path) as f:
+            ranges = [
+                (pd.Timestamp(range_start), pd.Timestamp(range_end))
+                for range_start, range_end in json.load(f)["ranges"]
+            ]
+        return df, ranges
+
+    def _save(
+        self,
+        ticker: str,
+        df: pd.DataFrame,
+        ranges: list[tuple[pd.Timestamp, pd.Timestamp]],
+    ):
+        data_path = self._get_path(ticker, "parquet")
+        ranges_path = self._get_path(ticker, "json")
+
+        df.to_parquet(f"{data_path}.{os.getpid()}.tmp")
+        with open(f"{ranges_path}.{os.getpid()}.tmp", "w") as f:
+            json.dump(
+                {
+                    "ranges": [
+                        [range_start.isoformat(), range_end.isoformat()]
+                        for range_start, range_end in ranges
+                    ]
+                },
+                f,
+            )
+        os.replace(f"{data_path}.{os.getpid()}.tmp", data_path)
+        os.replace(f"{ranges_path}.{os.getpid()}.tmp", ranges_path)
+
+    @staticmethod
+    def _merge_ranges(
+        ranges: list[tuple[pd.Timestamp, pd.Timestamp]],
+    ) -> list[tuple[pd.Timestamp, pd.Timestamp]]:
+        merged = []
+        for range_start, range_end in sorted(ranges):
+            if range_start >= range_end:
+                continue
+            if merged and range_start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], range_end))
+            else:
+                merged.append((range_start, range_end))
+        return merged
+
+    @staticmethod
+    def _has_business_days(range_start: pd.Timestamp, range_end: pd.Timestamp) -> bool:
+        first_day = range_start.normalize()
+        last_day = (range_end - pd.Timedelta(1, "ns")).normalize()
+        return (
+            np.busday_count(first_day.date(), (last_day + pd.Timedelta(days=1)).date())
+            > 0
+        )
+
+    @staticmethod
+    def _compute_missing_ranges(
+        ranges: list[tuple[pd.Timestamp, pd.Timestamp]],
+        start: pd.Timestamp,
+        end: pd.Timestamp,
+    ) -> list[tuple[pd.Timestamp, pd.Timestamp]]:
+        missing_ranges = []
+        for range_start, range_end in ranges:
+            if range_end <= start or range_start >= end:
+                continue
+            if range_start > start:
+                missing_ranges.append((start, range_start))
+            start = max(start, range_end)
+        if start < end:
+            missing_ranges.append((start, end))
+        return missing_ranges
@@ -0,0 +1,40 @@
+from typing import Iterator
+
+import pandas as pd
+
+
+def iter_frame_chunks(df: pd.DataFrame, chunk_size: int) -> Iterator[pd.DataFrame]:
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start : start + chunk_size]
+
+
+def iter_parquet_chunks(
+    path: str, chunk_size: int = 100_000, columns: list[str] = None
+) -> Iterator[pd.DataFrame]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    # The index columns are read too, so the pandas metadata can restore them
+    if columns is not None:
+        pandas_metadata = parquet_file.schema_arrow.pandas_metadata or {}
+        index_columns = [
+            column
+            for column in pandas_metadata.get("index_columns", [])
+            if isinstance(column, str)
+        ]
+        columns = index_columns + list(columns)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+        yield pa.Table.from_batches([batch]).to_pandas()
+
+
+def iter_csv_chunks(path: str, chunk_size: int = 100_000) -> Iterator[pd.DataFrame]:
+    # round_trip parses floats back to the exact values that were written
+    with pd.read_csv(
+        path,
+        index_col="Date",
+        parse_dates=True,
+        float_precision="round_trip",
+        chunksize=chunk_size,
+    ) as reader:
+        yield from reader
@@ -0,0 +1,204 @@
+import json
+import os
+from datetime import datetime
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from .providers import DataProvider
+
+
+class MemmapStore:
+    MetaFile = "meta.json"
+    DateColumn = "Date"
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        os.makedirs(root_dir, exist_ok=True)
+
+    def write(self, symbol: str, df: pd.DataFrame):
+        meta = self._get_meta(df)
+        symbol_dir = self._get_dir(symbol)
+        os.makedirs(symbol_dir, exist_ok=True)
+        for column, values in self._get_columns(df, meta).items():
+            with open(self._get_path(symbol, column), "wb") as f:
+                values.tofile(f)
+        self._save_meta(symbol, meta)
+
+    def append(self, symbol: str, df: pd.DataFrame):
+        meta = self.get_meta(symbol)
+        if meta is None:
+            return self.write(symbol, df)
+        if list(df.columns) != meta["columns"]:
+            raise Exception(f"Columns of {symbol} are {meta['columns']}")
+        if len(df) == 0:
+            return
+
+        last_date = self._load_column(symbol, self.DateColumn, meta)[-1:]
+        dates = self._get_dates(df)
+        if len(last_date) and dates[0] <= last_date[0]:
+            raise Exception(f"Bars appended to {symbol} must start after the last one")
+
+        new_columns = self._get_columns(df, meta)
+        for column, values in new_columns.items():
+            path = self._get_path(symbol, column)
+            with open(path, "r+b") as f:
+                # Drops whatever an interrupted append left past the last row
+                f.truncate(meta["n_rows"] * np.dtype(meta["dtypes"][column]).itemsize)
+                f.seek(0, os.SEEK_END)
+                values.tofile(f)
+        meta["n_rows"] += len(df)
+        self._save_meta(symbol, meta)
+
+    def load(
+        self,
+        symbol: str,
+        start: datetime = None,
+        end: datetime = None,
+        columns: list[str] = None,
+    ) -> pd.DataFrame:
+        meta = self.get_meta(symbol)
+        if meta is None:
+            raise Exception(f"No bars stored for {symbol} in {self.root_dir}")
+
+        dates = self._load_column(symbol, self.DateColumn, meta)
+        row_start, row_end = self._get_row_range(dates, meta, start, end)
+        index = self._get_index(dates[row_start:row_end], meta)
+        # Columns are views of the read-only maps, pages are read when touched
+        return pd.DataFrame(
+            {
+                column: self._load_column(symbol, column, meta)[row_start:row_end]
+                for column in (meta["columns"] if columns is None else columns)
+            },
+            index=index,
+            copy=False,
+        )
+
+    def iter_chunks(
+        self,
+        symbol: str,
+        chunk_size: int = 100_000,
+        start: datetime = None,
+        end: datetime = None,
+        columns: list[str] = None,
+    ) -> Iterator[pd.DataFrame]:
+        df = self.load(symbol, start, end, columns)
+        for row_start in range(0, len(df), chunk_size):
+            yield df.iloc[row_start : row_start + chunk_size]
+
+    def get_symbols(self) -> list[str]:
+        return sorted(
+            symbol
+            for symbol in os.listdir(self.root_dir)
+            if os.path.exists(os.path.join(self.root_dir, symbol, self.MetaFile))
+        )
+
+    def get_meta(self, symbol: str) -> dict | None:
+        path = os.path.join(self._get_dir(symbol), self.MetaFile)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _get_dir(self, symbol: str) -> str:
+        return os.path.join(self.root_dir, symbol.replace(os.sep, "_"))
+
+    def _get_path(self, symbol: str, column: str) -> str:
+        return os.path.join(self._get_dir(symbol), f"{column}.bin")
+
+    def _get_meta(self, df: pd.DataFrame) -> dict:
+        if not isinstance(df.index, pd.DatetimeIndex):
+            raise Exception("Bars must be indexed by a DatetimeIndex")
+        if not df.index.is_monotonic_increasing:
+            raise Exception("Bars must be sorted by date")
+        dtypes = {self.DateColumn: np.dtype(np.int64).str}
+        for column, dtype in df.dtypes.items():
+            if not (np.issubdtype(dtype, np.number) or dtype == bool):
+                raise Exception(f"Column {column} is not numeric")
+            dtypes[str(column)] = np.dtype(dtype).str
+        return {
+            "columns": [str(column) for column in df.columns],
+            "dtypes": dtypes,
+            "tz": None if df.index.tz is None else str(df.index.tz),
+            "n_rows": len(df),
+        }
+
+    def _get_columns(self, df: pd.DataFrame, meta: dict) -> dict[str, np.ndarray]:
+        columns = {self.DateColumn: self._get_dates(df)}
+        for column in meta["columns"]:
+            columns[column] = np.ascontiguousarray(
+                df[column].to_numpy(), dtype=meta["dtypes"][column]
+            )
+        return columns
+
+    @staticmethod
+    def _get_dates(df: pd.DataFrame) -> np.ndarray:
+        # Stored as UTC nanoseconds, the time zone is kept in the metadata
+        return np.ascontiguousarray(df.index.as_unit("ns").asi8)
+
+    def _save_meta(self, symbol: str, meta: dict):
+        path = os.path.join(self._get_dir(symbol), self.MetaFile)
+        with open(f"{path}.{os.getpid()}.tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(f"{path}.{os.getpid()}.tmp", path)
+
+    def _load_column(self, symbol: str, column: str, meta: dict) -> np.ndarray:
+        dtype = np.dtype(meta["dtypes"][column])
+        if meta["n_rows"] == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(
+            self._get_path(symbol, column),
+            dtype=dtype,
+            mode="r",
+            shape=(meta["n_rows"],),
+        )
+
+    @staticmethod
+    def _get_row_range(
+        dates: np.ndarray, meta: dict, start: datetime, end: datetime
+    ) -> tuple[int, int]:
+        # Binary search on the sorted dates only reads a few pages of the map
+        def get_row(date):
+            date = pd.Timestamp(date)
+            if meta["tz"] is not None:
+                date = (
+                    date.tz_localize(meta["tz"]) if date.tz is None else date
+                ).tz_convert("UTC")
+            return int(np.searchsorted(dates, date.as_unit("ns").value))
+
+        row_start = 0 if start is None else get_row(start)
+        row_end = len(dates) if end is None else get_row(end)
+        return row_start, max(row_start, row_end)
+
+    def _get_index(self, dates: np.ndarray, meta: dict) -> pd.DatetimeIndex:
+        index = pd.DatetimeIndex(dates.view("M8[ns]"), name=self.DateColumn)
+        if meta["tz"] is not None:
+            # Localizing copies the dates, the price columns are still mapped
+            index = index.tz_localize("UTC").tz_convert(meta["tz"])
+        return index
+
+
+class MemmapProvider(DataProvider):
+    def __init__(self, store: MemmapStore | str, columns: list[str] = None):
+        super().__init__(max_workers=1, retries=0)
+        self.store = MemmapStore(store) if isinstance(store, str) else store
+        self.columns = columns
+
+    def _fetch(self, ticker: str, start: datetime, end: datetime) -> pd.DataFrame:
+        return self.store.load(ticker, start, end, self.columns)
+
+    @staticmethod
+    def _combine(tickers: list[str], dfs: list[pd.DataFrame]) -> pd.DataFrame:
+        if len(dfs) != 1:
+            return DataProvider._combine(tickers, dfs)
+
+        # concat would copy every column, one ticker only needs a new index
+        df = dfs[0]
+        index = pd.MultiIndex(
+            levels=[tickers, df.index],
+            codes=[np.zeros(len(df), dtype=np.int8), np.arange(len(df))],
+            names=["Tickers", "Date"],
+            verify_integrity=False,
+        )
+        return df.set_axis(index, copy=False)
@@ -0,0 +1,137 @@
+import os
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Literal
+
+import pandas as pd
+
+from .cache import PriceCache
+
+
+class DataProvider(ABC):
+    def __init__(
+        self, max_workers: int = 8, retries: int = 2, retry_delay: float = 1.0
+    ):
+        self.max_workers = max_workers
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+    def get_data(
+        self,
+        tickers: list[str],
+        start: datetime,
+        end: datetime,
+        cache: PriceCache = None,
+    ) -> pd.DataFrame:
+        def data(ticker):
+            if cache is None:
+                return self.fetch(ticker, start, end)
+            return cache.get(ticker, start, end, self.fetch)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            tickers_map = executor.map(data, tickers)
+            return self._combine(tickers, list(tickers_map))
+
+    def fetch(self, ticker: str, start: datetime, end: datetime) -> pd.DataFrame:
+        for attempt in range(self.retries + 1):
+            # An empty frame means no bars in the range, only errors are retried
+            try:
+                return self._fetch(ticker, start, end)
+            except Exception:
+                if attempt == self.retries:
+                    raise
+            time.sleep(self.retry_delay * 2**attempt)
+
+    @abstractmethod
+    def _fetch(self, ticker: str, start: datetime, end: datetime) -> pd.DataFrame:
+        pass
+
+    @staticmethod
+    def _combine(tickers: list[str], dfs: list[pd.DataFrame]) -> pd.DataFrame:
+        return pd.concat(dfs, keys=tickers, names=["Tickers", "Date"])
+
+    @staticmethod
+    def _slice(df: pd.DataFrame, start: datetime, end: datetime) -> pd.DataFrame:
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        return df.loc[(df.index >= start) & (df.index < end)]
+
+
+class YFinanceProvider(DataProvider):
+    def get_data(
+        self,
+        tickers: list[str],
+        start: datetime,
+        end: datetime,
+        cache: PriceCache = None,
+    ) -> pd.DataFrame:
+        if cache is not None or len(tickers) < 2:
+            return super().get_data(tickers, start, end, cache)
+
+        import yfinance as yf
+
+        df_bulk = yf.download(
+            tickers,
+            start=start,
+            end=end,
+            group_by="ticker",
+            threads=self.max_workers,
+        )
+        dfs = {
+            ticker: df_bulk[ticker].dropna(how="all")
+            for ticker in tickers
+            if ticker in df_bulk.columns.get_level_values(0)
+        }
+
+        # Tickers the bulk request failed on are retried one at a time
+        missing_tickers = [ticker for ticker, df in dfs.items() if df.empty]
+        missing_tickers += [ticker for ticker in tickers if ticker not in dfs]
+        if missing_tickers:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                fetch_map = executor.map(
+                    lambda ticker: self.fetch(ticker, start, end), missing_tickers
+                )
+                dfs.update(zip(missing_tickers, fetch_map))
+
+        return self._combine(tickers, [dfs[ticker] for ticker in tickers])
+
+    def _fetch(self, ticker: str, start: datetime, end: datetime) -> pd.DataFrame:
+        # Imported on first download, it is slow to import and unused offline
+        import yfinance as yf
+
+        # yfinance returns an empty frame instead of raising when a download
+        # fails, so an empty result is raised to go through the retries
+        df = yf.download(ticker, start=start, end=end)
+        if df.empty:
+            raise Exception(f"No bars downloaded for {ticker} from {start} to {end}")
+        return df
+
+
+class LocalDirectoryProvider(DataProvider):
+    def __init__(
+        self,
+        directory: str,
+        file_format: Literal["parquet", "csv"] = "parquet",
+        max_workers: int = 8,
+    ):
+        super().__init__(max_workers=max_workers, retries=0)
+        self.directory = directory
+        self.file_format = file_format
+
+    def _fetch(self, ticker: str, start: datetime, end: datetime) -> pd.DataFrame:
+        path = os.path.join(self.directory, f"{ticker}.{self.file_format}")
+        if self.file_format == "csv":
+            df = pd.read_csv(path, index_col="Date", parse_dates=True)
+        else:
+            df = pd.read_parquet(path)
+        return self._slice(df, start, end)
+
+
+class InMemoryProvider(DataProvider):
+    def __init__(self, frames: dict[str, pd.DataFrame]):
+        super().__init__(max_workers=1, retries=0)
+        self.frames = frames
+
+    def _fetch(self, ticker: str, start: datetime, end: datetime) -> pd.DataFrame:
+        return self._slice(self.frames[ticker], start, end)
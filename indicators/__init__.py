@@ -1,18 +1,27 @@
 from .base import Indicator, IndicatorsCombined
+from .cache import IndicatorCache, get_data_fingerprint
+from .ensemble import EnsembleSearch
+from .feature_store import FeatureStore
 from .lag import Indicator_Lag
 from .ma_crossover import Indicator_MA_Crossover
 from .macd import Indicator_MACD
 from .rsi import Indicator_RSI
 from .simple_momentum import Indicator_Simple_Momentum
 from .sma_mean_reversion import Indicator_SMA_Mean_Reversion
+from .sweep import IndicatorSweep
 
 __all__ = [
     "Indicator",
     "IndicatorsCombined",
+    "IndicatorCache",
+    "get_data_fingerprint",
+    "EnsembleSearch",
+    "FeatureStore",
     "Indicator_Lag",
     "Indicator_MA_Crossover",
     "Indicator_MACD",
     "Indicator_RSI",
     "Indicator_Simple_Momentum",
     "Indicator_SMA_Mean_Reversion",
+    "IndicatorSweep",
 ]
@@ -1,3 +1,4 @@
+import inspect
 from abc import ABC, abstractmethod
 from datetime import datetime
 from typing import Literal
@@ -5,45 +6,260 @@ from typing import Literal
 import numpy as np
 import pandas as pd
 
+from .helper import clip, compact_array, shift_from
+
+
+def get_position_bounds(
+    position_type: Literal["long", "short", "long_short"],
+) -> tuple[int, int]:
+    short = -1 if position_type in ["short", "long_short"] else 0
+    long = 1 if position_type in ["long", "long_short"] else 0
+    return short, long
+
+
+def compute_buy_or_sell_batch(trading_positions: np.ndarray) -> np.ndarray:
+    buy_or_sell = np.zeros_like(trading_positions, dtype=float)
+    buy_or_sell[1:] = np.diff(trading_positions, axis=0)
+    return np.nan_to_num(buy_or_sell.clip(-1, 1))
+
+
+class IndicatorOutput:
+    def __init__(self, index: pd.Index):
+        self.index = index
+        self.rows = None
+        self.columns = {}
+
+    def __contains__(self, column: str) -> bool:
+        return column in self.columns
+
+    def __getitem__(self, column: str) -> pd.Series:
+        values = self.columns[column]
+        if np.ndim(values) == 0:
+            values = np.full(len(self.index), values)
+        return pd.Series(values, index=self.index, name=column)
+
+    def __setitem__(self, column: str, values):
+        if (
+            isinstance(values, pd.Series)
+            and values.index is not self.index
+            and not values.index.equals(self.index)
+        ):
+            values = values.reindex(self.index)
+        if np.ndim(values) != 0:
+            values = np.asarray(values).reshape(len(self.index))
+        self.columns[column] = values
+
+    def dropna(self, is_valid: np.ndarray = None):
+        is_valid = (
+            np.ones(len(self.index), dtype=bool)
+            if is_valid is None
+            else np.array(is_valid, dtype=bool)
+        )
+        for values in self.columns.values():
+            if np.ndim(values) != 0:
+                is_valid &= pd.notna(values)
+
+        self.index = self.index[is_valid]
+        self.rows = (
+            np.flatnonzero(is_valid) if self.rows is None else self.rows[is_valid]
+        )
+        self.columns = {
+            column: values if np.ndim(values) == 0 else values[is_valid]
+            for column, values in self.columns.items()
+        }
+
+    def compact(self):
+        self.columns = {
+            column: values if np.ndim(values) == 0 else compact_array(column, values)
+            for column, values in self.columns.items()
+        }
+
+    def get_nbytes(self) -> int:
+        return sum(
+            np.asarray(values).nbytes
+            for values in self.columns.values()
+            if np.ndim(values) != 0
+        )
+
+    def to_frame(self, columns: list[str] = None) -> pd.DataFrame:
+        columns = list(self.columns) if columns is None else columns
+        return pd.DataFrame(
+            {column: self.columns[column] for column in columns}, index=self.index
+        )
+
 
 class Indicator(ABC):
+    StateAttributes = ["stream"]
+
     def __init__(
         self,
         price_data: pd.DataFrame,
         start_date: datetime,
         position_type: Literal["long", "short", "long_short"] = "long_short",
     ):
-        self.price_data = price_data.copy(deep=True)
+        # price_data is shared with the caller and never written to, the
+        # indicator's own columns live in self.output
+        self.price_data = price_data
+        self.output = IndicatorOutput(price_data.index)
+        self.stream = None
         self.start_date = start_date
         self.position_type = position_type
-        self.long = 1 if position_type in ["long", "long_short"] else 0
-        self.short = -1 if position_type in ["short", "long_short"] else 0
+        self.short, self.long = get_position_bounds(position_type)
 
-    def get_price_data(self) -> pd.DataFrame:
-        df = self.price_data.copy(deep=True)
-        df = df[df.index.get_level_values("Date") >= self.start_date]
-        return df.copy(deep=True)
+    def get_price_data(
+        self, columns: list[str] = None, compact: bool = False
+    ) -> pd.DataFrame:
+        index = self.output.index
+        rows = self.output.rows
+        is_after_start_date = index.get_level_values("Date") >= self.start_date
+        if not is_after_start_date.all():
+            index = index[is_after_start_date]
+            rows = (
+                np.flatnonzero(is_after_start_date)
+                if rows is None
+                else rows[is_after_start_date]
+            )
+
+        data, attrs = {}, {}
+        for column in self.price_data.columns:
+            if (columns is None or column in columns) and column not in self.output:
+                values = self.price_data[column].to_numpy()
+                data[column] = values.copy() if rows is None else values[rows]
+        for column, values in self.output.columns.items():
+            if columns is None or column in columns:
+                if np.ndim(values) != 0:
+                    values = values[is_after_start_date]
+                elif compact:
+                    # Constants are kept as metadata instead of repeated rows
+                    attrs[column] = values
+                    continue
+                data[column] = values
+        if compact:
+            data = {
+                column: compact_array(column, values) for column, values in data.items()
+            }
+        # every column is already a fresh array, skip pandas' consolidation copy
+        df = pd.DataFrame(data, index=index, copy=False)
+        df.attrs.update(attrs)
+        return df
 
     def get_trading_opportunity(self) -> pd.DataFrame:
         trading_opp_dct = {"Buy": 0, "Sell": 0, "Total": 0}
-        buy_or_sell = self.get_price_data()["buy_or_sell"]
+        buy_or_sell = self.get_price_data(["buy_or_sell"])["buy_or_sell"]
         trading_opp_dct["Buy"] = (buy_or_sell == 1).sum()
         trading_opp_dct["Sell"] = (buy_or_sell == -1).sum()
         trading_opp_dct["Total"] = trading_opp_dct["Buy"] + trading_opp_dct["Sell"]
         return trading_opp_dct
 
+    @classmethod
+    def get_default_params(cls) -> dict:
+        parameters = inspect.signature(cls.__init__).parameters
+        return {
+            name: parameter.default
+            for name, parameter in parameters.items()
+            if parameter.default is not inspect.Parameter.empty
+            and name != "position_type"
+        }
+
+    @classmethod
+    def compute_trading_positions_batch(
+        cls,
+        symbol: str,
+        price_data: pd.DataFrame,
+        start_date: datetime,
+        position_type: Literal["long", "short", "long_short"],
+        param_sets: list[dict],
+    ) -> tuple[np.ndarray, np.ndarray]:
+        trading_positions, buy_or_sell = [], []
+        for params in param_sets:
+            indicator = cls(
+                symbol,
+                price_data,
+                start_date=start_date,
+                position_type=position_type,
+                **params,
+            )
+            indicator.run()
+            df = indicator.output.to_frame(["trading_positions", "buy_or_sell"])
+            df = df.reindex(price_data.index)
+            trading_positions.append(df["trading_positions"].fillna(0).to_numpy())
+            buy_or_sell.append(df["buy_or_sell"].fillna(0).to_numpy())
+        return np.column_stack(trading_positions), np.column_stack(buy_or_sell)
+
     @abstractmethod
     def run(self) -> pd.DataFrame:
         pass
 
+    def update(self, bar: pd.Series | dict) -> dict:
+        self._ensure_stream()
+        return self._update_stream(float(bar["Adj Close"]))
+
+    def update_chunk(self, price_data: pd.DataFrame) -> pd.DataFrame:
+        # Bars that follow the ones already seen, e.g. the next chunk of a
+        # history too large for memory, through the same streaming state
+        self._ensure_stream()
+        columns = self._update_stream_chunk(
+            price_data["Adj Close"].to_numpy(dtype=float)
+        )
+        return pd.DataFrame(columns, index=price_data.index, dtype=float)
+
+    def _ensure_stream(self):
+        if self.stream is None:
+            self.warm_up_stream()
+            if self.stream is None:
+                raise Exception(
+                    f"{type(self).__name__} does not support streaming updates"
+                )
+
+    def warm_up_stream(self):
+        # replay the history the indicator was built on as one chunk, so the
+        # running state continues exactly where run() ends
+        self.stream = self._init_stream()
+        if self.stream is not None:
+            self._update_stream_chunk(
+                self.price_data["Adj Close"].to_numpy(dtype=float)
+            )
+
+    def _init_stream(self) -> dict | None:
+        return None
+
+    def _update_stream(self, adj_close: float) -> dict:
+        pass
+
+    def _update_stream_chunk(self, adj_close: np.ndarray) -> dict:
+        # Same columns as _update_stream, one array per column for the chunk
+        pass
+
+    def _update_trading_positions_stream(
+        self, trading_positions: float
+    ) -> tuple[float, float]:
+        trading_positions = clip(trading_positions, self.short, self.long)
+        buy_or_sell = clip(trading_positions - self.stream["trading_positions"], -1, 1)
+        self.stream["trading_positions"] = trading_positions
+        return trading_positions, 0.0 if buy_or_sell != buy_or_sell else buy_or_sell
+
+    def _update_trading_positions_chunk(
+        self, trading_positions: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        trading_positions = np.clip(trading_positions, self.short, self.long)
+        buy_or_sell = np.clip(
+            trading_positions
+            - shift_from(trading_positions, self.stream["trading_positions"]),
+            -1,
+            1,
+        )
+        if len(trading_positions):
+            self.stream["trading_positions"] = trading_positions[-1]
+        return trading_positions, np.nan_to_num(buy_or_sell)
+
     @abstractmethod
     def _compute_internal_workings(self):
         pass
 
     def _compute_trading_positions(self):
-        self.price_data["trading_positions"] = self.price_data[
-            "trading_positions"
-        ].clip(self.short, self.long)
+        self.output["trading_positions"] = self.output["trading_positions"].clip(
+            self.short, self.long
+        )
 
     @abstractmethod
     def _compute_buy_or_sell(self):
@@ -59,7 +275,8 @@ class IndicatorsCombined:
     ):
         self.indicators = indicators
         self.indicators_price_data = [
-            indicator.get_price_data() for indicator in indicators
+            indicator.get_price_data(["Adj Close", "trading_positions"])
+            for indicator in indicators
         ]
         self.min_indicators_to_long = min_indicators_to_long
         self.min_indicators_to_short = min_indicators_to_short
@@ -79,7 +296,7 @@ class IndicatorsCombined:
             raise Exception("Date indices of all indicators should be equal")
 
     def combine_strategies(self):
-        df = self.indicators_price_data[0][["Adj Close"]]
+        df = self.indicators_price_data[0]["Adj Close"].to_frame()
         agg_trading_positions = sum(
             df["trading_positions"] for df in self.indicators_price_data
         )
@@ -95,10 +312,8 @@ class IndicatorsCombined:
             trading_positions,
         )
         df["trading_positions"] = trading_positions
-        df["trading_positions"].ffill(inplace=True)
-        df["trading_positions"].fillna(0, inplace=True)
-        df["buy_or_sell"] = df["trading_positions"].diff().clip(-1, 1)
-        df["buy_or_sell"].fillna(0, inplace=True)
+        df["trading_positions"] = df["trading_positions"].ffill().fillna(0)
+        df["buy_or_sell"] = df["trading_positions"].diff().clip(-1, 1).fillna(0)
         self.price_data = df
 
     def get_price_data(self) -> pd.DataFrame:
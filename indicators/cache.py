@@ -0,0 +1,93 @@
+import hashlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+
+
+def get_data_fingerprint(price_data: pd.DataFrame) -> str:
+    row_hashes = pd.util.hash_pandas_object(price_data, index=True).to_numpy()
+    digest = hashlib.sha1(row_hashes.tobytes())
+    digest.update(repr(list(price_data.columns)).encode())
+    return digest.hexdigest()
+
+
+def normalize_params(params: dict) -> tuple:
+    return tuple((name, _normalize_value(value)) for name, value in params.items())
+
+
+def _normalize_value(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple, range, np.ndarray)):
+        return tuple(_normalize_value(each) for each in value)
+    return value
+
+
+class IndicatorCache:
+    def __init__(self, max_bytes: int = 512 * 2**20):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(
+        symbol: str,
+        indicator: str,
+        params: dict,
+        start_date: datetime,
+        position_type: Literal["long", "short", "long_short"],
+        data_fingerprint: str,
+        kind: Literal["indicator", "sweep"] = "indicator",
+    ) -> tuple:
+        return (
+            kind,
+            symbol,
+            indicator,
+            normalize_params(params),
+            pd.Timestamp(start_date),
+            position_type,
+            data_fingerprint,
+        )
+
+    def get(self, key: tuple):
+        entry = self.entries.get(key, None)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: tuple, value, nbytes: int):
+        if key in self.entries:
+            self.nbytes -= self.entries.pop(key)[1]
+        if nbytes > self.max_bytes:
+            return
+
+        self.entries[key] = (value, nbytes)
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes:
+            _, (_, evicted_nbytes) = self.entries.popitem(last=False)
+            self.nbytes -= evicted_nbytes
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
+
+    def get_stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "nbytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,196 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from .base import Indicator, compute_buy_or_sell_batch
+from .sweep import compute_batch_metrics
+
+
+class EnsembleSearch:
+    IndexNames = [
+        "indicators",
+        "weights",
+        "min_indicators_to_long",
+        "min_indicators_to_short",
+    ]
+    # Cells of the bars x ensembles matrices evaluated at once
+    ChunkCells = 2**22
+
+    def __init__(
+        self,
+        indicators: list[Indicator],
+        min_indicators: int = 2,
+        max_indicators: int = None,
+        min_indicators_to_long: list[float] = None,
+        min_indicators_to_short: list[float] = None,
+        weights: list[list[float]] = None,
+        names: list[str] = None,
+    ):
+        if len(indicators) < 2:
+            raise Exception("At least 2 indicators are required for comparison")
+
+        self.indicators = indicators
+        self.names = self._get_names(indicators) if names is None else list(names)
+        self.min_indicators = min_indicators
+        self.max_indicators = max_indicators or len(indicators)
+        thresholds = list(range(1, self.max_indicators + 1))
+        self.min_indicators_to_long = min_indicators_to_long or thresholds
+        self.min_indicators_to_short = min_indicators_to_short or thresholds
+        # Each row weighs the votes of the indicators, one vote each by default
+        self.weights = (
+            np.ones((1, len(indicators)))
+            if weights is None
+            else np.atleast_2d(np.asarray(weights, dtype=float))
+        )
+        if self.weights.shape[1] != len(indicators):
+            raise Exception("Every row of weights needs one weight per indicator")
+
+        self.index = None
+        self.dates = None
+        self.adj_close_price = None
+        self.trading_positions = None
+        self.results = None
+        self.stack_positions()
+
+    def stack_positions(self):
+        dfs = [
+            indicator.get_price_data(["Adj Close", "trading_positions"])
+            for indicator in self.indicators
+        ]
+        # Dates are joined, an indicator without a row on a date abstains
+        index = dfs[0].index
+        for df in dfs[1:]:
+            if not df.index.equals(index):
+                index = index.union(df.index)
+
+        adj_close_price = np.full(len(index), np.nan)
+        trading_positions = np.zeros((len(index), len(dfs)), dtype=np.int8)
+        for i, df in enumerate(dfs):
+            df = df.reindex(index)
+            adj_close_price = np.where(
+                np.isnan(adj_close_price), df["Adj Close"], adj_close_price
+            )
+            trading_positions[:, i] = df["trading_positions"].fillna(0)
+
+        self.index = index
+        self.dates = (
+            index.get_level_values("Date")
+            if isinstance(index, pd.MultiIndex)
+            else index
+        )
+        self.adj_close_price = adj_close_price
+        self.trading_positions = trading_positions
+
+    def get_ensembles(self) -> pd.DataFrame:
+        rows = []
+        n_indicators = len(self.indicators)
+        for size in range(self.min_indicators, self.max_indicators + 1):
+            for subset in itertools.combinations(range(n_indicators), size):
+                for weights_id, weights in enumerate(self.weights):
+                    total_weight = weights[list(subset)].sum()
+                    for min_to_long, min_to_short in itertools.product(
+                        self.min_indicators_to_long, self.min_indicators_to_short
+                    ):
+                        # Thresholds above the subset's votes could never trade
+                        if min_to_long <= total_weight and min_to_short <= total_weight:
+                            rows.append((subset, weights_id, min_to_long, min_to_short))
+        return pd.DataFrame(
+            rows, columns=["subset", "weights", "min_to_long", "min_to_short"]
+        )
+
+    def compute_positions(self, df_ensembles: pd.DataFrame) -> np.ndarray:
+        vote_weights = np.zeros((len(self.indicators), len(df_ensembles)))
+        for j, (subset, weights_id) in enumerate(
+            zip(df_ensembles["subset"], df_ensembles["weights"])
+        ):
+            subset = list(subset)
+            vote_weights[subset, j] = self.weights[weights_id, subset]
+        votes = self.trading_positions @ vote_weights
+
+        # Same rule as IndicatorsCombined, short votes win over long ones
+        trading_positions = np.where(
+            votes >= df_ensembles["min_to_long"].to_numpy(), 1, 0
+        ).astype(np.int8)
+        trading_positions[votes <= -df_ensembles["min_to_short"].to_numpy()] = -1
+        return trading_positions
+
+    def run(self, capital: float = 1e6, transaction_fee: float = 0) -> pd.DataFrame:
+        df_ensembles = self.get_ensembles()
+        chunk_size = max(1, self.ChunkCells // len(self.index))
+        results = []
+        for start in range(0, len(df_ensembles), chunk_size):
+            df_chunk = df_ensembles.iloc[start : start + chunk_size]
+            trading_positions = self.compute_positions(df_chunk)
+            results.append(
+                compute_batch_metrics(
+                    self.adj_close_price,
+                    trading_positions,
+                    compute_buy_or_sell_batch(trading_positions),
+                    self.dates,
+                    self._get_ensemble_index(df_chunk),
+                    capital,
+                    transaction_fee,
+                )
+            )
+        self.results = pd.concat(results)
+        return self.results
+
+    def rank(
+        self, by: str = "sharpe_ratio", ascending: bool = False, top: int = None
+    ) -> pd.DataFrame:
+        if self.results is None:
+            self.run()
+        df_ranked = self.results.sort_values(by, ascending=ascending)
+        return df_ranked if top is None else df_ranked.head(top)
+
+    def get_price_data(
+        self,
+        indicators: list[str],
+        min_indicators_to_long: float,
+        min_indicators_to_short: float,
+        weights: int = 0,
+    ) -> pd.DataFrame:
+        # One ensemble as IndicatorsCombined would give it, ready for Portfolio
+        df_ensembles = pd.DataFrame(
+            {
+                "subset": [tuple(self.names.index(name) for name in indicators)],
+                "weights": [weights],
+                "min_to_long": [min_indicators_to_long],
+                "min_to_short": [min_indicators_to_short],
+            }
+        )
+        trading_positions = self.compute_positions(df_ensembles)
+        df = pd.DataFrame({"Adj Close": self.adj_close_price}, index=self.index)
+        df["trading_positions"] = trading_positions[:, 0]
+        df["buy_or_sell"] = compute_buy_or_sell_batch(trading_positions)[:, 0]
+        return df
+
+    def get_nbytes(self) -> int:
+        return self.trading_positions.nbytes + self.adj_close_price.nbytes
+
+    def _get_ensemble_index(self, df_ensembles: pd.DataFrame) -> pd.MultiIndex:
+        return pd.MultiIndex.from_arrays(
+            [
+                [
+                    " + ".join(self.names[i] for i in subset)
+                    for subset in df_ensembles["subset"]
+                ],
+                df_ensembles["weights"],
+                df_ensembles["min_to_long"],
+                df_ensembles["min_to_short"],
+            ],
+            names=self.IndexNames,
+        )
+
+    @staticmethod
+    def _get_names(indicators: list[Indicator]) -> list[str]:
+        names = [
+            type(indicator).__name__.removeprefix("Indicator_")
+            for indicator in indicators
+        ]
+        # Repeated indicator types are told apart by their position
+        return [
+            name if names.count(name) == 1 else f"{name}_{i}"
+            for i, name in enumerate(names)
+        ]
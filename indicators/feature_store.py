@@ -0,0 +1,152 @@
+import hashlib
+import os
+import pickle
+from datetime import datetime
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+
+from .base import Indicator
+from .cache import normalize_params
+
+
+class FeatureStore:
+    # Trailing bars whose dates are hashed, earlier dates are covered by the
+    # first date in the key
+    FingerprintRows = 64
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        self.hits = 0
+        self.appends = 0
+        self.misses = 0
+        os.makedirs(store_dir, exist_ok=True)
+
+    def run_indicator(
+        self,
+        indicator: type[Indicator],
+        symbol: str,
+        price_data: pd.DataFrame,
+        start_date: datetime,
+        position_type: Literal["long", "short", "long_short"] = "long_short",
+        **params,
+    ) -> Indicator:
+        result = indicator(
+            symbol,
+            price_data,
+            start_date=start_date,
+            position_type=position_type,
+            **params,
+        )
+        path = self._get_path(
+            symbol,
+            indicator.__name__,
+            {**indicator.get_default_params(), **params},
+            position_type,
+            price_data.index.get_level_values("Date")[0] if len(price_data) else None,
+        )
+        entry = self._load(path)
+
+        n_stored = 0 if entry is None else entry["n_rows"]
+        is_valid = (
+            entry is not None
+            and n_stored <= len(price_data)
+            and entry["fingerprint"] == self._get_fingerprint(price_data, n_stored)
+        )
+        if is_valid and n_stored == len(price_data):
+            self.hits += 1
+            self._restore(result, entry)
+            return result
+
+        if is_valid and entry["state"]["stream"] is not None:
+            self.appends += 1
+            self._restore(result, entry)
+            self._append(result, n_stored)
+        else:
+            self.misses += 1
+            result.run()
+            if n_stored > len(price_data):
+                # keep the longer stored history for the processes that use it
+                return result
+            result.warm_up_stream()
+        self._save(path, result)
+        return result
+
+    def get_stats(self) -> dict:
+        return {"hits": self.hits, "appends": self.appends, "misses": self.misses}
+
+    def _get_path(
+        self,
+        symbol: str,
+        indicator: str,
+        params: dict,
+        position_type: Literal["long", "short", "long_short"],
+        first_date: datetime,
+    ) -> str:
+        # A history starting elsewhere gives other values, it is stored apart
+        first_date = None if first_date is None else pd.Timestamp(first_date)
+        digest = hashlib.sha1(
+            repr((normalize_params(params), position_type, first_date)).encode()
+        ).hexdigest()[:16]
+        directory = os.path.join(self.store_dir, symbol.replace(os.sep, "_"))
+        return os.path.join(directory, f"{indicator}_{digest}")
+
+    @classmethod
+    def _get_fingerprint(cls, price_data: pd.DataFrame, n_rows: int) -> str:
+        # Indicators only read Adj Close, its raw bytes hash much faster than
+        # hash_pandas_object over the whole frame
+        adj_close_price = price_data["Adj Close"].to_numpy(dtype=float)[:n_rows]
+        digest = hashlib.sha1(np.ascontiguousarray(adj_close_price))
+        index = price_data.index[max(n_rows - cls.FingerprintRows, 0) : n_rows]
+        digest.update(index.get_level_values("Date").as_unit("ns").asi8.tobytes())
+        return f"{n_rows}:{digest.hexdigest()}"
+
+    @staticmethod
+    def _restore(indicator: Indicator, entry: dict):
+        for name, value in entry["state"].items():
+            setattr(indicator, name, value)
+
+        output = indicator.output
+        if entry["rows"] is not None:
+            output.rows = entry["rows"]
+            output.index = output.index[output.rows]
+        output.columns = dict(entry["columns"])
+
+    @staticmethod
+    def _append(indicator: Indicator, n_stored: int):
+        adj_close_price = indicator.price_data["Adj Close"].to_numpy(dtype=float)
+        new_columns = indicator._update_stream_chunk(adj_close_price[n_stored:])
+        output = indicator.output
+        output.index = indicator.price_data.index
+        for column, values in output.columns.items():
+            if np.ndim(values) != 0:
+                new_values = np.asarray(new_columns[column], dtype=values.dtype)
+                output.columns[column] = np.concatenate([values, new_values])
+
+    @staticmethod
+    def _load(path: str) -> dict | None:
+        if not os.path.exists(f"{path}.pkl"):
+            return None
+        with open(f"{path}.pkl", "rb") as f:
+            return pickle.load(f)
+
+    def _save(self, path: str, indicator: Indicator):
+        # Outputs and state go in one pickle, it loads faster than Parquet and
+        # is replaced in a single step
+        entry = {
+            "n_rows": len(indicator.price_data),
+            "fingerprint": self._get_fingerprint(
+                indicator.price_data, len(indicator.price_data)
+            ),
+            "rows": indicator.output.rows,
+            "columns": indicator.output.columns,
+            "state": {
+                name: getattr(indicator, name) for name in indicator.StateAttributes
+            },
+        }
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.pkl.{os.getpid()}.tmp", "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f"{path}.pkl.{os.getpid()}.tmp", f"{path}.pkl")
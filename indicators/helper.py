@@ -1,16 +1,632 @@
+import importlib.util
+import math
+import sys
+from collections import deque
+from functools import update_wrapper
+from typing import Literal
+
 import numpy as np
 import pandas as pd
 
+# numba is only imported once kernels have run on enough values, it is slow to
+# import
+has_numba = importlib.util.find_spec("numba") is not None
+
+
+class LazyJit:
+    # numba's import takes about as long as a million values through a kernel
+    # in Python, so small inputs run in Python until this many values have
+    PythonValues = 200_000
+    n_python_values = 0
+
+    def __init__(self, function):
+        self.py_func = function
+        self.compiled = None
+        update_wrapper(self, function)
+
+    def __call__(self, *args, **kwargs):
+        if self.compiled is None:
+            n_values = max(
+                (np.size(arg) for arg in args if isinstance(arg, np.ndarray)),
+                default=0,
+            )
+            if (
+                not is_numba_loaded()
+                and LazyJit.n_python_values + n_values <= self.PythonValues
+            ):
+                LazyJit.n_python_values += n_values
+                return self.py_func(*args, **kwargs)
+
+            from numba import njit
+
+            self.compiled = njit(cache=True)(self.py_func)
+        return self.compiled(*args, **kwargs)
+
+
+def jit(function):
+    return LazyJit(function) if has_numba else function
+
+
+def is_numba_loaded() -> bool:
+    return "numba" in sys.modules
+
+
+@jit
+def ewm_kernel(
+    values: np.ndarray,
+    com: float,
+    adjust: bool = True,
+    weighted: float = np.nan,
+    old_wt: float = 1.0,
+) -> tuple[np.ndarray, float, float]:
+    # Same recursion as pandas' ewm().mean() so results match it bit for bit,
+    # with (weighted, old_wt) carried in and out to resume a series
+    alpha = 1.0 / (1.0 + com)
+    old_wt_factor = 1.0 - alpha
+    new_wt = 1.0 if adjust else alpha
+
+    output = np.empty(len(values))
+    for i in range(len(values)):
+        cur = values[i]
+        if weighted == weighted:
+            old_wt *= old_wt_factor
+            if cur == cur:
+                if weighted != cur:
+                    weighted = old_wt * weighted + new_wt * cur
+                    weighted /= old_wt + new_wt
+                if adjust:
+                    old_wt += new_wt
+                else:
+                    old_wt = 1.0
+        elif cur == cur:
+            weighted = cur
+        output[i] = weighted
+    return output, weighted, old_wt
+
+
+@jit
+def wilder_kernel(
+    values: np.ndarray, period: int, previous: float
+) -> tuple[np.ndarray, float]:
+    output = np.empty(len(values))
+    for i in range(len(values)):
+        previous = (previous * (period - 1) + values[i]) / period
+        output[i] = previous
+    return output, previous
+
+
+@jit
+def rolling_mean_kernel(
+    values: np.ndarray,
+    start: int,
+    window: int,
+    min_periods: int,
+    nobs: int,
+    neg_ct: int,
+    num_consecutive_same_value: int,
+    sum_x: float,
+    compensation_add: float,
+    compensation_remove: float,
+    prev_value: float,
+) -> tuple:
+    # RollingMeanStream.update over values[start:], values[:start] being the
+    # window already seen. The sums are carried in and out to resume a series
+    output = np.empty(len(values) - start)
+    for i in range(start, len(values)):
+        value = values[i]
+        if i == 0 or window <= 1:
+            nobs = neg_ct = num_consecutive_same_value = 0
+            sum_x = compensation_add = compensation_remove = 0.0
+            prev_value = value
+        elif i >= window:
+            removed = values[i - window]
+            if removed == removed:
+                nobs -= 1
+                y = -removed - compensation_remove
+                t = sum_x + y
+                compensation_remove = t - sum_x - y
+                sum_x = t
+                if math.copysign(1.0, removed) < 0:
+                    neg_ct -= 1
+
+        if value == value:
+            nobs += 1
+            y = value - compensation_add
+            t = sum_x + y
+            compensation_add = t - sum_x - y
+            sum_x = t
+            if math.copysign(1.0, value) < 0:
+                neg_ct += 1
+            if value == prev_value:
+                num_consecutive_same_value += 1
+            else:
+                num_consecutive_same_value = 1
+            prev_value = value
+
+        result = np.nan
+        if nobs >= min_periods and nobs > 0:
+            result = sum_x / nobs
+            if num_consecutive_same_value >= nobs:
+                result = prev_value
+            elif neg_ct == 0 and result < 0:
+                result = 0.0
+            elif neg_ct == nobs and result > 0:
+                result = 0.0
+        output[i - start] = result
+    return (
+        output,
+        nobs,
+        neg_ct,
+        num_consecutive_same_value,
+        sum_x,
+        compensation_add,
+        compensation_remove,
+        prev_value,
+    )
+
+
+@jit
+def rolling_std_kernel(
+    values: np.ndarray,
+    start: int,
+    window: int,
+    min_periods: int,
+    ddof: int,
+    nobs: float,
+    mean_x: float,
+    ssqdm_x: float,
+    compensation_add: float,
+    compensation_remove: float,
+    num_consecutive_same_value: int,
+    prev_value: float,
+) -> tuple:
+    # RollingStdStream.update over values[start:], see rolling_mean_kernel
+    output = np.empty(len(values) - start)
+    for i in range(start, len(values)):
+        value = values[i]
+        if i == 0 or window <= 1:
+            nobs = mean_x = ssqdm_x = 0.0
+            compensation_add = compensation_remove = 0.0
+            num_consecutive_same_value = 0
+            prev_value = value
+        elif i >= window:
+            removed = values[i - window]
+            if removed == removed:
+                nobs -= 1
+                if nobs:
+                    prev_mean = mean_x - compensation_remove
+                    y = removed - compensation_remove
+                    t = y - mean_x
+                    compensation_remove = t + mean_x - y
+                    mean_x = mean_x - t / nobs
+                    ssqdm_x = ssqdm_x - (removed - prev_mean) * (removed - mean_x)
+                else:
+                    mean_x = ssqdm_x = 0.0
+
+        if value == value:
+            nobs += 1
+            if value == prev_value:
+                num_consecutive_same_value += 1
+            else:
+                num_consecutive_same_value = 1
+            prev_value = value
+
+            prev_mean = mean_x - compensation_add
+            y = value - compensation_add
+            t = y - mean_x
+            compensation_add = t + mean_x - y
+            mean_x = mean_x + t / nobs
+            ssqdm_x = ssqdm_x + (value - prev_mean) * (value - mean_x)
+
+        result = np.nan
+        if nobs >= min_periods and nobs > ddof:
+            if nobs == 1 or num_consecutive_same_value >= nobs:
+                result = 0.0
+            else:
+                variance = ssqdm_x / (nobs - ddof)
+                result = math.sqrt(variance) if variance >= 0 else 0.0
+        output[i - start] = result
+    return (
+        output,
+        nobs,
+        mean_x,
+        ssqdm_x,
+        compensation_add,
+        compensation_remove,
+        num_consecutive_same_value,
+        prev_value,
+    )
+
+
+def shift_from(values: np.ndarray, previous: float) -> np.ndarray:
+    # values shifted by one bar, the first one taking the bar before the chunk
+    return np.concatenate([[previous], values])[:-1]
+
+
+def ffill_from(values: np.ndarray, previous: float) -> np.ndarray:
+    # Forward fill that starts from the last value of the previous chunk
+    return pd.Series(np.concatenate([[previous], values])).ffill().to_numpy()[1:]
+
 
 def compute_sma(df: pd.DataFrame, period: int) -> pd.DataFrame:
     return df.rolling(period, min_periods=1, center=False).mean()
 
 
+def compute_ewm(
+    df: pd.DataFrame | pd.Series, com: float, adjust: bool = True
+) -> pd.DataFrame | pd.Series:
+    # pandas' ewm is as exact and about as fast, numba is not imported for it
+    if not is_numba_loaded():
+        return df.ewm(com=com, adjust=adjust).mean()
+
+    # pandas treats inf as missing in window functions
+    values = df.to_numpy(dtype=float)
+    values = np.where(np.isinf(values), np.nan, values)
+    if values.ndim == 1:
+        output = ewm_kernel(values, com, adjust)[0]
+        return pd.Series(output, index=df.index, name=df.name)
+
+    output = np.empty_like(values)
+    for i in range(values.shape[1]):
+        output[:, i] = ewm_kernel(values[:, i], com, adjust)[0]
+    return pd.DataFrame(output, index=df.index, columns=df.columns)
+
+
 def compute_ema(df: pd.DataFrame, period: int) -> pd.DataFrame:
-    df_ema = df.ewm(span=period).mean()
+    df_ema = compute_ewm(df, com=(period - 1) / 2.0)
     return df_ema
 
 
+def compute_wilder(
+    series: pd.Series, period: int, seed: Literal["sma", "first"] = "sma"
+) -> pd.Series:
+    values = series.to_numpy(dtype=float)
+    if seed == "first":
+        return pd.Series(
+            ewm_kernel(values, period - 1.0, adjust=False)[0], index=series.index
+        )
+
+    # Wilder's seeding: simple average of the first `period` values
+    output = series.rolling(window=period).mean().to_numpy(dtype=float)
+    if len(values) > period:
+        output[period:] = wilder_kernel(values[period:], period, output[period - 1])[0]
+    return pd.Series(output, index=series.index)
+
+
+def solve_normal_equations(xtx: np.ndarray, xty: list[np.ndarray]) -> list[np.ndarray]:
+    # Solves xtx[:, :, i] @ beta[:, i] = xty[:, i] for every i at once with a
+    # Cholesky factorisation unrolled over the (tiny) system size, each step
+    # being one vector op along the long last axis. Singular systems fall back
+    # to the min-norm solution np.linalg.lstsq would give.
+    size = xtx.shape[0]
+    lower = [[None] * size for _ in range(size)]
+    is_singular = np.zeros(xtx.shape[-1], dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for j in range(size):
+            pivot = xtx[j, j] - sum(lower[j][p] ** 2 for p in range(j))
+            is_singular |= ~(pivot > size * np.finfo(float).eps * xtx[j, j])
+            lower[j][j] = np.sqrt(pivot)
+            for i in range(j + 1, size):
+                lower[i][j] = (
+                    xtx[i, j] - sum(lower[i][p] * lower[j][p] for p in range(j))
+                ) / lower[j][j]
+
+        solutions = []
+        for b in xty:
+            y = [None] * size
+            for i in range(size):
+                y[i] = (b[i] - sum(lower[i][p] * y[p] for p in range(i))) / lower[i][i]
+            x = [None] * size
+            for i in reversed(range(size)):
+                x[i] = (
+                    y[i] - sum(lower[p][i] * x[p] for p in range(i + 1, size))
+                ) / lower[i][i]
+            solutions.append(np.array(x))
+
+    if is_singular.any():
+        xtx_pinv = np.linalg.pinv(xtx[:, :, is_singular].transpose(2, 0, 1))
+        for b, solution in zip(xty, solutions):
+            solution[:, is_singular] = np.einsum(
+                "ijk,ki->ji", xtx_pinv, b[:, is_singular]
+            )
+    return solutions
+
+
+# Columns that only ever hold -1, 0 or 1
+PositionColumns = ["trading_positions", "buy_or_sell"]
+
+# Compact mode trades precision for memory. Positions are stored exactly, but
+# prices and indicator values are rounded to float32 (about 7 significant
+# digits), which moves final capital by about 1e-5 relative. A crossover closer
+# than that rounding can also come out on the other side
+
+
+def compact_array(column: str, values: np.ndarray) -> np.ndarray:
+    # Positions fit int8 once they have no missing values, other floats are
+    # stored as float32, about 7 significant digits
+    values = np.asarray(values)
+    if values.dtype.kind not in "fi":
+        return values
+    if column in PositionColumns and (
+        values.dtype.kind == "i" or not np.isnan(values).any()
+    ):
+        return values.astype(np.int8)
+    if values.dtype == np.float64:
+        return values.astype(np.float32)
+    return values
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    compacted = pd.DataFrame(
+        {column: compact_array(column, df[column]) for column in df.columns},
+        index=df.index,
+        copy=False,
+    )
+    compacted.attrs = dict(df.attrs)
+    return compacted
+
+
+def clip(value: float, lower: float, upper: float) -> float:
+    return value if value != value else min(max(value, lower), upper)
+
+
+class RollingMeanStream:
+    # Scalar replica of pandas' rolling mean (Kahan add/remove), so a stream
+    # fed one value at a time matches rolling(window, min_periods).mean()
+    def __init__(self, window: int, min_periods: int = None):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.values = deque()
+        self.nobs = self.neg_ct = self.num_consecutive_same_value = 0
+        self.sum_x = self.compensation_add = self.compensation_remove = 0.0
+        self.prev_value = np.nan
+
+    def update(self, value: float) -> float:
+        value = np.nan if math.isinf(value) else value
+        if not self.values or self.window <= 1:
+            # pandas restarts the sums whenever the window no longer overlaps
+            self.values.clear()
+            self.nobs = self.neg_ct = self.num_consecutive_same_value = 0
+            self.sum_x = self.compensation_add = self.compensation_remove = 0.0
+            self.prev_value = value
+        elif len(self.values) == self.window:
+            self._remove(self.values.popleft())
+        self.values.append(value)
+        self._add(value)
+
+        if self.nobs >= self.min_periods and self.nobs > 0:
+            result = self.sum_x / self.nobs
+            if self.num_consecutive_same_value >= self.nobs:
+                result = self.prev_value
+            elif self.neg_ct == 0 and result < 0:
+                result = 0.0
+            elif self.neg_ct == self.nobs and result > 0:
+                result = 0.0
+            return result
+        return np.nan
+
+    def update_many(self, values: np.ndarray) -> np.ndarray:
+        values = self._get_window_values(self.values, values, self.window)
+        (
+            output,
+            self.nobs,
+            self.neg_ct,
+            self.num_consecutive_same_value,
+            self.sum_x,
+            self.compensation_add,
+            self.compensation_remove,
+            self.prev_value,
+        ) = rolling_mean_kernel(
+            values,
+            len(self.values),
+            self.window,
+            self.min_periods,
+            self.nobs,
+            self.neg_ct,
+            self.num_consecutive_same_value,
+            self.sum_x,
+            self.compensation_add,
+            self.compensation_remove,
+            self.prev_value,
+        )
+        self.values = deque(values[-max(self.window, 1) :].tolist())
+        return output
+
+    @staticmethod
+    def _get_window_values(
+        window_values: deque, values: np.ndarray, window: int
+    ) -> np.ndarray:
+        # The bars still in the window, followed by the new ones
+        values = np.asarray(values, dtype=float)
+        values = np.where(np.isinf(values), np.nan, values)
+        return np.concatenate([np.array(window_values, dtype=float), values])
+
+    def _add(self, value: float):
+        if value == value:
+            self.nobs += 1
+            y = value - self.compensation_add
+            t = self.sum_x + y
+            self.compensation_add = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, value) < 0:
+                self.neg_ct += 1
+
+            if value == self.prev_value:
+                self.num_consecutive_same_value += 1
+            else:
+                self.num_consecutive_same_value = 1
+            self.prev_value = value
+
+    def _remove(self, value: float):
+        if value == value:
+            self.nobs -= 1
+            y = -value - self.compensation_remove
+            t = self.sum_x + y
+            self.compensation_remove = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, value) < 0:
+                self.neg_ct -= 1
+
+
+class RollingStdStream:
+    # Scalar replica of pandas' rolling std (Welford with Kahan compensation)
+    def __init__(self, window: int, min_periods: int = None, ddof: int = 1):
+        self.window = window
+        self.min_periods = max(window if min_periods is None else min_periods, 1)
+        self.ddof = ddof
+        self.values = deque()
+        self.nobs = self.mean_x = self.ssqdm_x = 0.0
+        self.compensation_add = self.compensation_remove = 0.0
+        self.num_consecutive_same_value = 0
+        self.prev_value = np.nan
+
+    def update(self, value: float) -> float:
+        value = np.nan if math.isinf(value) else value
+        if not self.values or self.window <= 1:
+            self.values.clear()
+            self.nobs = self.mean_x = self.ssqdm_x = 0.0
+            self.compensation_add = self.compensation_remove = 0.0
+            self.num_consecutive_same_value = 0
+            self.prev_value = value
+        elif len(self.values) == self.window:
+            self._remove(self.values.popleft())
+        self.values.append(value)
+        self._add(value)
+
+        if self.nobs >= self.min_periods and self.nobs > self.ddof:
+            if self.nobs == 1 or self.num_consecutive_same_value >= self.nobs:
+                return 0.0
+            variance = self.ssqdm_x / (self.nobs - self.ddof)
+            return math.sqrt(variance) if variance >= 0 else 0.0
+        return np.nan
+
+    def update_many(self, values: np.ndarray) -> np.ndarray:
+        values = RollingMeanStream._get_window_values(self.values, values, self.window)
+        (
+            output,
+            self.nobs,
+            self.mean_x,
+            self.ssqdm_x,
+            self.compensation_add,
+            self.compensation_remove,
+            self.num_consecutive_same_value,
+            self.prev_value,
+        ) = rolling_std_kernel(
+            values,
+            len(self.values),
+            self.window,
+            self.min_periods,
+            self.ddof,
+            self.nobs,
+            self.mean_x,
+            self.ssqdm_x,
+            self.compensation_add,
+            self.compensation_remove,
+            self.num_consecutive_same_value,
+            self.prev_value,
+        )
+        self.values = deque(values[-max(self.window, 1) :].tolist())
+        return output
+
+    def _add(self, value: float):
+        if value != value:
+            return
+
+        self.nobs += 1
+        if value == self.prev_value:
+            self.num_consecutive_same_value += 1
+        else:
+            self.num_consecutive_same_value = 1
+        self.prev_value = value
+
+        prev_mean = self.mean_x - self.compensation_add
+        y = value - self.compensation_add
+        t = y - self.mean_x
+        self.compensation_add = t + self.mean_x - y
+        self.mean_x = self.mean_x + t / self.nobs
+        self.ssqdm_x = self.ssqdm_x + (value - prev_mean) * (value - self.mean_x)
+
+    def _remove(self, value: float):
+        if value == value:
+            self.nobs -= 1
+            if self.nobs:
+                prev_mean = self.mean_x - self.compensation_remove
+                y = value - self.compensation_remove
+                t = y - self.mean_x
+                self.compensation_remove = t + self.mean_x - y
+                self.mean_x = self.mean_x - t / self.nobs
+                self.ssqdm_x = self.ssqdm_x - (value - prev_mean) * (
+                    value - self.mean_x
+                )
+            else:
+                self.mean_x = self.ssqdm_x = 0.0
+
+
+class EWMStream:
+    # ewm_kernel resumed one value, or one chunk of values, at a time
+    def __init__(self, com: float, adjust: bool = True):
+        alpha = 1.0 / (1.0 + com)
+        self.com = com
+        self.old_wt_factor = 1.0 - alpha
+        self.new_wt = 1.0 if adjust else alpha
+        self.adjust = adjust
+        self.weighted = np.nan
+        self.old_wt = 1.0
+
+    def update(self, value: float) -> float:
+        value = np.nan if math.isinf(value) else value
+        if self.weighted == self.weighted:
+            self.old_wt *= self.old_wt_factor
+            if value == value:
+                if self.weighted != value:
+                    self.weighted = (
+                        self.old_wt * self.weighted + self.new_wt * value
+                    ) / (self.old_wt + self.new_wt)
+                self.old_wt = self.old_wt + self.new_wt if self.adjust else 1.0
+        elif value == value:
+            self.weighted = value
+        return self.weighted
+
+    def update_many(self, values: np.ndarray) -> np.ndarray:
+        values = np.asarray(values, dtype=float)
+        values = np.where(np.isinf(values), np.nan, values)
+        output, self.weighted, self.old_wt = ewm_kernel(
+            values, self.com, self.adjust, self.weighted, self.old_wt
+        )
+        return output
+
+
+class WilderStream:
+    # compute_wilder(seed="sma") resumed one value, or one chunk, at a time
+    def __init__(self, period: int):
+        self.period = period
+        self.seed = RollingMeanStream(period)
+        self.nobs = 0
+        self.previous = np.nan
+
+    def update(self, value: float) -> float:
+        self.nobs += 1
+        if self.nobs <= self.period:
+            self.previous = self.seed.update(value)
+        else:
+            self.previous = (self.previous * (self.period - 1) + value) / self.period
+        return self.previous
+
+    def update_many(self, values: np.ndarray) -> np.ndarray:
+        values = np.asarray(values, dtype=float)
+        n_seed = min(max(self.period - self.nobs, 0), len(values))
+        output = np.empty(len(values))
+        if n_seed:
+            output[:n_seed] = self.seed.update_many(values[:n_seed])
+            self.previous = output[n_seed - 1]
+        if len(values) > n_seed:
+            output[n_seed:], self.previous = wilder_kernel(
+                values[n_seed:], self.period, self.previous
+            )
+        self.nobs += len(values)
+        return output
+
+
 def crossed(series1, series2, direction=None):
     if isinstance(series1, np.ndarray):
         series1 = pd.Series(series1)
@@ -4,12 +4,13 @@ from typing import Literal
 import numpy as np
 import pandas as pd
 
-from lib.visualisation import plot_lag
-
 from .base import Indicator
+from .helper import solve_normal_equations
 
 
 class Indicator_Lag(Indicator):
+    StateAttributes = ["stream", "lag_col_names", "ols"]
+
     def __init__(
         self,
         symbol: str,
@@ -17,11 +18,14 @@ class Indicator_Lag(Indicator):
         start_date: datetime,
         position_type: Literal["long", "short", "long_short"] = "long_short",
         lag_days: int = 2,
+        fit_method: Literal["full", "expanding", "rolling"] = "full",
+        fit_window: int = 252,
     ):
         super().__init__(price_data, start_date, position_type)
         self.symbol = symbol
-        self.price_data = price_data
         self.lag_days = lag_days
+        self.fit_method = fit_method
+        self.fit_window = fit_window
         self.lag_col_names = []
         self.ols = {"return": None, "sign": None}
 
@@ -31,46 +35,84 @@ class Indicator_Lag(Indicator):
         self._compute_buy_or_sell()
 
     def plot(self):
+        from lib.visualisation import plot_lag
+
         plot_lag(self.symbol, self.get_price_data())
 
     def _compute_internal_workings(self):
-        self.price_data["Log Return"] = np.log(
+        self.output["Log Return"] = np.log(
             self.price_data["Adj Close"] / self.price_data["Adj Close"].shift(1)
         )
         for lag in range(1, self.lag_days + 1):
             COL = f"lag_{lag}"
-            self.price_data[COL] = self.price_data["Log Return"].shift(lag)
+            self.output[COL] = self.output["Log Return"].shift(lag)
             self.lag_col_names.append(COL)
 
-        self.price_data.dropna(inplace=True)
+        self.output.dropna(self.price_data.notna().all(axis=1).values)
+        lag_values = self.output.to_frame(self.lag_col_names).values
 
-        self.ols["return"] = np.linalg.lstsq(
-            self.price_data[self.lag_col_names],
-            self.price_data["Log Return"],
-            rcond=None,
-        )[0]
+        targets = {
+            "return": self.output["Log Return"].to_numpy(),
+            "sign": np.sign(self.output["Log Return"].to_numpy()),
+        }
+        if self.fit_method == "full":
+            for name, target in targets.items():
+                self.ols[name] = np.linalg.lstsq(lag_values, target, rcond=None)[0]
+            prediction_return = np.dot(lag_values, self.ols["return"])
+            prediction_sign = np.sign(np.dot(lag_values, self.ols["sign"]))
+        else:
+            coefficients = self._compute_walk_forward_coefficients(lag_values, targets)
+            for name, values in coefficients.items():
+                self.ols[name] = pd.DataFrame(
+                    values, index=self.output.index, columns=self.lag_col_names
+                )
+            prediction_return = np.einsum(
+                "ij,ij->i", lag_values, coefficients["return"]
+            )
+            prediction_sign = np.nan_to_num(
+                np.sign(np.einsum("ij,ij->i", lag_values, coefficients["sign"]))
+            )
 
-        self.price_data["PREDICTION_RETURN"] = np.dot(
-            self.price_data[self.lag_col_names], self.ols["return"]
-        )
+        self.output["PREDICTION_RETURN"] = prediction_return
+        self.output["PREDICTION_SIGN"] = prediction_sign
 
-        self.ols["sign"] = np.linalg.lstsq(
-            self.price_data[self.lag_col_names],
-            np.sign(self.price_data["Log Return"]),
-            rcond=None,
-        )[0]
+    def _compute_walk_forward_coefficients(
+        self, lag_values: np.ndarray, targets: dict[str, np.ndarray]
+    ) -> dict[str, np.ndarray]:
+        if self.fit_method not in ["expanding", "rolling"]:
+            raise Exception(f"Unknown fit_method {self.fit_method}")
 
-        self.price_data["PREDICTION_SIGN"] = np.sign(
-            np.dot(self.price_data[self.lag_col_names], self.ols["sign"])
+        # Running sums of the normal equations X'X and X'y, so the fit used
+        # for row i only sees rows before i and every refit is a k x k solve
+        n_rows, n_lags = lag_values.shape
+        window = self.fit_window
+
+        def sum_before(values: np.ndarray) -> np.ndarray:
+            cumulative = np.cumsum(values, axis=-1, out=values)
+            window_sum = cumulative[..., window - 1 : n_rows - 1]
+            if self.fit_method == "rolling":
+                window_sum = window_sum.copy()
+                window_sum[..., 1:] -= cumulative[..., : n_rows - window - 1]
+            return window_sum
+
+        coefficients = {name: np.full((n_rows, n_lags), np.nan) for name in targets}
+        if n_rows <= window:
+            return coefficients
+
+        lag_values = np.ascontiguousarray(lag_values.T)
+        fitted_coefficients = solve_normal_equations(
+            sum_before(lag_values[:, None, :] * lag_values[None, :, :]),
+            [sum_before(lag_values * target) for target in targets.values()],
         )
+        for name, values in zip(targets, fitted_coefficients):
+            coefficients[name][window:] = values.T
+        return coefficients
 
     def _compute_trading_positions(self):
-        self.price_data["trading_positions"] = self.price_data["PREDICTION_SIGN"].shift(
-            -1
-        )
+        self.output["trading_positions"] = self.output["PREDICTION_SIGN"].shift(-1)
         super()._compute_trading_positions()
 
     def _compute_buy_or_sell(self):
-        self.price_data["buy_or_sell"] = (
-            self.price_data["trading_positions"].diff().clip(-1, 1)
+        self.output["buy_or_sell"] = (
+            self.output["trading_positions"].diff().clip(-1, 1)
         ).fillna(0)
@@ -4,10 +4,8 @@ from typing import Literal
 import numpy as np
 import pandas as pd
 
-from lib.visualisation import plot_ma_crossover_buy_sell
-
-from .base import Indicator
-from .helper import compute_sma
+from .base import Indicator, compute_buy_or_sell_batch, get_position_bounds
+from .helper import RollingMeanStream, compute_sma
 
 
 class Indicator_MA_Crossover(Indicator):
@@ -22,36 +20,95 @@ class Indicator_MA_Crossover(Indicator):
     ):
         super().__init__(price_data, start_date, position_type)
         self.symbol = symbol
-        self.price_data = price_data
         self.short_period = short_period
         self.long_period = long_period
 
+    @classmethod
+    def compute_trading_positions_batch(
+        cls,
+        symbol: str,
+        price_data: pd.DataFrame,
+        start_date: datetime,
+        position_type: Literal["long", "short", "long_short"],
+        param_sets: list[dict],
+    ) -> tuple[np.ndarray, np.ndarray]:
+        short, long = get_position_bounds(position_type)
+        param_sets = [{**cls.get_default_params(), **params} for params in param_sets]
+        short_periods = [params["short_period"] for params in param_sets]
+        long_periods = [params["long_period"] for params in param_sets]
+
+        periods = sorted(set(short_periods) | set(long_periods))
+        adj_close_price = price_data[["Adj Close"]]
+        df_sma = np.column_stack(
+            [compute_sma(adj_close_price, period).values[:, 0] for period in periods]
+        )
+        sma_short = df_sma[:, [periods.index(period) for period in short_periods]]
+        sma_long = df_sma[:, [periods.index(period) for period in long_periods]]
+
+        trading_positions = np.where(sma_short > sma_long, 1, -1).clip(short, long)
+        return trading_positions, compute_buy_or_sell_batch(trading_positions)
+
     def run(self):
         self._compute_internal_workings()
         self._compute_trading_positions()
         self._compute_buy_or_sell()
 
     def plot(self):
+        from lib.visualisation import plot_ma_crossover_buy_sell
+
         plot_ma_crossover_buy_sell(self.symbol, self.get_price_data())
 
     def _compute_internal_workings(self):
         adj_close_price = self.price_data[["Adj Close"]]
 
-        df_sma_short = compute_sma(adj_close_price.copy(), self.short_period)
-        df_sma_long = compute_sma(adj_close_price.copy(), self.long_period)
+        df_sma_short = compute_sma(adj_close_price, self.short_period)
+        df_sma_long = compute_sma(adj_close_price, self.long_period)
 
-        self.price_data["SMA_short"] = df_sma_short.values
-        self.price_data["SMA_long"] = df_sma_long.values
+        self.output["SMA_short"] = df_sma_short.values
+        self.output["SMA_long"] = df_sma_long.values
 
     def _compute_trading_positions(self):
-        self.price_data["trading_positions"] = np.where(
-            self.price_data["SMA_short"] > self.price_data["SMA_long"],
+        self.output["trading_positions"] = np.where(
+            self.output["SMA_short"] > self.output["SMA_long"],
             1,
             -1,
         )
         super()._compute_trading_positions()
 
     def _compute_buy_or_sell(self):
-        self.price_data["buy_or_sell"] = (
-            self.price_data["trading_positions"].diff().clip(-1, 1)
+        self.output["buy_or_sell"] = (
+            self.output["trading_positions"].diff().clip(-1, 1)
         ).fillna(0)
+
+    def _init_stream(self) -> dict:
+        return {
+            "sma_short": RollingMeanStream(self.short_period, min_periods=1),
+            "sma_long": RollingMeanStream(self.long_period, min_periods=1),
+            "trading_positions": np.nan,
+        }
+
+    def _update_stream(self, adj_close: float) -> dict:
+        sma_short = self.stream["sma_short"].update(adj_close)
+        sma_long = self.stream["sma_long"].update(adj_close)
+        trading_positions, buy_or_sell = self._update_trading_positions_stream(
+            1.0 if sma_short > sma_long else -1.0
+        )
+        return {
+            "SMA_short": sma_short,
+            "SMA_long": sma_long,
+            "trading_positions": trading_positions,
+            "buy_or_sell": buy_or_sell,
+        }
+
+    def _update_stream_chunk(self, adj_close: np.ndarray) -> dict:
+        sma_short = self.stream["sma_short"].update_many(adj_close)
+        sma_long = self.stream["sma_long"].update_many(adj_close)
+        trading_positions, buy_or_sell = self._update_trading_positions_chunk(
+            np.where(sma_short > sma_long, 1.0, -1.0)
+        )
+        return {
+            "SMA_short": sma_short,
+            "SMA_long": sma_long,
+            "trading_positions": trading_positions,
+            "buy_or_sell": buy_or_sell,
+        }
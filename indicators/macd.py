@@ -4,10 +4,16 @@ from typing import Literal
 import numpy as np
 import pandas as pd
 
-from lib.visualisation import plot_macd_buy_sell
-
-from .base import Indicator
-from .helper import compute_ema, crossed_above, crossed_below
+from .base import Indicator, get_position_bounds
+from .helper import (
+    EWMStream,
+    clip,
+    compute_ema,
+    crossed_above,
+    crossed_below,
+    ffill_from,
+    shift_from,
+)
 
 
 class Indicator_MACD(Indicator):
@@ -23,17 +29,67 @@ class Indicator_MACD(Indicator):
     ):
         super().__init__(price_data, start_date, position_type)
         self.symbol = symbol
-        self.price_data = price_data
         self.short_period = short_period
         self.long_period = long_period
         self.signal_period = signal_period
 
+    @classmethod
+    def compute_trading_positions_batch(
+        cls,
+        symbol: str,
+        price_data: pd.DataFrame,
+        start_date: datetime,
+        position_type: Literal["long", "short", "long_short"],
+        param_sets: list[dict],
+    ) -> tuple[np.ndarray, np.ndarray]:
+        short, long = get_position_bounds(position_type)
+        param_sets = [{**cls.get_default_params(), **params} for params in param_sets]
+        short_periods = [params["short_period"] for params in param_sets]
+        long_periods = [params["long_period"] for params in param_sets]
+        signal_periods = np.array([params["signal_period"] for params in param_sets])
+
+        periods = sorted(set(short_periods) | set(long_periods))
+        adj_close_price = price_data[["Adj Close"]]
+        df_ema = np.column_stack(
+            [compute_ema(adj_close_price, period).values[:, 0] for period in periods]
+        )
+        df_macd = (
+            df_ema[:, [periods.index(period) for period in short_periods]]
+            - df_ema[:, [periods.index(period) for period in long_periods]]
+        )
+        df_signal_line = np.empty_like(df_macd)
+        for signal_period in np.unique(signal_periods):
+            columns = signal_periods == signal_period
+            df_signal_line[:, columns] = compute_ema(
+                pd.DataFrame(df_macd[:, columns]), signal_period
+            ).values
+
+        previous_macd = np.full_like(df_macd, np.nan)
+        previous_macd[1:] = df_macd[:-1]
+        previous_signal_line = np.full_like(df_signal_line, np.nan)
+        previous_signal_line[1:] = df_signal_line[:-1]
+        buy_signal = (df_macd > df_signal_line) & (
+            previous_macd <= previous_signal_line
+        )
+        sell_signal = (df_macd < df_signal_line) & (
+            previous_macd >= previous_signal_line
+        )
+
+        buy_or_sell = np.where(buy_signal, 1, np.nan)
+        buy_or_sell = np.where(sell_signal, -1, buy_or_sell)
+        trading_positions = (
+            pd.DataFrame(buy_or_sell).ffill().fillna(0).values.clip(short, long)
+        )
+        return trading_positions, np.nan_to_num(buy_or_sell)
+
     def run(self) -> pd.DataFrame:
         self._compute_internal_workings()
         self._compute_buy_or_sell()
         self._compute_trading_positions()
 
     def plot(self):
+        from lib.visualisation import plot_macd_buy_sell
+
         plot_macd_buy_sell(self.symbol, self.get_price_data())
 
     def _compute_internal_workings(self):
@@ -44,24 +100,87 @@ class Indicator_MACD(Indicator):
         df_macd = df_ema_short - df_ema_long
         df_signal_line = compute_ema(df_macd, self.signal_period)
 
-        self.price_data["MACD"] = df_macd.values
-        self.price_data["MACD Signal Line"] = df_signal_line.values
+        self.output["MACD"] = df_macd.values
+        self.output["MACD Signal Line"] = df_signal_line.values
 
     def _compute_trading_positions(self):
-        self.price_data["trading_positions"] = (
-            self.price_data["buy_or_sell"].ffill().fillna(0)
-        )
-        self.price_data["buy_or_sell"] = self.price_data["buy_or_sell"].fillna(0)
+        self.output["trading_positions"] = self.output["buy_or_sell"].ffill().fillna(0)
+        self.output["buy_or_sell"] = self.output["buy_or_sell"].fillna(0)
         super()._compute_trading_positions()
 
     def _compute_buy_or_sell(self):
-        buy_signal = crossed_above(
-            self.price_data["MACD"], self.price_data["MACD Signal Line"]
-        )
+        buy_signal = crossed_above(self.output["MACD"], self.output["MACD Signal Line"])
         sell_signal = crossed_below(
-            self.price_data["MACD"], self.price_data["MACD Signal Line"]
+            self.output["MACD"], self.output["MACD Signal Line"]
+        )
+        self.output["buy_or_sell"] = np.where(buy_signal, 1, np.nan)
+        self.output["buy_or_sell"] = np.where(
+            sell_signal, -1, self.output["buy_or_sell"]
+        )
+
+    def _init_stream(self) -> dict:
+        return {
+            "ema_short": EWMStream(com=(self.short_period - 1) / 2.0),
+            "ema_long": EWMStream(com=(self.long_period - 1) / 2.0),
+            "ema_signal": EWMStream(com=(self.signal_period - 1) / 2.0),
+            "macd": np.nan,
+            "signal_line": np.nan,
+            "signal": np.nan,
+        }
+
+    def _update_stream(self, adj_close: float) -> dict:
+        macd = self.stream["ema_short"].update(adj_close) - self.stream[
+            "ema_long"
+        ].update(adj_close)
+        signal_line = self.stream["ema_signal"].update(macd)
+
+        previous_macd = self.stream["macd"]
+        previous_signal_line = self.stream["signal_line"]
+        buy_or_sell = np.nan
+        if macd > signal_line and previous_macd <= previous_signal_line:
+            buy_or_sell = 1.0
+        if macd < signal_line and previous_macd >= previous_signal_line:
+            buy_or_sell = -1.0
+        if buy_or_sell == buy_or_sell:
+            self.stream["signal"] = buy_or_sell
+
+        self.stream["macd"] = macd
+        self.stream["signal_line"] = signal_line
+        signal = self.stream["signal"]
+        return {
+            "MACD": macd,
+            "MACD Signal Line": signal_line,
+            "buy_or_sell": 0.0 if buy_or_sell != buy_or_sell else buy_or_sell,
+            "trading_positions": clip(
+                0.0 if signal != signal else signal, self.short, self.long
+            ),
+        }
+
+    def _update_stream_chunk(self, adj_close: np.ndarray) -> dict:
+        macd = self.stream["ema_short"].update_many(adj_close) - self.stream[
+            "ema_long"
+        ].update_many(adj_close)
+        signal_line = self.stream["ema_signal"].update_many(macd)
+
+        previous_macd = shift_from(macd, self.stream["macd"])
+        previous_signal_line = shift_from(signal_line, self.stream["signal_line"])
+        buy_or_sell = np.where(
+            (macd > signal_line) & (previous_macd <= previous_signal_line), 1.0, np.nan
         )
-        self.price_data["buy_or_sell"] = np.where(buy_signal, 1, np.nan)
-        self.price_data["buy_or_sell"] = np.where(
-            sell_signal, -1, self.price_data["buy_or_sell"]
+        buy_or_sell = np.where(
+            (macd < signal_line) & (previous_macd >= previous_signal_line),
+            -1.0,
+            buy_or_sell,
         )
+        signal = ffill_from(buy_or_sell, self.stream["signal"])
+
+        if len(adj_close):
+            self.stream["macd"] = macd[-1]
+            self.stream["signal_line"] = signal_line[-1]
+            self.stream["signal"] = signal[-1]
+        return {
+            "MACD": macd,
+            "MACD Signal Line": signal_line,
+            "buy_or_sell": np.nan_to_num(buy_or_sell),
+            "trading_positions": np.nan_to_num(signal).clip(self.short, self.long),
+        }
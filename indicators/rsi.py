@@ -4,10 +4,15 @@ from typing import Literal
 import numpy as np
 import pandas as pd
 
-from lib.visualisation import plot_rsi_buy_sell
-
-from .base import Indicator
-from .helper import crossed_above, crossed_below
+from .base import Indicator, compute_buy_or_sell_batch, get_position_bounds
+from .helper import (
+    WilderStream,
+    compute_wilder,
+    crossed_above,
+    crossed_below,
+    ffill_from,
+    shift_from,
+)
 
 
 class Indicator_RSI(Indicator):
@@ -33,88 +38,280 @@ class Indicator_RSI(Indicator):
     ):
         super().__init__(price_data, start_date, position_type)
         self.symbol = symbol
-        self.price_data = price_data
         self.period = period
-        self.price_data["RSI_lower_threshold"] = lower_threshold
-        self.price_data["RSI_upper_threshold"] = upper_threshold
+        self.output["RSI_lower_threshold"] = lower_threshold
+        self.output["RSI_upper_threshold"] = upper_threshold
         self.long_when = long_when
         self.short_when = short_when
         self.long_threshold_exit = long_threshold_exit
         self.short_threshold_exit = short_threshold_exit
 
+    @classmethod
+    def compute_trading_positions_batch(
+        cls,
+        symbol: str,
+        price_data: pd.DataFrame,
+        start_date: datetime,
+        position_type: Literal["long", "short", "long_short"],
+        param_sets: list[dict],
+    ) -> tuple[np.ndarray, np.ndarray]:
+        short, long = get_position_bounds(position_type)
+        param_sets = [{**cls.get_default_params(), **params} for params in param_sets]
+        rsi_periods = [params["period"] for params in param_sets]
+        lower_thresholds = np.array(
+            [params["lower_threshold"] for params in param_sets], dtype=float
+        )
+        upper_thresholds = np.array(
+            [params["upper_threshold"] for params in param_sets], dtype=float
+        )
+        long_when_above = np.array(
+            [
+                params["long_when"] == "crossed_above_lower_threshold"
+                for params in param_sets
+            ]
+        )
+        short_when_below = np.array(
+            [
+                params["short_when"] == "crossed_below_upper_threshold"
+                for params in param_sets
+            ]
+        )
+        long_threshold_exits = np.array(
+            [
+                (
+                    np.nan
+                    if params["long_threshold_exit"] is None
+                    else params["long_threshold_exit"]
+                )
+                for params in param_sets
+            ],
+            dtype=float,
+        )
+
+        periods = sorted(set(rsi_periods))
+        df_rsi = np.column_stack(
+            [
+                cls._compute_rsi(price_data["Adj Close"], period)["RSI"].values
+                for period in periods
+            ]
+        )
+        rsi = df_rsi[:, [periods.index(period) for period in rsi_periods]]
+        previous_rsi = np.full_like(rsi, np.nan)
+        previous_rsi[1:] = rsi[:-1]
+
+        def crossed(thresholds, direction):
+            if direction == "above":
+                return (rsi > thresholds) & (previous_rsi <= thresholds)
+            return (rsi < thresholds) & (previous_rsi >= thresholds)
+
+        buy_signal = np.where(
+            long_when_above,
+            crossed(lower_thresholds, "above"),
+            crossed(lower_thresholds, "below"),
+        )
+        sell_signal = np.where(
+            short_when_below,
+            crossed(upper_thresholds, "below"),
+            crossed(upper_thresholds, "above"),
+        )
+
+        trading_positions = np.where(buy_signal, 1, np.nan)
+        trading_positions = np.where(sell_signal, -1, trading_positions)
+        trading_positions = np.where(
+            (rsi - long_threshold_exits) * (previous_rsi - long_threshold_exits) < 0,
+            0,
+            trading_positions,
+        )
+        trading_positions = (
+            pd.DataFrame(trading_positions).ffill().fillna(0).values.clip(short, long)
+        )
+        return trading_positions, compute_buy_or_sell_batch(trading_positions)
+
     def run(self) -> pd.DataFrame:
         self._compute_internal_workings()
         self._compute_trading_positions()
         self._compute_buy_or_sell()
-        return self.price_data.copy(deep=True)
+        return pd.concat([self.price_data, self.output.to_frame()], axis=1)
 
     def plot(self):
+        from lib.visualisation import plot_rsi_buy_sell
+
         plot_rsi_buy_sell(self.symbol, self.get_price_data())
 
-    def _compute_internal_workings(self):
-        delta = self.price_data["Adj Close"].diff()
+    @staticmethod
+    def _compute_rsi(adj_close_price: pd.Series, period: int) -> dict[str, pd.Series]:
+        delta = adj_close_price.diff()
         gain = delta.where(delta > 0, 0)
         loss = -delta.where(delta < 0, 0)
 
-        # Calculate rolling averages of gains and losses
-        avg_gain = gain.rolling(window=self.period).mean()
-        avg_loss = loss.rolling(window=self.period).mean()
-        for i in range(self.period, len(delta)):
-            avg_gain[i] = (avg_gain[i - 1] * (self.period - 1) + gain[i]) / self.period
-            avg_loss[i] = (avg_loss[i - 1] * (self.period - 1) + loss[i]) / self.period
+        # Calculate Wilder's smoothed averages of gains and losses
+        avg_gain = compute_wilder(gain, period)
+        avg_loss = compute_wilder(loss, period)
 
         # Compute the Relative Strength (RS)
         rs = avg_gain / avg_loss
 
         # Compute the RSI
         rsi = 100 - (100 / (1 + rs))
-        self.price_data["avg_gain"] = avg_gain
-        self.price_data["avg_loss"] = avg_loss
-        self.price_data["rs"] = rs
-        self.price_data["RSI"] = rsi
+        return {"avg_gain": avg_gain, "avg_loss": avg_loss, "rs": rs, "RSI": rsi}
+
+    def _compute_internal_workings(self):
+        rsi = self._compute_rsi(self.price_data["Adj Close"], self.period)
+        for column, values in rsi.items():
+            self.output[column] = values
 
     def _compute_trading_positions(self):
         if self.long_when == "crossed_above_lower_threshold":
             buy_signal = crossed_above(
-                self.price_data["RSI"], self.price_data["RSI_lower_threshold"]
+                self.output["RSI"], self.output["RSI_lower_threshold"]
             )
         else:
             buy_signal = crossed_below(
-                self.price_data["RSI"], self.price_data["RSI_lower_threshold"]
+                self.output["RSI"], self.output["RSI_lower_threshold"]
             )
 
         if self.short_when == "crossed_below_upper_threshold":
             sell_signal = crossed_below(
-                self.price_data["RSI"], self.price_data["RSI_upper_threshold"]
+                self.output["RSI"], self.output["RSI_upper_threshold"]
             )
         else:
             sell_signal = crossed_above(
-                self.price_data["RSI"], self.price_data["RSI_upper_threshold"]
+                self.output["RSI"], self.output["RSI_upper_threshold"]
             )
 
-        self.price_data["trading_positions"] = np.where(buy_signal, 1, np.nan)
-        self.price_data["trading_positions"] = np.where(
-            sell_signal, -1, self.price_data["trading_positions"]
+        self.output["trading_positions"] = np.where(buy_signal, 1, np.nan)
+        self.output["trading_positions"] = np.where(
+            sell_signal, -1, self.output["trading_positions"]
         )
         if (
             self.long_threshold_exit is not None
             or self.short_threshold_exit is not None
         ):
-            self.price_data["trading_positions"] = np.where(
+            self.output["trading_positions"] = np.where(
                 (
-                    (self.price_data["RSI"] - self.long_threshold_exit)
-                    * (self.price_data["RSI"].shift(1) - self.long_threshold_exit)
+                    (self.output["RSI"] - self.long_threshold_exit)
+                    * (self.output["RSI"].shift(1) - self.long_threshold_exit)
                     < 0
                 ),
                 0,
-                self.price_data["trading_positions"],
+                self.output["trading_positions"],
             )
-        self.price_data["trading_positions"] = (
-            self.price_data["trading_positions"].ffill().fillna(0)
+        self.output["trading_positions"] = (
+            self.output["trading_positions"].ffill().fillna(0)
         )
         super()._compute_trading_positions()
 
     def _compute_buy_or_sell(self):
-        self.price_data["buy_or_sell"] = (
-            self.price_data["trading_positions"].diff().clip(-1, 1)
+        self.output["buy_or_sell"] = (
+            self.output["trading_positions"].diff().clip(-1, 1)
         ).fillna(0)
+
+    def _init_stream(self) -> dict:
+        return {
+            "avg_gain": WilderStream(self.period),
+            "avg_loss": WilderStream(self.period),
+            "adj_close": np.nan,
+            "rsi": np.nan,
+            "signal": np.nan,
+            "trading_positions": np.nan,
+        }
+
+    def _update_stream(self, adj_close: float) -> dict:
+        delta = adj_close - self.stream["adj_close"]
+        self.stream["adj_close"] = adj_close
+        avg_gain = self.stream["avg_gain"].update(delta if delta > 0 else 0.0)
+        avg_loss = self.stream["avg_loss"].update(-(delta if delta < 0 else 0.0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rs = float(np.float64(avg_gain) / avg_loss)
+        rsi = 100 - (100 / (1 + rs))
+
+        lower_threshold = self.output.columns["RSI_lower_threshold"]
+        upper_threshold = self.output.columns["RSI_upper_threshold"]
+        previous_rsi = self.stream["rsi"]
+        if self.long_when == "crossed_above_lower_threshold":
+            buy_signal = rsi > lower_threshold and previous_rsi <= lower_threshold
+        else:
+            buy_signal = rsi < lower_threshold and previous_rsi >= lower_threshold
+        if self.short_when == "crossed_below_upper_threshold":
+            sell_signal = rsi < upper_threshold and previous_rsi >= upper_threshold
+        else:
+            sell_signal = rsi > upper_threshold and previous_rsi <= upper_threshold
+
+        signal = 1.0 if buy_signal else np.nan
+        if sell_signal:
+            signal = -1.0
+        if (
+            self.long_threshold_exit is not None
+            and (rsi - self.long_threshold_exit)
+            * (previous_rsi - self.long_threshold_exit)
+            < 0
+        ):
+            signal = 0.0
+        if signal == signal:
+            self.stream["signal"] = signal
+        self.stream["rsi"] = rsi
+
+        signal = self.stream["signal"]
+        trading_positions, buy_or_sell = self._update_trading_positions_stream(
+            0.0 if signal != signal else signal
+        )
+        return {
+            "RSI_lower_threshold": lower_threshold,
+            "RSI_upper_threshold": upper_threshold,
+            "avg_gain": avg_gain,
+            "avg_loss": avg_loss,
+            "rs": rs,
+            "RSI": rsi,
+            "trading_positions": trading_positions,
+            "buy_or_sell": buy_or_sell,
+        }
+
+    def _update_stream_chunk(self, adj_close: np.ndarray) -> dict:
+        delta = adj_close - shift_from(adj_close, self.stream["adj_close"])
+        avg_gain = self.stream["avg_gain"].update_many(np.where(delta > 0, delta, 0.0))
+        avg_loss = self.stream["avg_loss"].update_many(-np.where(delta < 0, delta, 0.0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rs = avg_gain / avg_loss
+        rsi = 100 - (100 / (1 + rs))
+
+        lower_threshold = self.output.columns["RSI_lower_threshold"]
+        upper_threshold = self.output.columns["RSI_upper_threshold"]
+        previous_rsi = shift_from(rsi, self.stream["rsi"])
+        if self.long_when == "crossed_above_lower_threshold":
+            buy_signal = (rsi > lower_threshold) & (previous_rsi <= lower_threshold)
+        else:
+            buy_signal = (rsi < lower_threshold) & (previous_rsi >= lower_threshold)
+        if self.short_when == "crossed_below_upper_threshold":
+            sell_signal = (rsi < upper_threshold) & (previous_rsi >= upper_threshold)
+        else:
+            sell_signal = (rsi > upper_threshold) & (previous_rsi <= upper_threshold)
+
+        signal = np.where(buy_signal, 1.0, np.nan)
+        signal = np.where(sell_signal, -1.0, signal)
+        if self.long_threshold_exit is not None:
+            signal = np.where(
+                (rsi - self.long_threshold_exit)
+                * (previous_rsi - self.long_threshold_exit)
+                < 0,
+                0.0,
+                signal,
+            )
+        signal = ffill_from(signal, self.stream["signal"])
+        if len(adj_close):
+            self.stream["adj_close"] = adj_close[-1]
+            self.stream["rsi"] = rsi[-1]
+            self.stream["signal"] = signal[-1]
+
+        trading_positions, buy_or_sell = self._update_trading_positions_chunk(
+            np.nan_to_num(signal)
+        )
+        return {
+            "RSI_lower_threshold": lower_threshold,
+            "RSI_upper_threshold": upper_threshold,
+            "avg_gain": avg_gain,
+            "avg_loss": avg_loss,
+            "rs": rs,
+            "RSI": rsi,
+            "trading_positions": trading_positions,
+            "buy_or_sell": buy_or_sell,
+        }
@@ -4,9 +4,8 @@ from typing import Literal
 import numpy as np
 import pandas as pd
 
-from lib.visualisation import plot_simple_momentum
-
 from .base import Indicator
+from .helper import shift_from
 
 
 class Indicator_Simple_Momentum(Indicator):
@@ -19,7 +18,6 @@ class Indicator_Simple_Momentum(Indicator):
     ):
         super().__init__(price_data, start_date, position_type)
         self.symbol = symbol
-        self.price_data = price_data
 
     def run(self):
         self._compute_internal_workings()
@@ -27,18 +25,52 @@ class Indicator_Simple_Momentum(Indicator):
         self._compute_buy_or_sell()
 
     def plot(self):
+        from lib.visualisation import plot_simple_momentum
+
         plot_simple_momentum(self.symbol, self.get_price_data())
 
     def _compute_internal_workings(self):
-        self.price_data["Log Return"] = np.log(
+        self.output["Log Return"] = np.log(
             self.price_data["Adj Close"] / self.price_data["Adj Close"].shift(1)
         )
 
     def _compute_trading_positions(self):
-        self.price_data["trading_positions"] = np.sign(self.price_data["Log Return"])
+        self.output["trading_positions"] = np.sign(self.output["Log Return"])
         super()._compute_trading_positions()
 
     def _compute_buy_or_sell(self):
-        self.price_data["buy_or_sell"] = (
-            self.price_data["trading_positions"].diff().clip(-1, 1)
+        self.output["buy_or_sell"] = (
+            self.output["trading_positions"].diff().clip(-1, 1)
         ).fillna(0)
+
+    def _init_stream(self) -> dict:
+        return {"adj_close": np.nan, "trading_positions": np.nan}
+
+    def _update_stream(self, adj_close: float) -> dict:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_return = float(np.log(np.float64(adj_close) / self.stream["adj_close"]))
+        self.stream["adj_close"] = adj_close
+        trading_positions, buy_or_sell = self._update_trading_positions_stream(
+            float(np.sign(log_return))
+        )
+        return {
+            "Log Return": log_return,
+            "trading_positions": trading_positions,
+            "buy_or_sell": buy_or_sell,
+        }
+
+    def _update_stream_chunk(self, adj_close: np.ndarray) -> dict:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_return = np.log(
+                adj_close / shift_from(adj_close, self.stream["adj_close"])
+            )
+        if len(adj_close):
+            self.stream["adj_close"] = adj_close[-1]
+        trading_positions, buy_or_sell = self._update_trading_positions_chunk(
+            np.sign(log_return)
+        )
+        return {
+            "Log Return": log_return,
+            "trading_positions": trading_positions,
+            "buy_or_sell": buy_or_sell,
+        }
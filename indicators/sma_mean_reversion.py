@@ -4,10 +4,14 @@ from typing import Literal
 import numpy as np
 import pandas as pd
 
-from lib.visualisation import plot_sma_mean_reversion_buy_sell
-
-from .base import Indicator
-from .helper import compute_sma
+from .base import Indicator, compute_buy_or_sell_batch, get_position_bounds
+from .helper import (
+    RollingMeanStream,
+    RollingStdStream,
+    compute_sma,
+    ffill_from,
+    shift_from,
+)
 
 
 class Indicator_SMA_Mean_Reversion(Indicator):
@@ -23,16 +27,68 @@ class Indicator_SMA_Mean_Reversion(Indicator):
     ):
         super().__init__(price_data, start_date, position_type)
         self.symbol = symbol
-        self.price_data = price_data
         self.sma_period = sma_period
+        self.threshold_method = threshold_method
+        self.threshold_multiplier = threshold_multiplier
         self.threshold = self._compute_threshold(threshold_method, threshold_multiplier)
 
+    @classmethod
+    def compute_trading_positions_batch(
+        cls,
+        symbol: str,
+        price_data: pd.DataFrame,
+        start_date: datetime,
+        position_type: Literal["long", "short", "long_short"],
+        param_sets: list[dict],
+    ) -> tuple[np.ndarray, np.ndarray]:
+        short, long = get_position_bounds(position_type)
+        param_sets = [{**cls.get_default_params(), **params} for params in param_sets]
+        sma_periods = [params["sma_period"] for params in param_sets]
+        multipliers = np.array(
+            [params["threshold_multiplier"] for params in param_sets]
+        )
+        is_stdev = np.array(
+            [params["threshold_method"] == "stdev" for params in param_sets]
+        )
+
+        periods = sorted(set(sma_periods))
+        columns = [periods.index(period) for period in sma_periods]
+        adj_close_price = price_data[["Adj Close"]]
+        df_sma = np.column_stack(
+            [compute_sma(adj_close_price, period).values[:, 0] for period in periods]
+        )
+        df_std = np.column_stack(
+            [
+                adj_close_price["Adj Close"].rolling(window=period).std().values
+                for period in periods
+            ]
+        )
+
+        sma_price_diff = adj_close_price.values - df_sma[:, columns]
+        threshold = np.where(is_stdev, multipliers * df_std[:, columns], multipliers)
+
+        trading_positions = np.where(sma_price_diff > threshold, short, np.nan)
+        trading_positions = np.where(
+            sma_price_diff < -threshold, long, trading_positions
+        )
+        previous_sma_price_diff = np.full_like(sma_price_diff, np.nan)
+        previous_sma_price_diff[1:] = sma_price_diff[:-1]
+        trading_positions = np.where(
+            sma_price_diff * previous_sma_price_diff < 0, 0, trading_positions
+        )
+        trading_positions = (
+            pd.DataFrame(trading_positions).ffill().fillna(0).values.clip(short, long)
+        )
+        return trading_positions, compute_buy_or_sell_batch(trading_positions)
+
     def run(self):
         self._compute_internal_workings()
         self._compute_trading_positions()
         self._compute_buy_or_sell()
 
     def plot(self):
+        from lib.visualisation import plot_sma_mean_reversion_buy_sell
+
         plot_sma_mean_reversion_buy_sell(self.symbol, self.get_price_data())
 
     def _compute_threshold(
@@ -53,48 +109,119 @@ class Indicator_SMA_Mean_Reversion(Indicator):
     def _compute_internal_workings(self):
         adj_close_price = self.price_data[["Adj Close"]]
 
-        df_sma = compute_sma(adj_close_price.copy(), self.sma_period)
+        df_sma = compute_sma(adj_close_price, self.sma_period)
 
-        self.price_data["SMA"] = df_sma.values
-        self.price_data["SMA_Price_Diff"] = (
-            adj_close_price["Adj Close"] - self.price_data["SMA"]
+        self.output["SMA"] = df_sma.values
+        self.output["SMA_Price_Diff"] = (
+            adj_close_price["Adj Close"] - self.output["SMA"]
         )
 
     def _compute_trading_positions(self):
-        self.price_data["Upper_Threshold"] = self.threshold
-        self.price_data["Lower_Threshold"] = -self.threshold
+        self.output["Upper_Threshold"] = self.threshold
+        self.output["Lower_Threshold"] = -self.threshold
 
-        self.price_data["trading_positions"] = np.where(
-            self.price_data["SMA_Price_Diff"] > self.price_data["Upper_Threshold"],
+        self.output["trading_positions"] = np.where(
+            self.output["SMA_Price_Diff"] > self.output["Upper_Threshold"],
             self.short,
             np.nan,  # overbought --> sell (short)
         )
 
-        self.price_data["trading_positions"] = np.where(
-            self.price_data["SMA_Price_Diff"]
-            < self.price_data["Lower_Threshold"],  # oversold --> buy (long)
+        self.output["trading_positions"] = np.where(
+            self.output["SMA_Price_Diff"]
+            < self.output["Lower_Threshold"],  # oversold --> buy (long)
             self.long,
-            self.price_data["trading_positions"],
+            self.output["trading_positions"],
         )
 
-        self.price_data["trading_positions"] = (
+        self.output["trading_positions"] = (
             np
             #           +                            -
             #           -                            +
             .where(
-                self.price_data["SMA_Price_Diff"]
-                * self.price_data["SMA_Price_Diff"].shift(1)
+                self.output["SMA_Price_Diff"] * self.output["SMA_Price_Diff"].shift(1)
                 < 0,  # oversold --> buy (long)
                 0,
-                self.price_data["trading_positions"],
+                self.output["trading_positions"],
             )
         )
-        self.price_data["trading_positions"] = (
-            self.price_data["trading_positions"].ffill().fillna(0)
+        self.output["trading_positions"] = (
+            self.output["trading_positions"].ffill().fillna(0)
         )
         super()._compute_trading_positions()
 
     def _compute_buy_or_sell(self):
-        self.price_data["buy_or_sell"] = (
-            self.price_data["trading_positions"].diff().clip(-1, 1)
+        self.output["buy_or_sell"] = (
+            self.output["trading_positions"].diff().clip(-1, 1)
         ).fillna(0)
+
+    def _init_stream(self) -> dict:
+        return {
+            "sma": RollingMeanStream(self.sma_period, min_periods=1),
+            "std": RollingStdStream(self.sma_period),
+            "sma_price_diff": np.nan,
+            "signal": np.nan,
+            "trading_positions": np.nan,
+        }
+
+    def _update_stream(self, adj_close: float) -> dict:
+        sma = self.stream["sma"].update(adj_close)
+        sma_price_diff = adj_close - sma
+        threshold = self.threshold_multiplier
+        if self.threshold_method == "stdev":
+            threshold = threshold * self.stream["std"].update(adj_close)
+
+        signal = np.nan
+        if sma_price_diff > threshold:
+            signal = self.short  # overbought --> sell (short)
+        if sma_price_diff < -threshold:
+            signal = self.long  # oversold --> buy (long)
+        if sma_price_diff * self.stream["sma_price_diff"] < 0:
+            signal = 0
+        if signal == signal:
+            self.stream["signal"] = signal
+        self.stream["sma_price_diff"] = sma_price_diff
+
+        signal = self.stream["signal"]
+        trading_positions, buy_or_sell = self._update_trading_positions_stream(
+            0.0 if signal != signal else signal
+        )
+        return {
+            "SMA": sma,
+            "SMA_Price_Diff": sma_price_diff,
+            "Upper_Threshold": threshold,
+            "Lower_Threshold": -threshold,
+            "trading_positions": trading_positions,
+            "buy_or_sell": buy_or_sell,
+        }
+
+    def _update_stream_chunk(self, adj_close: np.ndarray) -> dict:
+        sma = self.stream["sma"].update_many(adj_close)
+        sma_price_diff = adj_close - sma
+        threshold = self.threshold_multiplier
+        if self.threshold_method == "stdev":
+            threshold = threshold * self.stream["std"].update_many(adj_close)
+
+        signal = np.where(sma_price_diff > threshold, float(self.short), np.nan)
+        signal = np.where(sma_price_diff < -threshold, float(self.long), signal)
+        signal = np.where(
+            sma_price_diff * shift_from(sma_price_diff, self.stream["sma_price_diff"])
+            < 0,
+            0.0,
+            signal,
+        )
+        signal = ffill_from(signal, self.stream["signal"])
+        if len(adj_close):
+            self.stream["signal"] = signal[-1]
+            self.stream["sma_price_diff"] = sma_price_diff[-1]
+
+        trading_positions, buy_or_sell = self._update_trading_positions_chunk(
+            np.nan_to_num(signal)
+        )
+        return {
+            "SMA": sma,
+            "SMA_Price_Diff": sma_price_diff,
+            "Upper_Threshold": threshold,
+            "Lower_Threshold": -threshold,
+            "trading_positions": trading_positions,
+            "buy_or_sell": buy_or_sell,
+        }
@@ -0,0 +1,134 @@
+import itertools
+from datetime import datetime
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+
+from lib.performance.metrics import compute_metrics
+
+from .base import Indicator
+
+
+class IndicatorSweep:
+    def __init__(
+        self,
+        indicator: type[Indicator],
+        symbol: str,
+        price_data: pd.DataFrame,
+        start_date: datetime,
+        param_grid: dict[str, list],
+        position_type: Literal["long", "short", "long_short"] = "long_short",
+    ):
+        self.indicator = indicator
+        self.symbol = symbol
+        self.price_data = price_data
+        self.start_date = start_date
+        self.position_type = position_type
+        self.param_names = list(param_grid)
+        self.param_sets = [
+            dict(zip(self.param_names, values))
+            for values in itertools.product(*param_grid.values())
+        ]
+        self.dates = None
+        self.adj_close_price = None
+        self.trading_positions = None
+        self.buy_or_sell = None
+
+    def run(self):
+        trading_positions, buy_or_sell = self.indicator.compute_trading_positions_batch(
+            self.symbol,
+            self.price_data,
+            self.start_date,
+            self.position_type,
+            self.param_sets,
+        )
+        dates = self.price_data.index.get_level_values("Date")
+        is_after_start_date = dates >= self.start_date
+
+        self.dates = dates[is_after_start_date]
+        self.adj_close_price = self.price_data["Adj Close"].values[is_after_start_date]
+        self.trading_positions = trading_positions[is_after_start_date]
+        self.buy_or_sell = buy_or_sell[is_after_start_date]
+
+    def get_nbytes(self) -> int:
+        return sum(
+            values.nbytes
+            for values in [
+                self.trading_positions,
+                self.buy_or_sell,
+                self.adj_close_price,
+            ]
+            if values is not None
+        )
+
+    def get_param_index(self) -> pd.Index:
+        if not self.param_names:
+            return pd.RangeIndex(len(self.param_sets))
+        return pd.MultiIndex.from_tuples(
+            [tuple(params.values()) for params in self.param_sets],
+            names=self.param_names,
+        )
+
+    def get_positions(self, tidy: bool = False) -> pd.DataFrame:
+        if not tidy:
+            return pd.DataFrame(
+                self.trading_positions,
+                index=pd.Index(self.dates, name="Date"),
+                columns=self.get_param_index(),
+            )
+
+        n_dates, n_param_sets = self.trading_positions.shape
+        df = pd.DataFrame(
+            {
+                name: np.repeat([params[name] for params in self.param_sets], n_dates)
+                for name in self.param_names
+            }
+        )
+        df["Date"] = np.tile(self.dates, n_param_sets)
+        df["trading_positions"] = self.trading_positions.ravel(order="F")
+        df["buy_or_sell"] = self.buy_or_sell.ravel(order="F")
+        return df
+
+    def get_metrics(
+        self, capital: float = 1e6, transaction_fee: float = 0
+    ) -> pd.DataFrame:
+        return compute_batch_metrics(
+            self.adj_close_price,
+            self.trading_positions,
+            self.buy_or_sell,
+            self.dates,
+            self.get_param_index(),
+            capital,
+            transaction_fee,
+        )
+
+
+def compute_batch_metrics(
+    adj_close_price: np.ndarray,
+    trading_positions: np.ndarray,
+    buy_or_sell: np.ndarray,
+    dates: pd.DatetimeIndex,
+    index: pd.Index,
+    capital: float = 1e6,
+    transaction_fee: float = 0,
+) -> pd.DataFrame:
+    log_returns = np.log(adj_close_price[1:] / adj_close_price[:-1])
+    strategy_log_returns = np.full(trading_positions.shape, np.nan)
+    strategy_log_returns[1:] = trading_positions[:-1] * log_returns[:, np.newaxis]
+
+    strategy_cum_returns = np.exp(strategy_log_returns[1:].cumsum(axis=0))
+    n_trades = np.abs(buy_or_sell).sum(axis=0)
+    initial_capital = capital - np.abs(buy_or_sell[0]) * transaction_fee
+    final_capital = strategy_cum_returns[-1] * capital - n_trades * transaction_fee
+
+    df_metrics = pd.DataFrame(
+        {
+            "cum_returns": strategy_cum_returns[-1] - 1,
+            "cum_net_returns": final_capital / initial_capital - 1,
+            "final_capital": final_capital,
+            "n_trades": n_trades,
+        },
+        index=index,
+    )
+    return df_metrics.join(compute_metrics(strategy_log_returns, dates, index))
@@ -0,0 +1,121 @@
+import json
+import time
+import tracemalloc
+from contextvars import ContextVar
+from functools import wraps
+
+import pandas as pd
+
+_active_profiler = ContextVar("active_profiler", default=None)
+
+
+class Profiler:
+    ReportColumns = ["calls", "seconds", "peak_bytes"]
+
+    def __init__(self, trace_memory: bool = True):
+        self.trace_memory = trace_memory
+        self.stats = {}
+        self.stack = []
+        self._token = None
+        self._started_tracing = False
+
+    def __enter__(self) -> "Profiler":
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._token = _active_profiler.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _active_profiler.reset(self._token)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def record(self, name: str, seconds: float, peak_bytes: int = 0, calls: int = 1):
+        stats = self.stats.setdefault(name, dict.fromkeys(self.ReportColumns, 0))
+        stats["calls"] += calls
+        stats["seconds"] += seconds
+        stats["peak_bytes"] = max(stats["peak_bytes"], peak_bytes)
+
+    def merge(self, report: dict):
+        # Combine the report of another profiler, e.g. from a worker process
+        for name, stats in report.items():
+            self.record(name, stats["seconds"], stats["peak_bytes"], stats["calls"])
+
+    def get_report(self) -> dict:
+        return {name: dict(stats) for name, stats in self.stats.items()}
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame.from_dict(
+            self.stats, orient="index", columns=self.ReportColumns
+        ).rename_axis("stage")
+
+    def to_json(self, path: str = None) -> str:
+        report = json.dumps(self.get_report(), indent=2)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(report)
+        return report
+
+    def _enter_stage(self) -> list:
+        # Peaks are measured from the memory in use when the stage starts
+        if not tracemalloc.is_tracing():
+            frame = [0, 0]
+        else:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.stack:
+                self.stack[-1][1] = max(self.stack[-1][1], peak)
+            tracemalloc.reset_peak()
+            frame = [current, current]
+        self.stack.append(frame)
+        return frame
+
+    def _exit_stage(self, name: str, seconds: float):
+        baseline, peak = self.stack.pop()
+        if tracemalloc.is_tracing():
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            if self.stack:
+                # The enclosing stage saw everything this one did
+                self.stack[-1][1] = max(self.stack[-1][1], peak)
+        self.record(name, seconds, peak - baseline)
+
+
+class stage:
+    __slots__ = ["name", "profiler", "start"]
+
+    def __init__(self, name: str):
+        self.name = name
+        self.profiler = None
+
+    def __enter__(self):
+        self.profiler = _active_profiler.get()
+        if self.profiler is not None:
+            self.profiler._enter_stage()
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.profiler is not None:
+            self.profiler._exit_stage(self.name, time.perf_counter() - self.start)
+            self.profiler = None
+
+
+def timed(name: str = None):
+    def decorator(function):
+        stage_name = name or function.__qualname__
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if _active_profiler.get() is None:
+                return function(*args, **kwargs)
+            with stage(stage_name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def get_active_profiler() -> Profiler | None:
+    return _active_profiler.get()
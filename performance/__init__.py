@@ -1,3 +1,19 @@
 from .base import Performance, PerformanceCustom
+from .bootstrap import Bootstrap, resample_indices, resample_paths
+from .chunked import ChunkedPerformance
+from .metrics import compute_metrics, compute_metrics_from_cumulative_returns
+from .period_returns import compare_to_mean, compute_period_returns, pivot_by_year
 
-__all__ = ["Performance", "PerformanceCustom"]
+__all__ = [
+    "Performance",
+    "PerformanceCustom",
+    "ChunkedPerformance",
+    "Bootstrap",
+    "resample_indices",
+    "resample_paths",
+    "compute_metrics",
+    "compute_metrics_from_cumulative_returns",
+    "compute_period_returns",
+    "compare_to_mean",
+    "pivot_by_year",
+]
@@ -1,10 +1,12 @@
 import datetime as dt
 from typing import Literal
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-from matplotlib.ticker import PercentFormatter
+from instrumentation import timed
+
+from .metrics import compute_drawdown_episodes, get_years, infer_periods_per_year
+from .period_returns import compare_to_mean, compute_period_returns
 
 
 class PerformanceCustom:
@@ -13,7 +15,10 @@ class PerformanceCustom:
         self.cumulative_returns = cum_returns
         self.cumulative_returns.set_index("Date", inplace=True)
 
-    def compute_n_largest_drawdowns(self, n: int = 5, is_plot: bool = False):
+    @timed()
+    def compute_n_largest_drawdowns(
+        self, n: int = 5, is_plot: bool = False, verbose: bool = False
+    ):
         df_drawdown = self.cumulative_returns.copy()
         df_drawdown["Cumulative Returns"] = df_drawdown["Cumulative Returns"] - 1
         df_drawdown["Watermark"] = df_drawdown["Cumulative Returns"].cummax()
@@ -21,66 +26,42 @@ class PerformanceCustom:
             df_drawdown["Watermark"] - df_drawdown["Cumulative Returns"]
         )
 
-        breakpoints = df_drawdown["drawdown"].loc[df_drawdown["drawdown"] == 0].index
-
-        if (
-            df_drawdown["Cumulative Returns"].iloc[-1]
-            < df_drawdown["Watermark"].iloc[-1]
-        ):
-            breakpoints = breakpoints.append(df_drawdown.tail(1).index)
-
-        drawdown_periods = (
-            breakpoints[1:].to_pydatetime() - breakpoints[:-1].to_pydatetime()
-        )
-
-        self.drawdowns = []
-
-        for i in range(drawdown_periods.shape[0]):
-            start, end = breakpoints[i], breakpoints[i + 1]
-
-            max_drawdown = df_drawdown["drawdown"].loc[start:end].max()
-            self.drawdowns.append(
-                {
-                    "start_date": start,
-                    "end_date": end,
-                    "drawdown_period": drawdown_periods[i],
-                    "max_drawdown": max_drawdown,
-                }
-            )
-        df_n_drawdowns = (
-            pd.DataFrame(self.drawdowns)
-            .sort_values(by="max_drawdown", ascending=False)
-            .reset_index(drop=True)
-            .iloc[:n]
+        self.drawdowns = compute_drawdown_episodes(
+            df_drawdown["Cumulative Returns"].to_numpy(), df_drawdown.index
         )
-        df_n_drawdown_period = (
-            pd.DataFrame(self.drawdowns)
-            .sort_values(by="drawdown_period", ascending=False)
-            .reset_index(drop=True)
-            .iloc[:n]
+        df_n_drawdowns = self.drawdowns.nlargest(n, "max_drawdown").reset_index(
+            drop=True
         )
-        print("-------------------")
-        print(f"{n}-highest drawdown")
-        print(df_n_drawdowns)
-        self._plot_n_drawdown(n, df_drawdown, df_n_drawdowns) if is_plot else None
-        print("\n")
-
-        print("-------------------")
-        print(f"{n}-highest drawdown period")
-        print(df_n_drawdown_period)
-        self._plot_n_drawdown(n, df_drawdown, df_n_drawdown_period) if is_plot else None
+        df_n_drawdown_period = self.drawdowns.nlargest(
+            n, "drawdown_period"
+        ).reset_index(drop=True)
+
+        if verbose:
+            print("-------------------")
+            print(f"{n}-highest drawdown")
+            print(df_n_drawdowns)
+            print("\n")
+            print("-------------------")
+            print(f"{n}-highest drawdown period")
+            print(df_n_drawdown_period)
+        if is_plot:
+            self._plot_n_drawdown(n, df_drawdown, df_n_drawdowns)
+            self._plot_n_drawdown(n, df_drawdown, df_n_drawdown_period)
 
         return df_n_drawdowns, df_n_drawdown_period, df_drawdown
 
     def _plot_n_drawdown(
         self, n: int, df_drawdown: pd.DataFrame, df_n_drawdowns: pd.DataFrame
     ):
+        import matplotlib.pyplot as plt
+        from matplotlib.ticker import PercentFormatter
+
         _, ax = plt.subplots(1, figsize=(16, 10))
         ax.set_title(self.symbol)
         df_drawdown[["Cumulative Returns"]].plot(color="green", ax=ax)
         df_drawdown[["Watermark"]].plot(color="blue", ls="--", ax=ax, label="Watermark")
 
-        for i in range(n):
+        for i in range(len(df_n_drawdowns)):
             start = df_n_drawdowns.iloc[i]["start_date"]
             end = df_n_drawdowns.iloc[i]["end_date"] + dt.timedelta(days=1)
             days = df_n_drawdowns.iloc[i]["drawdown_period"].days
@@ -92,7 +73,13 @@ class PerformanceCustom:
         ax.legend()
         plt.show()
 
-    def compute_sharpe_ratio(self, method: Literal["log", "pct_chg"] = "log") -> float:
+    @timed()
+    def compute_sharpe_ratio(
+        self, method: Literal["log", "pct_chg"] = "log", periods_per_year: float = None
+    ) -> float:
+        periods_per_year = periods_per_year or infer_periods_per_year(
+            self.cumulative_returns.index
+        )
         pct_chg_daily_return = self.cumulative_returns[
             "Cumulative Returns"
         ].pct_change()
@@ -101,41 +88,41 @@ class PerformanceCustom:
         avg_daily_return = daily_return.mean()
         std_daily_return = daily_return.std()
         sharpe_ratio = (
-            np.sqrt(252 / len(pct_chg_daily_return))
+            np.sqrt(periods_per_year / len(pct_chg_daily_return))
             * avg_daily_return
             / std_daily_return
         )
         return np.round(sharpe_ratio, 3)
 
-    def compute_annual_returns(self) -> pd.DataFrame:
-        unique_years = self.cumulative_returns.index.year.unique()
-        annual_returns = []
-        for year in unique_years:
-            tmp_df = self.cumulative_returns.loc[
-                self.cumulative_returns.index.year == year
-            ]
-            val = (
-                tmp_df["Cumulative Returns"].iloc[-1]
-                / tmp_df["Cumulative Returns"].iloc[0]
-                - 1
-            )
-            annual_returns.append(val * 100)
-        mean_return = np.mean(annual_returns)
-        df = pd.DataFrame({"Year": unique_years, "Annual Return (%)": annual_returns})
-        year_above_average = df[df["Annual Return (%)"] > mean_return]["Year"].values
-        year_below_average = df[df["Annual Return (%)"] < mean_return]["Year"].values
+    @timed()
+    def compute_annual_returns(self, verbose: bool = False) -> pd.DataFrame:
+        annual_returns = compute_period_returns(
+            self.cumulative_returns["Cumulative Returns"], freq="year"
+        )
+        df = pd.DataFrame(
+            {
+                "Year": annual_returns.index.year,
+                "Annual Return (%)": annual_returns.iloc[:, 0].values * 100,
+                "Relative To Mean": compare_to_mean(annual_returns).iloc[:, 0].values,
+            }
+        )
 
-        print(f"Mean annual return: {mean_return:.2f}%")
-        print(f"Years above average: {year_above_average}")
-        print(f"Years below average: {year_below_average}")
+        if verbose:
+            mean_return = df["Annual Return (%)"].mean()
+            year_above_average = df[df["Relative To Mean"] > 0]["Year"].values
+            year_below_average = df[df["Relative To Mean"] < 0]["Year"].values
+            print(f"Mean annual return: {mean_return:.2f}%")
+            print(f"Years above average: {year_above_average}")
+            print(f"Years below average: {year_below_average}")
 
         return df
 
+    @timed()
     def compute_cagr(self) -> float:
         cumulative_returns = self.cumulative_returns["Cumulative Returns"]
-        days = (cumulative_returns.index[-1] - cumulative_returns.index[0]).days
+        years = get_years(cumulative_returns.index[0], cumulative_returns.index[-1])
         cagr = (cumulative_returns.iloc[-1] / cumulative_returns.iloc[0]) ** (
-            365.0 / days
+            1 / years
         ) - 1
         return cagr
 
@@ -146,29 +133,38 @@ class Performance:
         self.daily_pct_returns = np.exp(daily_log_returns) - 1
         self.cumulative_returns = daily_log_returns.cumsum().apply(np.exp)
 
+    @timed()
     def compute_max_dd(self) -> float:
         return self._compute_drawdown(self.cumulative_returns).max()
 
+    @timed()
     def compute_longest_drawdown_period(self) -> float:
         drawdown = self._compute_drawdown(self.cumulative_returns)
         periods = np.diff(np.append(drawdown[drawdown == 0].index, drawdown.index[-1:]))
         return periods.max() / np.timedelta64(1, "D")
 
-    def compute_sharpe_ratio(self, method: Literal["pct_chg", "log"] = "log") -> float:
+    @timed()
+    def compute_sharpe_ratio(
+        self, method: Literal["pct_chg", "log"] = "log", periods_per_year: float = None
+    ) -> float:
+        periods_per_year = periods_per_year or infer_periods_per_year(
+            self.daily_log_returns.index
+        )
         daily_returns = (
             self.daily_log_returns if method == "log" else self.daily_pct_returns
         )
         return (
-            np.sqrt(252 / len(daily_returns))
+            np.sqrt(periods_per_year / len(daily_returns))
             * daily_returns.mean()
             / daily_returns.std()
         )
 
+    @timed()
     def compute_cagr(self) -> float:
         cumulative_returns = self.cumulative_returns.dropna()
-        days = (cumulative_returns.index[-1] - cumulative_returns.index[0]).days
+        years = get_years(cumulative_returns.index[0], cumulative_returns.index[-1])
         cagr = (cumulative_returns.iloc[-1] / cumulative_returns.iloc[0]) ** (
-            365.0 / days
+            1 / years
         ) - 1
         return cagr
 
@@ -0,0 +1,239 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+
+from .metrics import (
+    compute_cagr,
+    compute_cumulative_returns,
+    compute_max_dd,
+    compute_sharpe_ratio,
+    infer_periods_per_year,
+)
+
+ResampleMethod = Literal["iid", "block", "stationary", "permutation"]
+
+
+def resample_indices(
+    n_rows: int,
+    n_paths: int,
+    method: ResampleMethod = "stationary",
+    block_size: int = 20,
+    trade_starts: np.ndarray = None,
+    rng: np.random.Generator = None,
+) -> np.ndarray:
+    # (n_rows x n_paths) rows of the original returns, one column per path
+    rng = np.random.default_rng() if rng is None else rng
+    block_size = max(1, min(block_size, n_rows))
+
+    if method == "iid":
+        return rng.integers(0, n_rows, (n_rows, n_paths))
+
+    if method == "block":
+        # Moving blocks of block_size rows, the last one cut to fit
+        n_blocks = -(-n_rows // block_size)
+        starts = rng.integers(0, n_rows - block_size + 1, (n_blocks, n_paths))
+        indices = starts[:, np.newaxis, :] + np.arange(block_size)[:, np.newaxis]
+        return indices.reshape(-1, n_paths)[:n_rows]
+
+    if method == "stationary":
+        # Politis and Romano: blocks of geometric length wrapping around the end.
+        # Paths are rows here, every block jumps from the previous one's start
+        is_new_block = rng.random((n_paths, n_rows)) < 1 / block_size
+        is_new_block[:, 0] = True
+        block_rows = np.nonzero(is_new_block)[1]
+        shifts = rng.integers(0, n_rows, len(block_rows)) - block_rows
+        jumps = np.diff(shifts, prepend=0)
+        is_first_block = block_rows == 0
+        jumps[is_first_block] = shifts[is_first_block]
+        steps = np.zeros((n_paths, n_rows), dtype=np.int64)
+        steps[is_new_block] = jumps
+        indices = np.cumsum(steps, axis=1)
+        indices += np.arange(n_rows)
+        indices[indices >= n_rows] -= n_rows
+        return indices.T
+
+    if method == "permutation":
+        # Trades keep their returns in order, only the order of trades changes
+        trade_starts = np.arange(n_rows) if trade_starts is None else trade_starts
+        trade_lengths = np.diff(np.append(trade_starts, n_rows))
+        orders = rng.permuted(
+            np.tile(np.arange(len(trade_starts)), (n_paths, 1)), axis=1
+        ).ravel()
+        starts, lengths = trade_starts[orders], trade_lengths[orders]
+        offsets = np.cumsum(lengths) - lengths
+        indices = np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+        return indices.reshape(n_paths, n_rows).T
+
+    raise Exception(f"Unknown resampling method {method}")
+
+
+def compute_path_metrics(
+    daily_log_returns: np.ndarray, dates: pd.DatetimeIndex, periods_per_year: float
+) -> pd.DataFrame:
+    cumulative_returns = compute_cumulative_returns(daily_log_returns)
+    return pd.DataFrame(
+        {
+            "sharpe_ratio": compute_sharpe_ratio(daily_log_returns, periods_per_year),
+            "sharpe_ratio_pct_chg": compute_sharpe_ratio(
+                np.exp(daily_log_returns) - 1, periods_per_year
+            ),
+            "cagr": compute_cagr(cumulative_returns, dates),
+            "max_drawdown": compute_max_dd(cumulative_returns),
+        }
+    )
+
+
+def resample_paths(
+    daily_log_returns: np.ndarray,
+    n_paths: int,
+    method: ResampleMethod = "stationary",
+    block_size: int = 20,
+    trade_starts: np.ndarray = None,
+    rng: np.random.Generator = None,
+) -> np.ndarray:
+    # Leading missing rows stay in place, as they count in the Sharpe scaling
+    n_missing = int(np.isnan(daily_log_returns).argmin())
+    returns = daily_log_returns[n_missing:]
+    indices = resample_indices(
+        len(returns), n_paths, method, block_size, trade_starts, rng
+    )
+    paths = np.full((len(daily_log_returns), n_paths), np.nan)
+    paths[n_missing:] = returns[indices]
+    return paths
+
+
+def _run_batch(
+    daily_log_returns: np.ndarray,
+    dates: pd.DatetimeIndex,
+    periods_per_year: float,
+    method: ResampleMethod,
+    block_size: int,
+    trade_starts: np.ndarray,
+    n_paths: int,
+    seed: np.random.SeedSequence,
+) -> pd.DataFrame:
+    paths = resample_paths(
+        daily_log_returns,
+        n_paths,
+        method,
+        block_size,
+        trade_starts,
+        np.random.default_rng(seed),
+    )
+    return compute_path_metrics(paths, dates, periods_per_year)
+
+
+class Bootstrap:
+    # Cells of the bars x paths matrices resampled at once
+    ChunkCells = 2**22
+
+    def __init__(
+        self,
+        daily_log_returns: pd.Series,
+        method: ResampleMethod = "stationary",
+        block_size: int = 20,
+        trading_positions: pd.Series = None,
+        periods_per_year: float = None,
+        seed: int = None,
+        max_workers: int = None,
+    ):
+        self.daily_log_returns = daily_log_returns
+        self.method = method
+        self.block_size = block_size
+        self.dates = pd.DatetimeIndex(daily_log_returns.index)
+        self.periods_per_year = periods_per_year or infer_periods_per_year(self.dates)
+        self.seed = seed
+        self.max_workers = max_workers
+
+        values = daily_log_returns.to_numpy(dtype=float)
+        self.n_missing = int(np.isnan(values).argmin()) if len(values) else 0
+        if np.isnan(values[self.n_missing :]).any():
+            raise Exception("Only the leading daily returns can be missing")
+        self.trade_starts = self._get_trade_starts(trading_positions)
+        self.estimate = compute_path_metrics(
+            values[:, np.newaxis], self.dates, self.periods_per_year
+        ).iloc[0]
+        self.results = None
+
+    @classmethod
+    def from_cumulative_returns(
+        cls, cum_returns: pd.Series, **bootstrap_params
+    ) -> "Bootstrap":
+        # The "Cumulative Returns" PerformanceCustom takes
+        return cls(np.log(cum_returns.astype(float)).diff(), **bootstrap_params)
+
+    def resample(self, n_paths: int, seed: int = None) -> np.ndarray:
+        # Raw (bars x paths) log returns, for metrics not computed by run
+        return resample_paths(
+            self.daily_log_returns.to_numpy(dtype=float),
+            n_paths,
+            self.method,
+            self.block_size,
+            self.trade_starts,
+            np.random.default_rng(self.seed if seed is None else seed),
+        )
+
+    def run(self, n_paths: int = 1000) -> pd.DataFrame:
+        batch_size = max(1, self.ChunkCells // max(len(self.dates), 1))
+        batch_sizes = [
+            min(batch_size, n_paths - start) for start in range(0, n_paths, batch_size)
+        ]
+        # One seed per batch, the draws do not depend on the number of workers
+        seeds = np.random.SeedSequence(self.seed).spawn(len(batch_sizes))
+        batch_params = (
+            self.daily_log_returns.to_numpy(dtype=float),
+            self.dates,
+            self.periods_per_year,
+            self.method,
+            self.block_size,
+            self.trade_starts,
+        )
+
+        if self.max_workers is None or len(batch_sizes) < 2:
+            results = [
+                _run_batch(*batch_params, size, seed)
+                for size, seed in zip(batch_sizes, seeds)
+            ]
+        else:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [
+                    executor.submit(_run_batch, *batch_params, size, seed)
+                    for size, seed in zip(batch_sizes, seeds)
+                ]
+                results = [future.result() for future in futures]
+
+        self.results = pd.concat(results, ignore_index=True)
+        self.results.index.name = "path"
+        return self.results
+
+    def get_confidence_intervals(
+        self, confidence: float = 0.95, n_paths: int = None
+    ) -> pd.DataFrame:
+        # Without n_paths the last run is reused, or 1000 paths are drawn
+        if self.results is None or (
+            n_paths is not None and len(self.results) != n_paths
+        ):
+            self.run(n_paths or 1000)
+        alpha = (1 - confidence) / 2
+        return pd.DataFrame(
+            {
+                "estimate": self.estimate,
+                "mean": self.results.mean(),
+                "std": self.results.std(),
+                "lower": self.results.quantile(alpha),
+                "upper": self.results.quantile(1 - alpha),
+            }
+        )
+
+    def _get_trade_starts(self, trading_positions: pd.Series) -> np.ndarray | None:
+        if trading_positions is None:
+            return None
+        # The return of a bar is earned by the position held since the last one
+        held_positions = (
+            trading_positions.reindex(self.daily_log_returns.index)
+            .shift(1)
+            .to_numpy(dtype=float)[self.n_missing :]
+        )
+        return np.flatnonzero(np.r_[True, held_positions[1:] != held_positions[:-1]])
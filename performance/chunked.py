@@ -0,0 +1,88 @@
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+from instrumentation import timed
+
+from .metrics import get_years, infer_periods_per_year
+
+
+class ChunkedPerformance:
+    def __init__(self, symbol: str, periods_per_year: float = None):
+        self.symbol = symbol
+        self.periods_per_year = periods_per_year
+        self.n_rows = 0
+        self.first_value = np.nan
+        self.first_date = None
+        self.last_value = np.nan
+        self.last_date = None
+        self.watermark = np.nan
+        self.max_drawdown = np.nan
+        # count, mean and sum of squared deviations of the daily returns
+        self.moments = {"log": (0, 0.0, 0.0), "pct_chg": (0, 0.0, 0.0)}
+
+    @timed()
+    def update(self, cum_returns: pd.Series):
+        # The next rows of the "Cumulative Returns" PerformanceCustom takes
+        values = cum_returns.to_numpy(dtype=float)
+        if len(values) == 0:
+            return
+
+        pct_chg_daily_return = values / np.append(self.last_value, values[:-1]) - 1
+        for method, daily_return in [
+            ("pct_chg", pct_chg_daily_return),
+            ("log", np.log(pct_chg_daily_return + 1)),
+        ]:
+            self.moments[method] = self._combine_moments(
+                self.moments[method], daily_return[~np.isnan(daily_return)]
+            )
+
+        watermark = np.fmax.accumulate(np.append(self.watermark, values))
+        self.max_drawdown = np.fmax.reduce(
+            np.append(self.max_drawdown, watermark[1:] - values)
+        )
+        self.watermark = watermark[-1]
+
+        if self.n_rows == 0:
+            self.first_value = values[0]
+            self.first_date = cum_returns.index[0]
+            # The bar frequency is taken from the first chunk
+            self.periods_per_year = self.periods_per_year or infer_periods_per_year(
+                cum_returns.index
+            )
+        self.n_rows += len(values)
+        self.last_value = values[-1]
+        self.last_date = cum_returns.index[-1]
+
+    @timed()
+    def compute_sharpe_ratio(self, method: Literal["log", "pct_chg"] = "log") -> float:
+        count, mean, m2 = self.moments[method]
+        std = np.sqrt(m2 / (count - 1)) if count > 1 else np.nan
+        sharpe_ratio = np.sqrt(self.periods_per_year / self.n_rows) * mean / std
+        return np.round(sharpe_ratio, 3)
+
+    @timed()
+    def compute_cagr(self) -> float:
+        years = get_years(self.first_date, self.last_date)
+        return (self.last_value / self.first_value) ** (1 / years) - 1
+
+    @timed()
+    def compute_max_dd(self) -> float:
+        return self.max_drawdown
+
+    @staticmethod
+    def _combine_moments(moments: tuple, values: np.ndarray) -> tuple:
+        # Pairwise update of Chan et al., stable across any number of chunks
+        count, mean, m2 = moments
+        if len(values) == 0:
+            return moments
+        chunk_count = len(values)
+        chunk_mean = values.mean()
+        chunk_m2 = np.square(values - chunk_mean).sum()
+        total = count + chunk_count
+        delta = chunk_mean - mean
+        return (
+            total,
+            mean + delta * chunk_count / total,
+            m2 + chunk_m2 + delta**2 * count * chunk_count / total,
+        )
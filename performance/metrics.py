@@ -0,0 +1,256 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Column-wise versions of the Performance methods for (dates x curves) arrays.
+# Leading NaN rows are skipped the same way the pandas reductions skip them.
+
+TradingDaysPerYear = 252
+
+
+def infer_periods_per_year(dates: pd.DatetimeIndex) -> float:
+    # Daily bars keep the 252 trading days convention, intraday bars scale it
+    # by the typical number of bars in a trading day
+    dates = pd.DatetimeIndex(dates)
+    if len(dates) < 2:
+        return TradingDaysPerYear
+    day_ns = pd.Timedelta(days=1).value
+    spacing_days = np.median(np.diff(dates.asi8)) / day_ns
+    if spacing_days >= 20:
+        return 12
+    if spacing_days >= 4:
+        return 52
+    if spacing_days >= 1:
+        return TradingDaysPerYear
+    _, bars_per_day = np.unique(dates.asi8 // day_ns, return_counts=True)
+    return TradingDaysPerYear * float(np.median(bars_per_day))
+
+
+def get_years(start: pd.Timestamp, end: pd.Timestamp) -> float:
+    # Fractional days, so that intraday spans do not round down to zero
+    return (end - start) / pd.Timedelta(days=365)
+
+
+def compute_cumulative_returns(daily_log_returns: np.ndarray) -> np.ndarray:
+    is_missing = np.isnan(daily_log_returns)
+    cumulative_returns = np.exp(np.where(is_missing, 0, daily_log_returns).cumsum(0))
+    cumulative_returns[is_missing] = np.nan
+    return cumulative_returns
+
+
+def compute_sharpe_ratio(
+    daily_returns: np.ndarray, periods_per_year: float = TradingDaysPerYear
+) -> np.ndarray:
+    mean, std = _compute_moments(daily_returns)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.sqrt(periods_per_year / len(daily_returns)) * mean / std
+
+
+def compute_sortino_ratio(
+    daily_returns: np.ndarray, periods_per_year: float = TradingDaysPerYear
+) -> np.ndarray:
+    # Downside deviation against a zero target
+    mean, _ = _compute_moments(daily_returns, with_std=False)
+    downside_returns = np.minimum(daily_returns, 0)
+    downside_mean_square, _ = _compute_moments(
+        np.square(downside_returns, out=downside_returns), with_std=False
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (
+            np.sqrt(periods_per_year / len(daily_returns))
+            * mean
+            / np.sqrt(downside_mean_square)
+        )
+
+
+def compute_drawdown(cumulative_returns: np.ndarray) -> np.ndarray:
+    watermark = np.fmax.accumulate(cumulative_returns, axis=0)
+    return np.subtract(watermark, cumulative_returns, out=watermark)
+
+
+def compute_max_dd(cumulative_returns: np.ndarray) -> np.ndarray:
+    return _compute_max_dd(compute_drawdown(cumulative_returns))
+
+
+def compute_longest_drawdown_period(
+    cumulative_returns: np.ndarray, dates: pd.DatetimeIndex
+) -> np.ndarray:
+    return _compute_longest_drawdown_period(compute_drawdown(cumulative_returns), dates)
+
+
+def compute_drawdown_episodes(
+    cumulative_returns: np.ndarray, dates: pd.DatetimeIndex
+) -> pd.DataFrame:
+    # One curve; every episode runs from a watermark to the next one, or to
+    # the last date when it has not recovered
+    drawdown = compute_drawdown(np.asarray(cumulative_returns, dtype=float))
+    watermark_rows = np.flatnonzero(drawdown == 0)
+    episode_ids = np.cumsum(drawdown == 0) - 1
+    rows = np.flatnonzero((drawdown > 0) & (episode_ids >= 0))
+
+    is_first = np.diff(episode_ids[rows], prepend=-1) != 0
+    starts = np.flatnonzero(is_first)
+    episodes = episode_ids[rows[starts]]
+    depths = np.maximum.reduceat(drawdown[rows], starts) if len(rows) else np.empty(0)
+
+    # The trough is the first row of the episode at its maximum drawdown
+    counts = np.diff(np.append(starts, len(rows)))
+    trough_rows = rows[drawdown[rows] == np.repeat(depths, counts)]
+    trough_rows = trough_rows[np.diff(episode_ids[trough_rows], prepend=-1) != 0]
+
+    is_recovered = episodes + 1 < len(watermark_rows)
+    end_rows = np.where(
+        is_recovered,
+        watermark_rows[np.minimum(episodes + 1, len(watermark_rows) - 1)],
+        len(drawdown) - 1,
+    )
+    start_dates = dates[watermark_rows[episodes]]
+    end_dates = dates[end_rows]
+    return pd.DataFrame(
+        {
+            "start_date": start_dates,
+            "trough_date": dates[trough_rows],
+            "end_date": end_dates,
+            "drawdown_period": end_dates - start_dates,
+            "max_drawdown": depths,
+            "is_recovered": is_recovered,
+        }
+    )
+
+
+def compute_cagr(cumulative_returns: np.ndarray, dates: pd.DatetimeIndex) -> np.ndarray:
+    columns = np.arange(cumulative_returns.shape[1])
+    is_valid = ~np.isnan(cumulative_returns)
+    first = is_valid.argmax(axis=0)
+    last = len(is_valid) - 1 - is_valid[::-1].argmax(axis=0)
+    years = np.asarray(get_years(dates[first], dates[last]), dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (
+            cumulative_returns[last, columns] / cumulative_returns[first, columns]
+        ) ** (1 / years) - 1
+
+
+def compute_calmar_ratio(cagr: np.ndarray, max_dd: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return cagr / max_dd
+
+
+def compute_metrics(
+    daily_log_returns: np.ndarray | pd.DataFrame,
+    dates: pd.DatetimeIndex = None,
+    columns: pd.Index = None,
+    periods_per_year: float = None,
+) -> pd.DataFrame:
+    if isinstance(daily_log_returns, pd.DataFrame):
+        dates = daily_log_returns.index if dates is None else dates
+        columns = daily_log_returns.columns if columns is None else columns
+    daily_log_returns = np.asarray(daily_log_returns, dtype=float)
+    if daily_log_returns.ndim == 1:
+        daily_log_returns = daily_log_returns[:, np.newaxis]
+    dates = pd.DatetimeIndex(dates)
+    periods_per_year = periods_per_year or infer_periods_per_year(dates)
+
+    df_metrics = pd.DataFrame(
+        {
+            "sharpe_ratio": compute_sharpe_ratio(daily_log_returns, periods_per_year),
+            "sharpe_ratio_pct_chg": compute_sharpe_ratio(
+                np.exp(daily_log_returns) - 1, periods_per_year
+            ),
+            "sortino_ratio": compute_sortino_ratio(daily_log_returns, periods_per_year),
+        },
+        index=columns,
+    )
+    return _add_curve_metrics(
+        df_metrics, compute_cumulative_returns(daily_log_returns), dates
+    )
+
+
+def compute_metrics_from_cumulative_returns(
+    cumulative_returns: np.ndarray | pd.DataFrame,
+    dates: pd.DatetimeIndex = None,
+    columns: pd.Index = None,
+    periods_per_year: float = None,
+) -> pd.DataFrame:
+    # Equity curves as taken by PerformanceCustom, first row is the base
+    if isinstance(cumulative_returns, pd.DataFrame):
+        dates = cumulative_returns.index if dates is None else dates
+        columns = cumulative_returns.columns if columns is None else columns
+    cumulative_returns = np.asarray(cumulative_returns, dtype=float)
+    if cumulative_returns.ndim == 1:
+        cumulative_returns = cumulative_returns[:, np.newaxis]
+    dates = pd.DatetimeIndex(dates)
+    periods_per_year = periods_per_year or infer_periods_per_year(dates)
+
+    daily_pct_returns = np.full_like(cumulative_returns, np.nan)
+    daily_pct_returns[1:] = cumulative_returns[1:] / cumulative_returns[:-1] - 1
+    daily_log_returns = np.log(daily_pct_returns + 1)
+    df_metrics = pd.DataFrame(
+        {
+            "sharpe_ratio": compute_sharpe_ratio(daily_log_returns, periods_per_year),
+            "sharpe_ratio_pct_chg": compute_sharpe_ratio(
+                daily_pct_returns, periods_per_year
+            ),
+            "sortino_ratio": compute_sortino_ratio(daily_log_returns, periods_per_year),
+        },
+        index=columns,
+    )
+    return _add_curve_metrics(df_metrics, cumulative_returns, dates)
+
+
+def _add_curve_metrics(
+    df_metrics: pd.DataFrame, cumulative_returns: np.ndarray, dates: pd.DatetimeIndex
+) -> pd.DataFrame:
+    drawdown = compute_drawdown(cumulative_returns)
+    df_metrics["cagr"] = compute_cagr(cumulative_returns, dates)
+    df_metrics["max_drawdown"] = _compute_max_dd(drawdown)
+    df_metrics["longest_drawdown_period"] = _compute_longest_drawdown_period(
+        drawdown, dates
+    )
+    df_metrics["calmar_ratio"] = compute_calmar_ratio(
+        df_metrics["cagr"].values, df_metrics["max_drawdown"].values
+    )
+    return df_metrics
+
+
+def _compute_moments(
+    daily_returns: np.ndarray, with_std: bool = True
+) -> tuple[np.ndarray, np.ndarray | None]:
+    # Returns usually only miss their first rows, which can be sliced off
+    # instead of going through the slower nan-aware reductions
+    n_missing = np.isnan(daily_returns).all(axis=1).argmin()
+    daily_returns = daily_returns[n_missing:]
+    if not np.isnan(daily_returns).any():
+        mean = daily_returns.mean(axis=0)
+        std = daily_returns.std(axis=0, ddof=1) if with_std else None
+        return mean, std
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mean = np.nanmean(daily_returns, axis=0)
+        std = np.nanstd(daily_returns, axis=0, ddof=1) if with_std else None
+    return mean, std
+
+
+def _compute_max_dd(drawdown: np.ndarray) -> np.ndarray:
+    return np.fmax.reduce(drawdown, axis=0)
+
+
+def _compute_longest_drawdown_period(
+    drawdown: np.ndarray, dates: pd.DatetimeIndex
+) -> np.ndarray:
+    # Periods run from one watermark to the next, or to the last date
+    is_period_end = drawdown == 0
+    is_period_end[-1] = True
+    columns, rows = np.nonzero(is_period_end.T)
+
+    days = np.asarray((dates - dates[0]) / np.timedelta64(1, "D"), dtype=float)
+    periods = np.diff(days[rows])
+    is_same_column = columns[1:] == columns[:-1]
+    periods, columns = periods[is_same_column], columns[1:][is_same_column]
+
+    longest_periods = np.full(drawdown.shape[1], np.nan)
+    if len(periods):
+        starts = np.flatnonzero(np.r_[True, columns[1:] != columns[:-1]])
+        longest_periods[columns[starts]] = np.maximum.reduceat(periods, starts)
+    return longest_periods
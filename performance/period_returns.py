@@ -0,0 +1,56 @@
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+
+PeriodCodes = {"month": "M", "quarter": "Q", "year": "Y"}
+
+
+def compute_period_returns(
+    cumulative_returns: pd.DataFrame | pd.Series | np.ndarray,
+    dates: pd.DatetimeIndex = None,
+    freq: Literal["month", "quarter", "year"] = "year",
+    base: Literal["period_start", "previous_period_end"] = "period_start",
+) -> pd.DataFrame:
+    columns = None
+    if isinstance(cumulative_returns, (pd.DataFrame, pd.Series)):
+        dates = cumulative_returns.index if dates is None else dates
+        if isinstance(cumulative_returns, pd.DataFrame):
+            columns = cumulative_returns.columns
+    cumulative_returns = np.asarray(cumulative_returns, dtype=float)
+    if cumulative_returns.ndim == 1:
+        cumulative_returns = cumulative_returns[:, np.newaxis]
+    dates = pd.DatetimeIndex(dates)
+
+    # Dates are sorted, so each period is a contiguous run of rows
+    period_keys = dates.year.to_numpy() * 12
+    if freq == "month":
+        period_keys = period_keys + dates.month.to_numpy() - 1
+    elif freq == "quarter":
+        period_keys = period_keys + (dates.month.to_numpy() - 1) // 3 * 3
+    starts = np.flatnonzero(np.diff(period_keys, prepend=-1) != 0)
+    ends = np.append(starts[1:] - 1, len(period_keys) - 1)
+
+    start_values = cumulative_returns[starts]
+    if base == "previous_period_end":
+        start_values[1:] = cumulative_returns[ends[:-1]]
+    return pd.DataFrame(
+        cumulative_returns[ends] / start_values - 1,
+        index=dates[starts].to_period(PeriodCodes[freq]),
+        columns=columns,
+    )
+
+
+def compare_to_mean(period_returns: pd.DataFrame) -> pd.DataFrame:
+    # 1 above the curve's mean period return, -1 below, 0 at the mean and
+    # missing where the return is (e.g. a curve that starts later)
+    return np.sign(period_returns - period_returns.mean()).astype("Int8")
+
+
+def pivot_by_year(period_returns: pd.Series) -> pd.DataFrame:
+    # Month-by-year or quarter-by-year table for a single curve
+    periods = period_returns.index
+    sub_periods = periods.month if periods.freqstr.startswith("M") else periods.quarter
+    return pd.DataFrame(
+        {"Year": periods.year, "Period": sub_periods, "Return": period_returns.values}
+    ).pivot(index="Year", columns="Period", values="Return")
@@ -1,3 +1,14 @@
 from .base import Portfolio, PortfolioUpdated
+from .batch import BatchPortfolio
+from .chunked import ChunkedPortfolio
+from .execution import ExecutionEngine
+from .multi_asset import MultiAssetPortfolio
 
-__all__ = ["Portfolio", "PortfolioUpdated"]
+__all__ = [
+    "Portfolio",
+    "PortfolioUpdated",
+    "BatchPortfolio",
+    "ChunkedPortfolio",
+    "ExecutionEngine",
+    "MultiAssetPortfolio",
+]
@@ -1,24 +1,45 @@
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-from matplotlib.ticker import PercentFormatter
+from instrumentation import timed
 
+from lib.indicators.helper import compact_frame
 from lib.performance import PerformanceCustom
 
 
 class Portfolio:
+    PriceColumns = ["Adj Close", "buy_or_sell", "trading_positions"]
+
     def __init__(
-        self, df_prices: pd.DataFrame, capital: float = 1e6, transaction_fee: float = 0
+        self,
+        df_prices: pd.DataFrame,
+        capital: float = 1e6,
+        transaction_fee: float = 0,
+        compact: bool = False,
     ):
-        self.df_prices = df_prices.copy(deep=True).reset_index()
+        self.df_prices = df_prices[self.PriceColumns].reset_index()
+        # Compact inputs are computed in float64, then compacted again
+        self.df_prices = self.df_prices.astype(
+            {
+                column: float
+                for column in self.PriceColumns
+                if self.df_prices[column].dtype in [np.int8, np.float32]
+            }
+        )
         self.capital = capital
         self.transaction_fee = transaction_fee
+        self.compact = compact
         self.symbol = self.df_prices["Tickers"].iloc[0]
 
         self.df_portfolio = self.compute_portfolio()
+        # Headline figures come from the float64 row, so they stay exact
+        self.final_row = self.df_portfolio.iloc[-1]
+        if compact:
+            self.df_portfolio = compact_frame(self.df_portfolio)
 
     def get_performance(self) -> PerformanceCustom:
-        df = self.df_portfolio[["Date", "strategy_cum_net_returns"]].copy()
+        df = self.df_portfolio[["Date", "strategy_cum_net_returns"]].astype(
+            {"strategy_cum_net_returns": float}
+        )
         df.columns = ["Date", "Cumulative Returns"]
         return PerformanceCustom(df, self.symbol)
 
@@ -27,8 +48,9 @@ class Portfolio:
 
     def get_final_capital(self, with_fee=True) -> float:
         col_name = "total_holdings_after_fee" if with_fee else "total_holdings"
-        return np.around(self.get_portfolio()[col_name].iloc[-1], 2)
+        return np.around(self.final_row[col_name], 2)
 
+    @timed()
     def compute_portfolio(self):
         df_portfolio = self.df_prices[
             ["Date", "Adj Close", "buy_or_sell", "trading_positions"]
@@ -66,7 +88,7 @@ class Portfolio:
         return df_portfolio
 
     def get_final_cumulative_returns(self):
-        final_row = self.df_portfolio.iloc[-1]
+        final_row = self.final_row
         cumret_dict = {
             "Type": ["Passive", "Strategy", "Strategy with Fee"],
             "Cum Ret": [
@@ -78,82 +100,15 @@ class Portfolio:
         return pd.DataFrame(cumret_dict)
 
     def plot_returns(self, with_fee: bool = True):
-        df_portfolio = self.df_portfolio.reset_index()
-        fig = plt.figure(figsize=[14, 10])
-
-        sub = fig.add_subplot(5, 1, (1, 2), xlabel="Date", ylabel=f"Adj Close")
-        sub.set_title(self.symbol)
-        sub.set_xlim(df_portfolio["Date"].min(), df_portfolio["Date"].max())
-        sub.plot(
-            df_portfolio["Date"],
-            df_portfolio["Adj Close"],
-            color="grey",
-            linewidth=0.75,
-            label="Adj Close Price",
-        )
-        # BUY signal
-        buy_index = df_portfolio.buy_or_sell == 1.0
-        sub.plot(
-            df_portfolio.loc[buy_index]["Date"],
-            df_portfolio[buy_index]["Adj Close"],
-            "^",
-            color="green",
-            markersize=4,
-            label="Buy",
-        )
-
-        # SELL signal
-        sell_index = df_portfolio.buy_or_sell == -1.0
-        sub.plot(
-            df_portfolio.loc[sell_index]["Date"],
-            df_portfolio[sell_index]["Adj Close"],
-            "v",
-            color="red",
-            markersize=4,
-            label="Sell",
-        )
-        sub.legend()
-
-        sub = fig.add_subplot(5, 1, (3, 4), xlabel="Date", ylabel=f"Cumulative Returns")
-        sub.set_xlim(df_portfolio["Date"].min(), df_portfolio["Date"].max())
-        sub.plot(
-            df_portfolio["Date"],
-            df_portfolio["cum_returns"] - 1,
-            color="grey",
-            linewidth=0.75,
-            label="Passive",
-        )
-
-        strat_cum_ret = (
-            df_portfolio["strategy_cum_net_returns"]
-            if with_fee
-            else df_portfolio["strategy_cum_returns"]
-        )
-        strat_label = "Strategy Return with Fee" if with_fee else "Strategy Return"
-        sub.plot(
-            df_portfolio["Date"],
-            strat_cum_ret - 1,
-            color="blue",
-            linewidth=0.75,
-            label=strat_label,
-        )
-        sub.yaxis.set_major_formatter(PercentFormatter(1.0, decimals=1))
-        sub.legend()
+        from lib.visualisation import plot_portfolio_returns
 
-        sub = fig.add_subplot(5, 1, 5, xlabel="Date", ylabel=f"Positions")
-        sub.set_xlim(df_portfolio["Date"].min(), df_portfolio["Date"].max())
-        sub.plot(
-            df_portfolio["Date"],
-            df_portfolio["trading_positions"],
-            color="blue",
-            linewidth=0.75,
-        )
+        plot_portfolio_returns(self.symbol, self.df_portfolio, with_fee)
 
     def _compute_log_returns(self, daily_price_data: pd.Series) -> pd.Series:
         return np.log(daily_price_data / daily_price_data.shift(1))
 
     def _compute_cum_returns(self, daily_log_returns: pd.Series) -> pd.Series:
-        return daily_log_returns.fillna(0).cumsum().apply(np.exp)
+        return np.exp(daily_log_returns.fillna(0).cumsum())
 
     def compute_trading_opportunities(self) -> float:
         return self.get_portfolio[
@@ -168,10 +123,12 @@ class PortfolioUpdated(Portfolio):
         capital: float = 1e6,
         transaction_fee: float = 0,
         num_shares: float = 100,
+        compact: bool = False,
     ):
         self.num_shares = num_shares
-        super().__init__(df_prices, capital, transaction_fee)
+        super().__init__(df_prices, capital, transaction_fee, compact)
 
+    @timed()
     def compute_portfolio(self):
         df_portfolio = self.df_prices[
             ["Date", "Adj Close", "buy_or_sell", "trading_positions"]
@@ -218,67 +175,6 @@ class PortfolioUpdated(Portfolio):
         return df_portfolio
 
     def plot_returns(self, with_fee: bool = True):
-        df_portfolio = self.df_portfolio.reset_index()
-        fig = plt.figure(figsize=[14, 10])
-
-        sub = fig.add_subplot(5, 1, (1, 2), xlabel="Date", ylabel=f"Adj Close")
-        sub.set_title(self.symbol)
-        sub.set_xlim(df_portfolio["Date"].min(), df_portfolio["Date"].max())
-        sub.plot(
-            df_portfolio["Date"],
-            df_portfolio["Adj Close"],
-            color="grey",
-            linewidth=0.75,
-            label="Adj Close Price",
-        )
-        # BUY signal
-        buy_index = df_portfolio.buy_or_sell == 1.0
-        sub.plot(
-            df_portfolio.loc[buy_index]["Date"],
-            df_portfolio[buy_index]["Adj Close"],
-            "^",
-            color="green",
-            markersize=4,
-            label="Buy",
-        )
-
-        # SELL signal
-        sell_index = df_portfolio.buy_or_sell == -1.0
-        sub.plot(
-            df_portfolio.loc[sell_index]["Date"],
-            df_portfolio[sell_index]["Adj Close"],
-            "v",
-            color="red",
-            markersize=4,
-            label="Sell",
-        )
-        sub.legend()
+        from lib.visualisation import plot_portfolio_value
 
-        sub = fig.add_subplot(
-            5, 1, (3, 4), xlabel="Date", ylabel=f"Value of Portfolio (USD)"
-        )
-        sub.set_xlim(df_portfolio["Date"].min(), df_portfolio["Date"].max())
-
-        strat_total_values = (
-            df_portfolio["total_holdings_after_fee"]
-            if with_fee
-            else df_portfolio["total_holdings"]
-        )
-        strat_label = "Strategy Value with Fee" if with_fee else "Strategy Value"
-        sub.plot(
-            df_portfolio["Date"],
-            strat_total_values,
-            color="blue",
-            linewidth=0.75,
-            label=strat_label,
-        )
-        sub.legend()
-
-        sub = fig.add_subplot(5, 1, 5, xlabel="Date", ylabel=f"Positions")
-        sub.set_xlim(df_portfolio["Date"].min(), df_portfolio["Date"].max())
-        sub.plot(
-            df_portfolio["Date"],
-            df_portfolio["trading_positions"],
-            color="blue",
-            linewidth=0.75,
-        )
+        plot_portfolio_value(self.symbol, self.df_portfolio, with_fee)
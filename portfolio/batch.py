@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+from lib.indicators.base import compute_buy_or_sell_batch
+
+
+class BatchPortfolio:
+    def __init__(
+        self,
+        adj_close_price: pd.Series | np.ndarray,
+        trading_positions: pd.DataFrame | np.ndarray,
+        buy_or_sell: pd.DataFrame | np.ndarray = None,
+        capital: float = 1e6,
+        transaction_fee: float = 0,
+        dates: pd.Index = None,
+    ):
+        if dates is None and isinstance(adj_close_price, pd.Series):
+            dates = adj_close_price.index
+        if isinstance(trading_positions, pd.DataFrame):
+            self.columns = trading_positions.columns
+        else:
+            self.columns = pd.RangeIndex(np.shape(trading_positions)[1])
+
+        self.dates = dates
+        self.adj_close_price = np.asarray(adj_close_price, dtype=float)
+        self.trading_positions = np.asarray(trading_positions, dtype=float)
+        self.buy_or_sell = (
+            compute_buy_or_sell_batch(self.trading_positions)
+            if buy_or_sell is None
+            else np.asarray(buy_or_sell, dtype=float)
+        )
+        self.capital = capital
+        self.transaction_fee = transaction_fee
+
+        self.compute_portfolio()
+
+    @classmethod
+    def from_sweep(cls, sweep, **portfolio_params) -> "BatchPortfolio":
+        return cls(
+            sweep.adj_close_price,
+            sweep.get_positions(),
+            buy_or_sell=sweep.buy_or_sell,
+            dates=sweep.dates,
+            **portfolio_params,
+        )
+
+    def compute_portfolio(self):
+        # Same pipeline as Portfolio, with the price series shared by all columns
+        self.log_returns = np.full_like(self.adj_close_price, np.nan)
+        self.log_returns[1:] = np.log(
+            self.adj_close_price[1:] / self.adj_close_price[:-1]
+        )
+        self.cum_returns = np.exp(np.nan_to_num(self.log_returns, nan=0).cumsum())
+
+        strategy_log_returns = np.zeros_like(self.trading_positions)
+        np.multiply(
+            self.trading_positions[:-1],
+            self.log_returns[1:, np.newaxis],
+            out=strategy_log_returns[1:],
+        )
+        strategy_log_returns[np.isnan(strategy_log_returns)] = 0
+        self.strategy_cum_returns = np.exp(
+            strategy_log_returns.cumsum(axis=0, out=strategy_log_returns),
+            out=strategy_log_returns,
+        )
+        self.commission_fee = (np.abs(self.buy_or_sell) * self.transaction_fee).cumsum(
+            axis=0
+        )
+
+    def get_total_holdings(self, with_fee: bool = True) -> np.ndarray:
+        total_holdings = self.strategy_cum_returns * self.capital
+        total_holdings[0] = self.capital
+        if with_fee:
+            total_holdings -= self.commission_fee
+        return total_holdings
+
+    def get_strategy_cum_net_returns(self) -> np.ndarray:
+        total_holdings_after_fee = self.get_total_holdings()
+        return total_holdings_after_fee / total_holdings_after_fee[0]
+
+    def get_final_capital(self, with_fee: bool = True) -> pd.Series:
+        final_capital = self.strategy_cum_returns[-1] * self.capital
+        if with_fee:
+            final_capital = final_capital - self.commission_fee[-1]
+        return pd.Series(np.around(final_capital, 2), index=self.columns)
+
+    def get_final_cumulative_returns(self) -> pd.DataFrame:
+        total_holdings_after_fee = (
+            self.strategy_cum_returns[-1] * self.capital - self.commission_fee[-1]
+        )
+        initial_holdings_after_fee = self.capital - self.commission_fee[0]
+        return pd.DataFrame(
+            {
+                "Passive": self.cum_returns[-1] - 1,
+                "Strategy": self.strategy_cum_returns[-1] - 1,
+                "Strategy with Fee": (
+                    total_holdings_after_fee / initial_holdings_after_fee - 1
+                ),
+            },
+            index=self.columns,
+        )
+
+    def get_equity_curves(self, with_fee: bool = True) -> pd.DataFrame:
+        return pd.DataFrame(
+            self.get_total_holdings(with_fee),
+            index=self.dates,
+            columns=self.columns,
+        )
+
+    def get_portfolio(self, column) -> pd.DataFrame:
+        # The frame Portfolio.get_portfolio would build for a single column
+        i = self.columns.get_loc(column)
+        total_holdings = self.strategy_cum_returns[:, i] * self.capital
+        total_holdings[0] = self.capital
+        total_holdings_after_fee = total_holdings - self.commission_fee[:, i]
+        return pd.DataFrame(
+            {
+                "Date": self.dates,
+                "Adj Close": self.adj_close_price,
+                "buy_or_sell": self.buy_or_sell[:, i],
+                "trading_positions": self.trading_positions[:, i],
+                "log_returns": self.log_returns,
+                "cum_returns": self.cum_returns,
+                "strategy_log_returns": np.append(
+                    np.nan, self.trading_positions[:-1, i] * self.log_returns[1:]
+                ),
+                "strategy_cum_returns": self.strategy_cum_returns[:, i],
+                "total_holdings": total_holdings,
+                "commission_fee": self.commission_fee[:, i],
+                "total_holdings_after_fee": total_holdings_after_fee,
+                "strategy_cum_net_returns": (
+                    total_holdings_after_fee / total_holdings_after_fee[0]
+                ),
+            }
+        )
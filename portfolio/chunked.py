@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+from instrumentation import timed
+
+
+class ChunkedPortfolio:
+    PriceColumns = ["Adj Close", "buy_or_sell", "trading_positions"]
+
+    def __init__(self, symbol: str, capital: float = 1e6, transaction_fee: float = 0):
+        self.symbol = symbol
+        self.capital = capital
+        self.transaction_fee = transaction_fee
+
+        # What Portfolio would read from the rows of the previous chunks
+        self.n_rows = 0
+        self.last_adj_close = np.nan
+        self.last_trading_positions = np.nan
+        self.log_returns_sum = 0.0
+        self.strategy_log_returns_sum = 0.0
+        self.commission_fee = 0.0
+        self.initial_holdings_after_fee = np.nan
+        self.final_row = None
+
+    @timed()
+    def update(self, df_prices: pd.DataFrame) -> pd.DataFrame:
+        # The next rows of Portfolio.df_portfolio, bit for bit
+        df_portfolio = df_prices[self.PriceColumns].reset_index()
+        df_portfolio = df_portfolio[["Date", *self.PriceColumns]]
+        df_portfolio.index = pd.RangeIndex(self.n_rows, self.n_rows + len(df_portfolio))
+        if df_portfolio.empty:
+            return df_portfolio
+
+        adj_close_price = df_portfolio["Adj Close"].to_numpy(dtype=float)
+        trading_positions = df_portfolio["trading_positions"].to_numpy(dtype=float)
+        buy_or_sell = df_portfolio["buy_or_sell"].to_numpy(dtype=float)
+
+        log_returns = np.log(
+            adj_close_price / np.append(self.last_adj_close, adj_close_price[:-1])
+        )
+        strategy_log_returns = (
+            np.append(self.last_trading_positions, trading_positions[:-1]) * log_returns
+        )
+        log_returns_sum = self._cumsum(self.log_returns_sum, log_returns)
+        strategy_log_returns_sum = self._cumsum(
+            self.strategy_log_returns_sum, strategy_log_returns
+        )
+        commission_fee = self._cumsum(
+            self.commission_fee, np.abs(buy_or_sell) * self.transaction_fee
+        )
+
+        df_portfolio["log_returns"] = log_returns
+        df_portfolio["cum_returns"] = np.exp(log_returns_sum)
+        df_portfolio["strategy_log_returns"] = strategy_log_returns
+        df_portfolio["strategy_cum_returns"] = np.exp(strategy_log_returns_sum)
+        df_portfolio["total_holdings"] = (
+            df_portfolio["strategy_cum_returns"] * self.capital
+        )
+        if self.n_rows == 0:
+            df_portfolio.loc[0, "total_holdings"] = self.capital
+        df_portfolio["commission_fee"] = np.where(
+            np.isnan(buy_or_sell), np.nan, commission_fee
+        )
+        df_portfolio["total_holdings_after_fee"] = (
+            df_portfolio["total_holdings"] - df_portfolio["commission_fee"]
+        )
+        if self.n_rows == 0:
+            self.initial_holdings_after_fee = df_portfolio[
+                "total_holdings_after_fee"
+            ].iloc[0]
+        df_portfolio["strategy_cum_net_returns"] = (
+            df_portfolio["total_holdings_after_fee"] / self.initial_holdings_after_fee
+        )
+
+        self.n_rows += len(df_portfolio)
+        self.last_adj_close = adj_close_price[-1]
+        self.last_trading_positions = trading_positions[-1]
+        self.log_returns_sum = log_returns_sum[-1]
+        self.strategy_log_returns_sum = strategy_log_returns_sum[-1]
+        self.commission_fee = commission_fee[-1]
+        self.final_row = df_portfolio.iloc[-1]
+        return df_portfolio
+
+    def get_final_capital(self, with_fee=True) -> float:
+        col_name = "total_holdings_after_fee" if with_fee else "total_holdings"
+        return np.around(self.final_row[col_name], 2)
+
+    def get_final_cumulative_returns(self) -> pd.DataFrame:
+        final_row = self.final_row
+        cumret_dict = {
+            "Type": ["Passive", "Strategy", "Strategy with Fee"],
+            "Cum Ret": [
+                final_row["cum_returns"] - 1,
+                final_row["strategy_cum_returns"] - 1,
+                final_row["strategy_cum_net_returns"] - 1,
+            ],
+        }
+        return pd.DataFrame(cumret_dict)
+
+    @staticmethod
+    def _cumsum(carry: float, values: np.ndarray) -> np.ndarray:
+        # Summed on from the carried total in the same order as one cumsum,
+        # missing values count as zero like Portfolio's fillna(0)
+        return np.cumsum(np.append(carry, np.nan_to_num(values, nan=0.0)))[1:]
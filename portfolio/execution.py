@@ -0,0 +1,197 @@
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+
+from lib.indicators.helper import jit
+
+
+@jit
+def execution_kernel(
+    open_price: np.ndarray,
+    high_price: np.ndarray,
+    low_price: np.ndarray,
+    close_price: np.ndarray,
+    targets: np.ndarray,
+    is_next_open_fill: bool,
+    stop_loss: np.ndarray,
+    take_profit: np.ndarray,
+    limit_offset: np.ndarray,
+    capital: float,
+    transaction_fee: float,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    n_bars, n_strategies = targets.shape
+    equity = np.empty((n_bars, n_strategies))
+    positions = np.zeros((n_bars, n_strategies), dtype=np.int8)
+    n_trades = np.zeros(n_strategies, dtype=np.int64)
+
+    for j in range(n_strategies):
+        cash = capital
+        shares = 0.0
+        position = np.int8(0)
+        entry_price = np.nan
+        # Order placed at a close, to be filled on the next bar
+        pending = np.int8(0)
+        has_pending = False
+        limit_price = np.nan
+        # Direction closed out by a stop, not re-entered until the signal changes
+        stopped = np.int8(0)
+
+        for t in range(n_bars):
+            if has_pending:
+                has_pending = False
+                if position != 0 and pending != position:
+                    cash += shares * open_price[t] - transaction_fee
+                    shares = 0.0
+                    position = np.int8(0)
+                    n_trades[j] += 1
+
+                fill_price = np.nan
+                if pending != 0 and position == 0:
+                    if limit_price != limit_price:
+                        fill_price = open_price[t]
+                    elif pending > 0 and low_price[t] <= limit_price:
+                        fill_price = min(open_price[t], limit_price)
+                    elif pending < 0 and high_price[t] >= limit_price:
+                        fill_price = max(open_price[t], limit_price)
+                if fill_price == fill_price:
+                    shares = pending * cash / fill_price
+                    cash -= shares * fill_price + transaction_fee
+                    position = pending
+                    entry_price = fill_price
+                    n_trades[j] += 1
+
+            # Stops are checked before take-profits when both are hit in a bar
+            if position != 0:
+                exit_price = np.nan
+                stop_price = entry_price * (1 - position * stop_loss[j])
+                profit_price = entry_price * (1 + position * take_profit[j])
+                if position > 0:
+                    if low_price[t] <= stop_price:
+                        exit_price = min(open_price[t], stop_price)
+                    elif high_price[t] >= profit_price:
+                        exit_price = max(open_price[t], profit_price)
+                else:
+                    if high_price[t] >= stop_price:
+                        exit_price = max(open_price[t], stop_price)
+                    elif low_price[t] <= profit_price:
+                        exit_price = min(open_price[t], profit_price)
+                if exit_price == exit_price:
+                    cash += shares * exit_price - transaction_fee
+                    shares = 0.0
+                    stopped = position
+                    position = np.int8(0)
+                    n_trades[j] += 1
+
+            target = targets[t, j]
+            direction = np.int8(0)
+            if target > 0:
+                direction = np.int8(1)
+            elif target < 0:
+                direction = np.int8(-1)
+            if direction != stopped:
+                stopped = np.int8(0)
+            elif direction != 0:
+                direction = np.int8(0)
+
+            if direction != position:
+                if limit_offset[j] == limit_offset[j] and direction != 0:
+                    limit_price = close_price[t] * (1 - direction * limit_offset[j])
+                else:
+                    limit_price = np.nan
+                if is_next_open_fill or limit_price == limit_price:
+                    pending = direction
+                    has_pending = True
+                else:
+                    if position != 0:
+                        cash += shares * close_price[t] - transaction_fee
+                        shares = 0.0
+                        n_trades[j] += 1
+                    if direction != 0:
+                        shares = direction * cash / close_price[t]
+                        cash -= shares * close_price[t] + transaction_fee
+                        entry_price = close_price[t]
+                        n_trades[j] += 1
+                    position = direction
+
+            equity[t, j] = cash + shares * close_price[t]
+            positions[t, j] = position
+
+    return equity, positions, n_trades
+
+
+class ExecutionEngine:
+    PriceColumns = ["Adj Open", "Adj High", "Adj Low", "Adj Close"]
+
+    def __init__(
+        self,
+        price_data: pd.DataFrame,
+        trading_positions: pd.DataFrame | np.ndarray = None,
+        capital: float = 1e6,
+        transaction_fee: float = 0,
+        fill: Literal["close", "next_open"] = "close",
+        stop_loss: float | np.ndarray = None,
+        take_profit: float | np.ndarray = None,
+        limit_offset: float | np.ndarray = None,
+    ):
+        if trading_positions is None:
+            trading_positions = price_data[["trading_positions"]]
+        if isinstance(trading_positions, pd.DataFrame):
+            self.columns = trading_positions.columns
+        else:
+            trading_positions = np.asarray(trading_positions, dtype=float)
+            if trading_positions.ndim == 1:
+                trading_positions = trading_positions[:, np.newaxis]
+            self.columns = pd.RangeIndex(trading_positions.shape[1])
+
+        self.dates = price_data.index
+        if isinstance(self.dates, pd.MultiIndex):
+            self.dates = self.dates.get_level_values("Date")
+        self.prices = {
+            column: price_data[column].to_numpy(dtype=float)
+            for column in self.PriceColumns
+        }
+        self.trading_positions = np.ascontiguousarray(trading_positions, dtype=float)
+        self.capital = capital
+        self.transaction_fee = transaction_fee
+        self.fill = fill
+        # NaN switches a stop, take-profit or limit off
+        self.stop_loss = self._get_strategy_values(stop_loss, np.inf)
+        self.take_profit = self._get_strategy_values(take_profit, np.inf)
+        self.limit_offset = self._get_strategy_values(limit_offset, np.nan)
+
+        self.equity = None
+        self.positions = None
+        self.n_trades = None
+
+    def run(self) -> "ExecutionEngine":
+        self.equity, self.positions, self.n_trades = execution_kernel(
+            self.prices["Adj Open"],
+            self.prices["Adj High"],
+            self.prices["Adj Low"],
+            self.prices["Adj Close"],
+            self.trading_positions,
+            self.fill == "next_open",
+            self.stop_loss,
+            self.take_profit,
+            self.limit_offset,
+            float(self.capital),
+            float(self.transaction_fee),
+        )
+        return self
+
+    def get_equity_curves(self) -> pd.DataFrame:
+        return pd.DataFrame(self.equity, index=self.dates, columns=self.columns)
+
+    def get_positions(self) -> pd.DataFrame:
+        return pd.DataFrame(self.positions, index=self.dates, columns=self.columns)
+
+    def get_final_capital(self) -> pd.Series:
+        return pd.Series(np.around(self.equity[-1], 2), index=self.columns)
+
+    def get_n_trades(self) -> pd.Series:
+        return pd.Series(self.n_trades, index=self.columns)
+
+    def _get_strategy_values(self, values, default: float) -> np.ndarray:
+        values = np.full(len(self.columns), default if values is None else values)
+        return np.where(np.isnan(values), default, values).astype(float)
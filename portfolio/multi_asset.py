@@ -0,0 +1,185 @@
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+
+from lib.performance import PerformanceCustom
+
+
+class MultiAssetPortfolio:
+    def __init__(
+        self,
+        prices: pd.DataFrame | np.ndarray,
+        positions: pd.DataFrame | np.ndarray,
+        capital: float = 1e6,
+        transaction_fee: float = 0,
+        fee_rate: float = 0,
+        mode: Literal["shares", "weights"] = "weights",
+        num_shares: float | np.ndarray = 100,
+        rebalance: Literal["every_bar", "on_change"] = "on_change",
+        name: str = "Portfolio",
+    ):
+        if not isinstance(prices, pd.DataFrame):
+            prices = pd.DataFrame(prices)
+        if not isinstance(positions, pd.DataFrame):
+            positions = pd.DataFrame(
+                positions, index=prices.index, columns=prices.columns
+            )
+        self.prices = prices.ffill().bfill()
+        self.positions = positions.reindex(
+            index=prices.index, columns=prices.columns
+        ).fillna(0)
+        self.capital = capital
+        self.transaction_fee = transaction_fee
+        self.fee_rate = fee_rate
+        self.mode = mode
+        self.num_shares = num_shares
+        self.rebalance = rebalance
+        self.name = name
+
+        self.df_portfolio, self.df_holdings, self.df_shares = self.compute_portfolio()
+
+    @classmethod
+    def from_price_frames(
+        cls,
+        frames: dict[str, pd.DataFrame],
+        mode: Literal["shares", "weights"] = "weights",
+        **portfolio_params,
+    ) -> "MultiAssetPortfolio":
+        # frames are indicator outputs indexed by (Tickers, Date)
+        prices = pd.DataFrame(
+            {
+                symbol: df["Adj Close"].droplevel("Tickers")
+                for symbol, df in frames.items()
+            }
+        )
+        positions = pd.DataFrame(
+            {
+                symbol: df["trading_positions"].droplevel("Tickers")
+                for symbol, df in frames.items()
+            }
+        )
+        if mode == "weights":
+            # Equal-weight book: each name gets 1/n of equity when positioned
+            positions = positions / len(frames)
+        return cls(prices, positions, mode=mode, **portfolio_params)
+
+    def get_portfolio(self) -> pd.DataFrame:
+        return self.df_portfolio
+
+    def get_holdings(self) -> pd.DataFrame:
+        return self.df_holdings
+
+    def get_shares(self) -> pd.DataFrame:
+        return self.df_shares
+
+    def get_final_capital(self, with_fee=True) -> float:
+        col_name = "total_holdings_after_fee" if with_fee else "total_holdings"
+        return np.around(self.df_portfolio[col_name].iloc[-1], 2)
+
+    def get_performance(self) -> PerformanceCustom:
+        df = self.df_portfolio[["strategy_cum_net_returns"]].reset_index()
+        df.columns = ["Date", "Cumulative Returns"]
+        return PerformanceCustom(df, self.name)
+
+    def compute_portfolio(self) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        prices = self.prices.to_numpy(dtype=float)
+        positions = self.positions.to_numpy(dtype=float)
+        if self.mode == "shares":
+            result = self._compute_shares(prices, positions)
+        else:
+            result = self._compute_weights(prices, positions)
+        cash, holdings, total_holdings, total_holdings_after_fee, commission_fee = (
+            result
+        )
+        df_portfolio = pd.DataFrame(
+            {
+                "cash": cash,
+                "holdings": holdings.sum(axis=1),
+                "total_holdings": total_holdings,
+                "commission_fee": commission_fee,
+                "total_holdings_after_fee": total_holdings_after_fee,
+                "strategy_cum_returns": total_holdings / self.capital,
+                "strategy_cum_net_returns": (
+                    total_holdings_after_fee / total_holdings_after_fee[0]
+                ),
+            },
+            index=self.prices.index,
+        )
+        df_holdings = pd.DataFrame(
+            holdings, index=self.prices.index, columns=self.prices.columns
+        )
+        df_shares = pd.DataFrame(
+            holdings / prices, index=self.prices.index, columns=self.prices.columns
+        )
+        return df_portfolio, df_holdings, df_shares
+
+    def _compute_shares(
+        self, prices: np.ndarray, positions: np.ndarray
+    ) -> tuple[np.ndarray, ...]:
+        # positions[t] are held from the close of t, traded at that close
+        shares = positions * np.asarray(self.num_shares, dtype=float)
+        trades = np.diff(shares, axis=0, prepend=0)
+        notional = trades * prices
+
+        fees = self.transaction_fee * np.count_nonzero(trades, axis=1)
+        fees = fees + self.fee_rate * np.abs(notional).sum(axis=1)
+        commission_fee = fees.cumsum()
+
+        holdings = shares * prices
+        cash = self.capital - notional.sum(axis=1).cumsum()
+        total_holdings = cash + holdings.sum(axis=1)
+        return (
+            cash - commission_fee,
+            holdings,
+            total_holdings,
+            total_holdings - commission_fee,
+            commission_fee,
+        )
+
+    def _compute_weights(
+        self, prices: np.ndarray, weights: np.ndarray
+    ) -> tuple[np.ndarray, ...]:
+        is_rebalance = np.ones(len(weights), dtype=bool)
+        if self.rebalance == "on_change":
+            is_rebalance[1:] = (weights[1:] != weights[:-1]).any(axis=1)
+        is_rebalance[0] = True
+        rebalance_rows = np.flatnonzero(is_rebalance)
+        segments = np.cumsum(is_rebalance) - 1
+        last_rows = rebalance_rows[segments]
+
+        # Between rebalances shares are held, so equity grows with the
+        # weighted price relatives since the last rebalance
+        segment_weights = weights[last_rows]
+        relatives = prices / prices[last_rows]
+        growth = (segment_weights * relatives).sum(axis=1)
+        growth += 1 - segment_weights.sum(axis=1)
+
+        # Growth and drifted weights of each segment up to the next rebalance
+        previous, current = rebalance_rows[:-1], rebalance_rows[1:]
+        segment_relatives = prices[current] / prices[previous]
+        drifted = weights[previous] * segment_relatives
+        segment_growth = np.ones(len(rebalance_rows))
+        segment_growth[1:] = drifted.sum(axis=1) + 1 - weights[previous].sum(axis=1)
+        drifted_weights = np.zeros((len(rebalance_rows), weights.shape[1]))
+        drifted_weights[1:] = drifted / segment_growth[1:, None]
+
+        traded = np.abs(weights[rebalance_rows] - drifted_weights)
+        turnover = traded.sum(axis=1)
+        flat_fees = self.transaction_fee * np.count_nonzero(traded > 1e-12, axis=1)
+
+        # Fees are charged on the turnover at pre-rebalance equity and the
+        # target weights apply to what is left: E[k] = a[k] * E[k - 1] - b[k]
+        scale = segment_growth * (1 - self.fee_rate * turnover)
+        cum_scale = np.cumprod(scale)
+        equity = cum_scale * (self.capital - np.cumsum(flat_fees / cum_scale))
+        pre_rebalance_equity = segment_growth * np.append(self.capital, equity[:-1])
+        fees = self.fee_rate * turnover * pre_rebalance_equity + flat_fees
+
+        total_holdings_after_fee = equity[segments] * growth
+        total_holdings = self.capital * np.cumprod(segment_growth)[segments] * growth
+        holdings = equity[segments, None] * segment_weights * relatives
+        cash = total_holdings_after_fee - holdings.sum(axis=1)
+        # Fees paid so far; their compounded cost shows in the after-fee equity
+        commission_fee = np.cumsum(fees)[segments]
+        return cash, holdings, total_holdings, total_holdings_after_fee, commission_fee
@@ -0,0 +1,312 @@
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Callable, Iterable, Literal
+
+import pandas as pd
+from data import DataProvider, PriceCache
+from indicators import FeatureStore
+from instrumentation import Profiler, stage
+from performance import ChunkedPerformance
+from portfolio import ChunkedPortfolio, Portfolio, PortfolioUpdated
+from signals import Signals
+
+
+def run_backtest_for(
+    symbol: str,
+    sd: datetime,
+    ed: datetime,
+    indicator: str,
+    indicator_params: dict,
+    lookback: int,
+    position_type: Literal["long", "short", "long_short"],
+    portfolio: Literal["Portfolio", "PortfolioUpdated"],
+    portfolio_params: dict,
+    keep_portfolio: bool,
+    provider: DataProvider = None,
+    price_cache: PriceCache = None,
+    feature_store: FeatureStore = None,
+    profile: bool = False,
+    compact: bool = False,
+) -> dict:
+    if profile:
+        with Profiler() as profiler:
+            result = run_backtest_for(
+                symbol,
+                sd,
+                ed,
+                indicator,
+                indicator_params,
+                lookback,
+                position_type,
+                portfolio,
+                portfolio_params,
+                keep_portfolio,
+                provider=provider,
+                price_cache=price_cache,
+                feature_store=feature_store,
+                compact=compact,
+            )
+        result["profile"] = profiler.get_report()
+        return result
+
+    signals = Signals(
+        symbol,
+        sd,
+        ed,
+        lookback=lookback,
+        position_type=position_type,
+        provider=provider,
+        price_cache=price_cache,
+        feature_store=feature_store,
+        compact=compact,
+    )
+    df_prices = signals.run_indicator_for(indicator, **indicator_params).get_price_data(
+        compact=compact
+    )
+    with stage(f"portfolio:{portfolio}"):
+        df_portfolio = BacktestRunner.PortfolioMap[portfolio](
+            df_prices, compact=compact, **portfolio_params
+        )
+    final_cum_returns = df_portfolio.get_final_cumulative_returns()["Cum Ret"].values
+    with stage("performance"):
+        performance = df_portfolio.get_performance()
+        sharpe_ratio = performance.compute_sharpe_ratio()
+        cagr = performance.compute_cagr()
+
+    result = {
+        "symbol": symbol,
+        "final_capital": df_portfolio.get_final_capital(with_fee=False),
+        "final_capital_after_fee": df_portfolio.get_final_capital(with_fee=True),
+        "passive_cum_returns": final_cum_returns[0],
+        "strategy_cum_returns": final_cum_returns[1],
+        "strategy_cum_net_returns": final_cum_returns[2],
+        "sharpe_ratio": sharpe_ratio,
+        "cagr": cagr,
+    }
+    if keep_portfolio:
+        result["portfolio"] = df_portfolio.get_portfolio()
+    return result
+
+
+def run_chunked_backtest_for(
+    symbol: str,
+    chunks: Iterable[pd.DataFrame],
+    sd: datetime,
+    indicator: str,
+    indicator_params: dict = None,
+    position_type: Literal["long", "short", "long_short"] = "long_short",
+    portfolio_params: dict = None,
+    portfolio_path: str = None,
+) -> dict:
+    # Chunks hold consecutive bars of one symbol, e.g. from iter_parquet_chunks.
+    # Only the streaming state, the running portfolio totals and the drawdown
+    # watermark are carried over, so memory is bounded by the chunk size
+    writer = None
+    streaming_indicator = None
+    chunked_portfolio = ChunkedPortfolio(symbol, **(portfolio_params or {}))
+    performance = ChunkedPerformance(symbol)
+    last_row = None
+    try:
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            # Missing values are forward filled across chunks, as Signals does
+            chunk = chunk.ffill()
+            if last_row is not None:
+                chunk = chunk.fillna(last_row)
+            last_row = chunk.iloc[-1]
+
+            if streaming_indicator is None:
+                streaming_indicator = Signals.IndicatorMap[indicator](
+                    symbol,
+                    chunk.iloc[:0],
+                    start_date=sd,
+                    position_type=position_type,
+                    **(indicator_params or {}),
+                )
+            with stage(f"indicator:{indicator}"):
+                df_indicator = streaming_indicator.update_chunk(chunk)
+
+            dates = chunk.index.get_level_values("Date")
+            is_after_start_date = dates >= sd
+            df_prices = df_indicator.loc[is_after_start_date]
+            df_prices.insert(
+                0, "Adj Close", chunk["Adj Close"].loc[is_after_start_date]
+            )
+            df_prices.index = pd.Index(dates[is_after_start_date], name="Date")
+
+            with stage("portfolio:Portfolio"):
+                df_portfolio = chunked_portfolio.update(df_prices)
+            if df_portfolio.empty:
+                continue
+            with stage("performance"):
+                performance.update(
+                    df_portfolio.set_index("Date")["strategy_cum_net_returns"]
+                )
+            if portfolio_path is not None:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(df_portfolio, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(portfolio_path, table.schema)
+                writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    final_cum_returns = chunked_portfolio.get_final_cumulative_returns()[
+        "Cum Ret"
+    ].values
+    return {
+        "symbol": symbol,
+        "final_capital": chunked_portfolio.get_final_capital(with_fee=False),
+        "final_capital_after_fee": chunked_portfolio.get_final_capital(with_fee=True),
+        "passive_cum_returns": final_cum_returns[0],
+        "strategy_cum_returns": final_cum_returns[1],
+        "strategy_cum_net_returns": final_cum_returns[2],
+        "sharpe_ratio": performance.compute_sharpe_ratio(),
+        "cagr": performance.compute_cagr(),
+        "max_drawdown": performance.compute_max_dd(),
+    }
+
+
+def _run_backtest_safely(symbol: str, **kwargs) -> tuple[str, dict | None, str | None]:
+    try:
+        return symbol, run_backtest_for(symbol, **kwargs), None
+    except Exception:
+        return symbol, None, traceback.format_exc()
+
+
+class BacktestRunner:
+    PortfolioMap = {
+        "Portfolio": Portfolio,
+        "PortfolioUpdated": PortfolioUpdated,
+    }
+    ResultColumns = [
+        "symbol",
+        "final_capital",
+        "final_capital_after_fee",
+        "passive_cum_returns",
+        "strategy_cum_returns",
+        "strategy_cum_net_returns",
+        "sharpe_ratio",
+        "cagr",
+    ]
+
+    def __init__(
+        self,
+        symbols: list[str],
+        sd: datetime,
+        ed: datetime,
+        indicator: Literal[
+            "MACD",
+            "MA_crossover",
+            "SMA_mean_reversion",
+            "Lag",
+            "Simple_momentum",
+            "RSI",
+        ],
+        indicator_params: dict = None,
+        lookback: int = 0,
+        position_type: Literal["long", "short", "long_short"] = "long_short",
+        portfolio: Literal["Portfolio", "PortfolioUpdated"] = "Portfolio",
+        portfolio_params: dict = None,
+        max_workers: int = None,
+        keep_portfolio: bool = False,
+        provider: DataProvider = None,
+        price_cache: PriceCache = None,
+        feature_store: FeatureStore = None,
+        profile: bool = False,
+        compact: bool = False,
+        progress: Callable[[int, int, str, bool], None] = None,
+    ):
+        self.symbols = list(dict.fromkeys(symbols))
+        self.sd = sd
+        self.ed = ed
+        self.indicator = indicator
+        self.indicator_params = indicator_params or {}
+        self.lookback = lookback
+        self.position_type = position_type
+        self.portfolio = portfolio
+        self.portfolio_params = portfolio_params or {}
+        self.max_workers = max_workers or os.cpu_count()
+        self.keep_portfolio = keep_portfolio
+        self.provider = provider
+        self.price_cache = price_cache
+        self.feature_store = feature_store
+        self.profile = profile
+        self.compact = compact
+        self.progress = progress
+        self.results = {}
+        self.errors = {}
+        self.profiler = Profiler()
+
+    def run(self) -> pd.DataFrame:
+        self.results, self.errors = {}, {}
+        self.profiler = Profiler()
+        backtest_params = {
+            "sd": self.sd,
+            "ed": self.ed,
+            "indicator": self.indicator,
+            "indicator_params": self.indicator_params,
+            "lookback": self.lookback,
+            "position_type": self.position_type,
+            "portfolio": self.portfolio,
+            "portfolio_params": self.portfolio_params,
+            "keep_portfolio": self.keep_portfolio,
+            "provider": self.provider,
+            "price_cache": self.price_cache,
+            "feature_store": self.feature_store,
+            "profile": self.profile,
+            "compact": self.compact,
+        }
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(_run_backtest_safely, symbol, **backtest_params): symbol
+                for symbol in self.symbols
+            }
+            for n_done, future in enumerate(as_completed(futures), start=1):
+                try:
+                    symbol, result, error = future.result()
+                except Exception:
+                    symbol, result, error = (
+                        futures[future],
+                        None,
+                        traceback.format_exc(),
+                    )
+
+                if error is None:
+                    self.results[symbol] = result
+                    self.profiler.merge(result.pop("profile", {}))
+                else:
+                    self.errors[symbol] = error
+
+                if self.progress is not None:
+                    self.progress(n_done, len(self.symbols), symbol, error is None)
+
+        return self.get_results()
+
+    def get_results(self) -> pd.DataFrame:
+        rows = [
+            {
+                key: value
+                for key, value in self.results[symbol].items()
+                if key != "portfolio"
+            }
+            for symbol in self.symbols
+            if symbol in self.results
+        ]
+        return pd.DataFrame(rows, columns=self.ResultColumns).set_index("symbol")
+
+    def get_portfolio_for(self, symbol: str) -> pd.DataFrame:
+        return self.results.get(symbol, {}).get("portfolio", None)
+
+    def get_errors(self) -> dict[str, str]:
+        return self.errors
+
+    def get_profile(self) -> pd.DataFrame:
+        return self.profiler.to_frame()
@@ -2,14 +2,21 @@ from datetime import datetime, timedelta
 from typing import Literal
 
 import pandas as pd
+from data import DataProvider, PriceCache
+from instrumentation import stage
 from indicators import (
+    FeatureStore,
     Indicator_Lag,
     Indicator_MA_Crossover,
     Indicator_MACD,
     Indicator_RSI,
     Indicator_Simple_Momentum,
     Indicator_SMA_Mean_Reversion,
+    IndicatorCache,
+    IndicatorSweep,
+    get_data_fingerprint,
 )
+from indicators.helper import compact_frame
 from utils import get_data
 
 
@@ -30,25 +37,54 @@ class Signals:
         ed: datetime,
         lookback: int = 0,
         position_type: Literal["long", "short", "long_short"] = "long_short",
+        provider: DataProvider = None,
+        price_cache: PriceCache = None,
+        indicator_cache: IndicatorCache = None,
+        feature_store: FeatureStore = None,
+        compact: bool = False,
     ):
         self.symbol = symbol
         self.sd = sd
         self.ed = ed
         self.lookback = lookback
+        self.provider = provider
+        self.price_cache = price_cache
+        self.indicator_cache = (
+            IndicatorCache() if indicator_cache is None else indicator_cache
+        )
+        self.feature_store = feature_store
+        self.compact = compact
         self.data = self.get_data()
+        self._data_fingerprint = None
         self.data_with_indicator = {}
         self.position_type = position_type
 
+    @property
+    def data_fingerprint(self) -> str:
+        # Hashing the whole frame is only paid once a cache key needs it
+        if self._data_fingerprint is None:
+            self._data_fingerprint = get_data_fingerprint(self.data)
+        return self._data_fingerprint
+
     def get_data(self) -> pd.DataFrame:
-        all_data = get_data(
-            [self.symbol], self.sd - timedelta(days=self.lookback), self.ed
-        )
-        all_data = all_data.ffill().bfill()
+        with stage("get_data"):
+            all_data = get_data(
+                [self.symbol],
+                self.sd - timedelta(days=self.lookback),
+                self.ed,
+                provider=self.provider,
+                cache=self.price_cache,
+            )
+            # Filling copies the frame, memory-mapped bars without gaps skip it
+            if all_data.isna().any(axis=None):
+                all_data = all_data.ffill().bfill()
 
-        all_data["Adj Ratio"] = all_data["Adj Close"] / all_data["Close"]
-        all_data[["Adj Open", "Adj High", "Adj Low"]] = all_data[
-            ["Open", "High", "Low"]
-        ].multiply(all_data["Adj Ratio"], axis="index")
+            all_data["Adj Ratio"] = all_data["Adj Close"] / all_data["Close"]
+            all_data[["Adj Open", "Adj High", "Adj Low"]] = all_data[
+                ["Open", "High", "Low"]
+            ].multiply(all_data["Adj Ratio"], axis="index")
+            if self.compact:
+                all_data = compact_frame(all_data)
 
         return all_data
 
@@ -62,18 +98,88 @@ class Signals:
             "Simple_momentum",
             "RSI",
         ],
-        **indicator_params
+        **indicator_params,
     ) -> pd.DataFrame:
-        indicator = self.IndicatorMap[indicator](
+        indicator_cls = self.IndicatorMap[indicator]
+        key = self.indicator_cache.make_key(
+            self.symbol,
+            indicator,
+            {**indicator_cls.get_default_params(), **indicator_params},
+            self.sd,
+            self.position_type,
+            self.data_fingerprint,
+        )
+        result = self.indicator_cache.get(key)
+        if result is None:
+            with stage(f"indicator:{indicator}"):
+                result = self._run_indicator(indicator_cls, **indicator_params)
+            self.indicator_cache.put(key, result, result.output.get_nbytes())
+        self.data_with_indicator[indicator] = result
+        return result
+
+    def _run_indicator(self, indicator_cls: type, **indicator_params):
+        if self.feature_store is not None:
+            # The store keeps full precision, only the returned copy is compacted
+            result = self.feature_store.run_indicator(
+                indicator_cls,
+                self.symbol,
+                self.data,
+                self.sd,
+                self.position_type,
+                **indicator_params,
+            )
+        else:
+            result = indicator_cls(
+                self.symbol,
+                self.data,
+                **indicator_params,
+                start_date=self.sd,
+                position_type=self.position_type,
+            )
+            result.run()
+        if self.compact:
+            result.output.compact()
+        return result
+
+    def run_sweep_for(
+        self,
+        indicator: Literal[
+            "MACD",
+            "MA_crossover",
+            "SMA_mean_reversion",
+            "Lag",
+            "Simple_momentum",
+            "RSI",
+        ],
+        **param_grid,
+    ) -> IndicatorSweep:
+        param_grid = {
+            name: values if isinstance(values, (list, tuple, range)) else [values]
+            for name, values in param_grid.items()
+        }
+        key = self.indicator_cache.make_key(
             self.symbol,
-            self.data,
-            **indicator_params,
-            start_date=self.sd,
-            position_type=self.position_type
+            indicator,
+            param_grid,
+            self.sd,
+            self.position_type,
+            self.data_fingerprint,
+            kind="sweep",
         )
-        indicator.run()
-        self.data_with_indicator[indicator] = indicator
-        return self.data_with_indicator[indicator]
+        sweep = self.indicator_cache.get(key)
+        if sweep is None:
+            sweep = IndicatorSweep(
+                self.IndicatorMap[indicator],
+                self.symbol,
+                self.data,
+                self.sd,
+                param_grid,
+                position_type=self.position_type,
+            )
+            with stage(f"sweep:{indicator}"):
+                sweep.run()
+            self.indicator_cache.put(key, sweep, sweep.get_nbytes())
+        return sweep
 
     def get_indicator_for(
         self,
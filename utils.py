@@ -1,10 +1,13 @@
 import pandas as pd
-import yfinance as yf
+from data import DataProvider, PriceCache, YFinanceProvider
 
 
-def get_data(stocks, start, end):
-    def data(stock):
-        return yf.download(stock, start=start, end=end)
-
-    stocks_map = map(data, stocks)
-    return pd.concat(stocks_map, keys=stocks, names=["Tickers", "Date"])
+def get_data(
+    stocks,
+    start,
+    end,
+    provider: DataProvider = None,
+    cache: PriceCache = None,
+) -> pd.DataFrame:
+    provider = provider or YFinanceProvider()
+    return provider.get_data(stocks, start, end, cache=cache)
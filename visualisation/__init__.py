@@ -3,17 +3,25 @@ from .base import (
     plot_lag,
     plot_ma_crossover_buy_sell,
     plot_macd_buy_sell,
+    plot_portfolio_returns,
+    plot_portfolio_value,
     plot_rsi_buy_sell,
     plot_simple_momentum,
     plot_sma_mean_reversion_buy_sell,
 )
+from .render import ChartRenderer, compute_lttb_indices, downsample
 
 __all__ = [
     "plot_buy_sell",
     "plot_lag",
     "plot_ma_crossover_buy_sell",
     "plot_macd_buy_sell",
+    "plot_portfolio_returns",
+    "plot_portfolio_value",
     "plot_rsi_buy_sell",
     "plot_simple_momentum",
     "plot_sma_mean_reversion_buy_sell",
+    "ChartRenderer",
+    "compute_lttb_indices",
+    "downsample",
 ]
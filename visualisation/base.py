@@ -1,5 +1,14 @@
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
+from matplotlib.ticker import PercentFormatter
+
+
+def _get_line(df_prices: pd.DataFrame, column: str):
+    # Compact frames keep constant lines as metadata instead of columns
+    if column in df_prices:
+        return df_prices[column]
+    return np.full(len(df_prices), df_prices.attrs[column])
 
 
 def plot_buy_sell(symbol, df_prices: pd.DataFrame):
@@ -107,12 +116,17 @@ def plot_sma_mean_reversion_buy_sell(symbol, df_prices: pd.DataFrame):
     sub.axhline(0, color="k", linestyle="--")
     sub.plot(
         df_prices["Date"],
-        df_prices["Upper_Threshold"],
+        _get_line(df_prices, "Upper_Threshold"),
         color="g",
         linestyle="--",
         label="Threshold",
     )
-    sub.plot(df_prices["Date"], df_prices["Lower_Threshold"], color="g", linestyle="--")
+    sub.plot(
+        df_prices["Date"],
+        _get_line(df_prices, "Lower_Threshold"),
+        color="g",
+        linestyle="--",
+    )
     sub.plot(
         df_prices["Date"],
         df_prices["SMA_Price_Diff"],
@@ -180,9 +194,155 @@ def plot_rsi_buy_sell(
     sub.set_xlim(df_prices["Date"].min(), df_prices["Date"].max())
     sub.plot(df_prices["Date"], df_prices["RSI"], linewidth=0.75, label="RSI")
     sub.plot(
-        df_prices["Date"], df_prices["RSI_lower_threshold"], color="g", linestyle="--"
+        df_prices["Date"],
+        _get_line(df_prices, "RSI_lower_threshold"),
+        color="g",
+        linestyle="--",
+    )
+    sub.plot(
+        df_prices["Date"],
+        _get_line(df_prices, "RSI_upper_threshold"),
+        color="r",
+        linestyle="--",
+    )
+    sub.legend()
+
+
+def plot_portfolio_returns(symbol, df_portfolio: pd.DataFrame, with_fee: bool = True):
+    df_portfolio = df_portfolio.reset_index()
+    fig = plt.figure(figsize=[14, 10])
+
+    sub = fig.add_subplot(5, 1, (1, 2), xlabel="Date", ylabel=f"Adj Close")
+    sub.set_title(symbol)
+    sub.set_xlim(df_portfolio["Date"].min(), df_portfolio["Date"].max())
+    sub.plot(
+        df_portfolio["Date"],
+        df_portfolio["Adj Close"],
+        color="grey",
+        linewidth=0.75,
+        label="Adj Close Price",
+    )
+    # BUY signal
+    buy_index = df_portfolio.buy_or_sell == 1.0
+    sub.plot(
+        df_portfolio.loc[buy_index]["Date"],
+        df_portfolio[buy_index]["Adj Close"],
+        "^",
+        color="green",
+        markersize=4,
+        label="Buy",
     )
+
+    # SELL signal
+    sell_index = df_portfolio.buy_or_sell == -1.0
     sub.plot(
-        df_prices["Date"], df_prices["RSI_upper_threshold"], color="r", linestyle="--"
+        df_portfolio.loc[sell_index]["Date"],
+        df_portfolio[sell_index]["Adj Close"],
+        "v",
+        color="red",
+        markersize=4,
+        label="Sell",
     )
     sub.legend()
+
+    sub = fig.add_subplot(5, 1, (3, 4), xlabel="Date", ylabel=f"Cumulative Returns")
+    sub.set_xlim(df_portfolio["Date"].min(), df_portfolio["Date"].max())
+    sub.plot(
+        df_portfolio["Date"],
+        df_portfolio["cum_returns"] - 1,
+        color="grey",
+        linewidth=0.75,
+        label="Passive",
+    )
+
+    strat_cum_ret = (
+        df_portfolio["strategy_cum_net_returns"]
+        if with_fee
+        else df_portfolio["strategy_cum_returns"]
+    )
+    strat_label = "Strategy Return with Fee" if with_fee else "Strategy Return"
+    sub.plot(
+        df_portfolio["Date"],
+        strat_cum_ret - 1,
+        color="blue",
+        linewidth=0.75,
+        label=strat_label,
+    )
+    sub.yaxis.set_major_formatter(PercentFormatter(1.0, decimals=1))
+    sub.legend()
+
+    sub = fig.add_subplot(5, 1, 5, xlabel="Date", ylabel=f"Positions")
+    sub.set_xlim(df_portfolio["Date"].min(), df_portfolio["Date"].max())
+    sub.plot(
+        df_portfolio["Date"],
+        df_portfolio["trading_positions"],
+        color="blue",
+        linewidth=0.75,
+    )
+
+
+def plot_portfolio_value(symbol, df_portfolio: pd.DataFrame, with_fee: bool = True):
+    df_portfolio = df_portfolio.reset_index()
+    fig = plt.figure(figsize=[14, 10])
+
+    sub = fig.add_subplot(5, 1, (1, 2), xlabel="Date", ylabel=f"Adj Close")
+    sub.set_title(symbol)
+    sub.set_xlim(df_portfolio["Date"].min(), df_portfolio["Date"].max())
+    sub.plot(
+        df_portfolio["Date"],
+        df_portfolio["Adj Close"],
+        color="grey",
+        linewidth=0.75,
+        label="Adj Close Price",
+    )
+    # BUY signal
+    buy_index = df_portfolio.buy_or_sell == 1.0
+    sub.plot(
+        df_portfolio.loc[buy_index]["Date"],
+        df_portfolio[buy_index]["Adj Close"],
+        "^",
+        color="green",
+        markersize=4,
+        label="Buy",
+    )
+
+    # SELL signal
+    sell_index = df_portfolio.buy_or_sell == -1.0
+    sub.plot(
+        df_portfolio.loc[sell_index]["Date"],
+        df_portfolio[sell_index]["Adj Close"],
+        "v",
+        color="red",
+        markersize=4,
+        label="Sell",
+    )
+    sub.legend()
+
+    sub = fig.add_subplot(
+        5, 1, (3, 4), xlabel="Date", ylabel=f"Value of Portfolio (USD)"
+    )
+    sub.set_xlim(df_portfolio["Date"].min(), df_portfolio["Date"].max())
+
+    strat_total_values = (
+        df_portfolio["total_holdings_after_fee"]
+        if with_fee
+        else df_portfolio["total_holdings"]
+    )
+    strat_label = "Strategy Value with Fee" if with_fee else "Strategy Value"
+    sub.plot(
+        df_portfolio["Date"],
+        strat_total_values,
+        color="blue",
+        linewidth=0.75,
+        label=strat_label,
+    )
+    sub.legend()
+
+    sub = fig.add_subplot(5, 1, 5, xlabel="Date", ylabel=f"Positions")
+    sub.set_xlim(df_portfolio["Date"].min(), df_portfolio["Date"].max())
+    sub.plot(
+        df_portfolio["Date"],
+        df_portfolio["trading_positions"],
+        color="blue",
+        linewidth=0.75,
+    )
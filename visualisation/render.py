@@ -0,0 +1,243 @@
+import multiprocessing
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Literal
+
+import numpy as np
+import pandas as pd
+
+from lib.indicators.helper import jit
+
+from . import base
+
+# Plot function and the line columns whose shape must survive downsampling
+PlotKinds = {
+    "buy_sell": ("plot_buy_sell", ["Adj Close"]),
+    "macd": ("plot_macd_buy_sell", ["Adj Close", "MACD", "MACD Signal Line"]),
+    "ma_crossover": (
+        "plot_ma_crossover_buy_sell",
+        ["Adj Close", "SMA_short", "SMA_long"],
+    ),
+    "sma_mean_reversion": (
+        "plot_sma_mean_reversion_buy_sell",
+        ["Adj Close", "SMA", "SMA_Price_Diff", "Upper_Threshold", "Lower_Threshold"],
+    ),
+    "lag": ("plot_lag", ["Adj Close"]),
+    "simple_momentum": ("plot_simple_momentum", ["Adj Close"]),
+    "rsi": (
+        "plot_rsi_buy_sell",
+        ["Adj Close", "RSI", "RSI_lower_threshold", "RSI_upper_threshold"],
+    ),
+    "portfolio_returns": (
+        "plot_portfolio_returns",
+        [
+            "Adj Close",
+            "cum_returns",
+            "strategy_cum_returns",
+            "strategy_cum_net_returns",
+        ],
+    ),
+    "portfolio_value": (
+        "plot_portfolio_value",
+        ["Adj Close", "total_holdings", "total_holdings_after_fee"],
+    ),
+}
+
+IndicatorKinds = {
+    "Indicator_MACD": "macd",
+    "Indicator_MA_Crossover": "ma_crossover",
+    "Indicator_SMA_Mean_Reversion": "sma_mean_reversion",
+    "Indicator_Lag": "lag",
+    "Indicator_Simple_Momentum": "simple_momentum",
+    "Indicator_RSI": "rsi",
+    "IndicatorsCombined": "buy_sell",
+}
+
+PortfolioKinds = {
+    "Portfolio": "portfolio_returns",
+    "PortfolioUpdated": "portfolio_value",
+}
+
+
+@jit
+def lttb_kernel(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    n = len(x)
+    sampled = np.empty(n_out, dtype=np.int64)
+    sampled[0] = 0
+    sampled[n_out - 1] = n - 1
+    every = (n - 2) / (n_out - 2)
+    a = 0
+
+    for i in range(n_out - 2):
+        # Average of the next bucket, the third point of the triangles
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        avg_x = 0.0
+        avg_y = 0.0
+        for k in range(avg_start, avg_end):
+            avg_x += x[k]
+            avg_y += y[k]
+        avg_x /= avg_end - avg_start
+        avg_y /= avg_end - avg_start
+
+        # Keep the point of this bucket spanning the largest triangle
+        max_area = -1.0
+        next_a = a
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > max_area:
+                max_area = area
+                next_a = j
+        sampled[i + 1] = next_a
+        a = next_a
+
+    return sampled
+
+
+def compute_lttb_indices(y: np.ndarray, n_out: int, x: np.ndarray = None) -> np.ndarray:
+    y = np.asarray(y, dtype=float)
+    x = np.arange(len(y), dtype=float) if x is None else np.asarray(x, dtype=float)
+    valid = np.flatnonzero(np.isfinite(y))
+    if len(valid) <= max(n_out, 2):
+        return valid
+    return valid[lttb_kernel(x[valid], y[valid], max(n_out, 3))]
+
+
+def downsample(
+    df: pd.DataFrame,
+    max_points: int = 2000,
+    columns: list[str] = None,
+    marker_columns: tuple[str, ...] = ("buy_or_sell",),
+    step_columns: tuple[str, ...] = ("trading_positions",),
+) -> pd.DataFrame:
+    n = len(df)
+    if n <= max_points:
+        return df
+
+    if columns is None:
+        columns = df.select_dtypes("number").columns.difference(
+            [*marker_columns, *step_columns]
+        )
+    indices = [np.array([0, n - 1])]
+    for column in columns:
+        if column not in df:
+            continue
+        values = df[column].to_numpy(dtype=float)
+        # Flat lines only need their end points
+        if np.nanmin(values, initial=np.inf) != np.nanmax(values, initial=-np.inf):
+            indices.append(compute_lttb_indices(values, max_points))
+
+    # Markers are kept exactly, and both sides of every step of a position
+    for column in marker_columns:
+        if column in df:
+            values = df[column].to_numpy(dtype=float)
+            indices.append(np.flatnonzero(np.nan_to_num(values) != 0))
+    for column in step_columns:
+        if column in df:
+            values = df[column].to_numpy(dtype=float)
+            is_changed = (values[1:] != values[:-1]) & ~(
+                np.isnan(values[1:]) & np.isnan(values[:-1])
+            )
+            changes = np.flatnonzero(is_changed)
+            indices += [changes, changes + 1]
+
+    return df.iloc[np.unique(np.concatenate(indices))]
+
+
+def _init_worker():
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+
+def _render_chart(
+    kind: str, symbol: str, df: pd.DataFrame, path: str, dpi: int, plot_params: dict
+) -> str:
+    import matplotlib.pyplot as plt
+
+    getattr(base, PlotKinds[kind][0])(symbol, df, **plot_params)
+    fig = plt.gcf()
+    try:
+        fig.savefig(path, dpi=dpi)
+    finally:
+        plt.close(fig)
+    return path
+
+
+class ChartRenderer:
+    def __init__(
+        self,
+        output_dir: str,
+        max_points: int = 2000,
+        file_format: Literal["png", "svg", "pdf"] = "png",
+        dpi: int = 100,
+        max_workers: int = None,
+        progress: Callable[[int, int, str, bool], None] = None,
+    ):
+        self.output_dir = output_dir
+        self.max_points = max_points
+        self.file_format = file_format
+        self.dpi = dpi
+        self.max_workers = max_workers or os.cpu_count()
+        self.progress = progress
+        self.charts = {}
+        self.paths = {}
+        self.errors = {}
+
+    def add(
+        self, kind: str, symbol: str, df: pd.DataFrame, name: str = None, **plot_params
+    ) -> str:
+        if kind not in PlotKinds:
+            raise Exception(
+                f"Unknown plot kind {kind}, expected one of {list(PlotKinds)}"
+            )
+        name = name or f"{symbol}_{kind}"
+        if name in self.charts:
+            raise Exception(f"Chart {name} is already added, pass another name")
+        self.charts[name] = (kind, symbol, df, plot_params)
+        return name
+
+    def add_indicator(self, indicator, name: str = None) -> str:
+        kind = IndicatorKinds[type(indicator).__name__]
+        return self.add(kind, indicator.symbol, indicator.get_price_data(), name)
+
+    def add_portfolio(self, portfolio, with_fee: bool = True, name: str = None) -> str:
+        kind = PortfolioKinds[type(portfolio).__name__]
+        return self.add(
+            kind, portfolio.symbol, portfolio.df_portfolio, name, with_fee=with_fee
+        )
+
+    def run(self) -> dict[str, str]:
+        self.paths, self.errors = {}, {}
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        # Spawned workers start without any interactive backend of the parent
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers, mp_context=context, initializer=_init_worker
+        ) as executor:
+            futures = {}
+            for name, (kind, symbol, df, plot_params) in self.charts.items():
+                # Downsampled before submitting, so less is pickled to workers
+                df = downsample(df, self.max_points, PlotKinds[kind][1])
+                path = os.path.join(self.output_dir, f"{name}.{self.file_format}")
+                future = executor.submit(
+                    _render_chart, kind, symbol, df, path, self.dpi, plot_params
+                )
+                futures[future] = name
+
+            for n_done, future in enumerate(as_completed(futures), start=1):
+                name = futures[future]
+                try:
+                    self.paths[name] = future.result()
+                except Exception:
+                    self.errors[name] = traceback.format_exc()
+
+                if self.progress is not None:
+                    self.progress(n_done, len(futures), name, name in self.paths)
+
+        return self.paths
+
+    def get_errors(self) -> dict[str, str]:
+        return self.errors